@@ -4,15 +4,53 @@ EasyCo iOS Design Generator for Penpot
 Creates all screens with the EasyCo design system
 """
 
+import asyncio
+import hashlib
+import os
+import random
 import requests
 import json
 import sys
-from typing import Dict, Any, List, Optional
+import time
+import uuid
+import zipfile
+from functools import lru_cache
+from requests.adapters import HTTPAdapter
+from typing import Dict, Any, List, Optional, Tuple
+
+try:
+    import httpx
+except ImportError:  # httpx is optional: only needed for concurrent calls
+    httpx = None
+
+try:
+    import orjson
+except ImportError:  # orjson is optional: faster change-list serialisation
+    orjson = None
 
 # Penpot Configuration
-PENPOT_BASE_URL = "https://design.penpot.app"
+# PENPOT_BASE_URL can point to a self-hosted instance or a local stub server
+PENPOT_BASE_URL = os.environ.get("PENPOT_BASE_URL", "https://design.penpot.app")
 PENPOT_API_URL = f"{PENPOT_BASE_URL}/api/rpc/command"
 
+# RPC client defaults
+REQUEST_TIMEOUT = 30.0
+MAX_RETRIES = 4
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 20.0
+UPDATE_BATCH_SIZE = 200
+RETRY_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+
+# Objects last sent to each file, with the revn they produced: Penpot
+# normalizes shapes (geometry, fills...), so reruns diff against this instead
+# of the objects read back from the server
+SENT_STATE_PATH = os.environ.get(
+    "PENPOT_STATE_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "penpot_sent_state.json"))
+
+# Tolerance when comparing numbers read back from the server
+FLOAT_TOLERANCE = 1e-6
+
 # Design Tokens - EasyCo Design System
 COLORS = {
     "primary": "#4A148C",
@@ -58,31 +96,192 @@ BORDER_RADIUS = {
 ARTBOARD_WIDTH = 393
 ARTBOARD_HEIGHT = 852
 
+# Penpot root frame of every page
+ROOT_FRAME_ID = "00000000-0000-0000-0000-000000000000"
+
+# Namespace for deterministic object ids: the same screen element gets the
+# same id on every run, which is what makes diffing against the file possible
+OBJECT_ID_NAMESPACE = uuid.UUID("6f1c8d2a-3b7e-4c55-9a41-e5a0c0de1e05")
+_OBJECT_ID_HASH = hashlib.sha1(OBJECT_ID_NAMESPACE.bytes)
+
+PROJECT_NAME = "EasyCo iOS"
+FILE_NAME = "EasyCo iOS Screens"
+
+# Screen name -> position on the canvas
+SCREENS = [
+    ("Welcome Screen", 0, 0),
+    ("Login", 500, 0),
+    ("Resident Dashboard", 1000, 0),
+    ("Property List", 0, 1000),
+    ("Property Detail", 500, 1000),
+    ("Swipe Matching", 1000, 1000),
+    ("Chat", 0, 2000),
+    ("Profile", 500, 2000)
+]
+
+
+@lru_cache(maxsize=None)
+def stable_id(*path: str) -> str:
+    """Deterministic object id for a screen element path
+
+    Same value as uuid.uuid5(OBJECT_ID_NAMESPACE, "/".join(path)), computed
+    from a pre-seeded SHA-1 without building UUID objects.
+    """
+    h = _OBJECT_ID_HASH.copy()
+    h.update("/".join(path).encode("utf-8"))
+    d = bytearray(h.digest()[:16])
+    d[6] = (d[6] & 0x0F) | 0x50  # version 5
+    d[8] = (d[8] & 0x3F) | 0x80  # RFC 4122 variant
+    x = d.hex()
+    return f"{x[:8]}-{x[8:12]}-{x[12:16]}-{x[16:20]}-{x[20:]}"
+
+
+@lru_cache(maxsize=None)
+def parse_hex_color(hex_color: str) -> Dict[str, float]:
+    """Hex color -> Penpot RGB (0-1 range), parsed once per color
+
+    The returned dict is shared between callers: treat it as read-only.
+    """
+    hex_color = hex_color.lstrip('#')
+    r, g, b = tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+    return {
+        "r": r / 255.0,
+        "g": g / 255.0,
+        "b": b / 255.0,
+        "alpha": 1.0
+    }
+
+
+def dumps(data: Any) -> bytes:
+    """Compact JSON encoding, with orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE, cap: float = BACKOFF_MAX) -> float:
+    """Exponential backoff with full jitter for the given retry attempt (0-based)"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def retry_after_delay(headers) -> Optional[float]:
+    """Parse a numeric Retry-After header, if any"""
+    value = headers.get("Retry-After") if headers else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def chunked(items: List[Dict], size: int) -> List[List[Dict]]:
+    """Split a change list into update-file batches of at most `size` changes"""
+    return [items[i:i + size] for i in range(0, len(items), size)] or [[]]
+
+
+def same_value(stored: Any, sent: Any) -> bool:
+    """Whether a value read back from Penpot still matches the value we set
+
+    Only what we set is compared: keys the server added to a dict are
+    ignored, and ints/floats compare with FLOAT_TOLERANCE.
+    """
+    if isinstance(sent, dict):
+        return isinstance(stored, dict) and all(
+            same_value(stored.get(key), value) for key, value in sent.items())
+    if isinstance(sent, (list, tuple)):
+        return (isinstance(stored, (list, tuple)) and len(stored) == len(sent)
+                and all(same_value(a, b) for a, b in zip(stored, sent)))
+    if isinstance(sent, (int, float)) and not isinstance(sent, bool):
+        return (isinstance(stored, (int, float)) and not isinstance(stored, bool)
+                and abs(stored - sent) <= FLOAT_TOLERANCE)
+    return stored == sent
+
+
+def load_sent_state(path: str) -> Dict[str, Dict]:
+    """{file key: {"revn": n, "objects": {...}}} from the sent-state file"""
+    try:
+        with open(path, "rb") as f:
+            return json.loads(f.read())
+    except (OSError, ValueError):
+        return {}
+
+
+def save_sent_state(path: str, key: str, revn: int, objects: Dict[str, Dict]) -> None:
+    """Record the objects sent to a file and the revn they produced"""
+    state = load_sent_state(path)
+    state[key] = {"revn": revn, "objects": objects}
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(dumps(state))
+    os.replace(tmp_path, path)
+
 
 class PenpotAPI:
-    """Penpot API Client"""
+    """Penpot API Client
 
-    def __init__(self, token: str):
+    Reuses one pooled HTTP session, applies a timeout to every call and
+    retries transient failures (connection errors, 429/5xx) with jittered
+    exponential backoff. File revisions (revn/vern) are tracked per file from
+    each response so update-file never sends a stale revision.
+    """
+
+    def __init__(self, token: str, base_url: str = PENPOT_BASE_URL,
+                 timeout: float = REQUEST_TIMEOUT, max_retries: int = MAX_RETRIES,
+                 batch_size: int = UPDATE_BATCH_SIZE):
         self.token = token
+        self.api_url = f"{base_url.rstrip('/')}/api/rpc/command"
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.batch_size = batch_size
+        self.session_id = str(uuid.uuid4())
+        self.revisions: Dict[str, Dict[str, int]] = {}
+
         self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
+        self.session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16))
         self.session.headers.update({
             "Authorization": f"Token {token}",
-            "Content-Type": "application/json"
+            "Content-Type": "application/json",
+            "Accept": "application/json"
         })
 
     def rpc_call(self, command: str, params: Dict[str, Any]) -> Dict[str, Any]:
         """Make an RPC call to Penpot API"""
-        url = f"{PENPOT_API_URL}/{command}"
-
-        try:
-            response = self.session.post(url, json=params)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            print(f"❌ Error calling {command}: {e}")
-            if hasattr(e.response, 'text'):
-                print(f"Response: {e.response.text}")
-            return None
+        url = f"{self.api_url}/{command}"
+
+        for attempt in range(self.max_retries + 1):
+            try:
+                response = self.session.post(url, data=dumps(params), timeout=self.timeout)
+                if response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries:
+                    delay = retry_after_delay(response.headers)
+                    if delay is None:
+                        delay = backoff_delay(attempt)
+                    print(f"⏳ {command}: HTTP {response.status_code}, retry in {delay:.2f}s")
+                    time.sleep(delay)
+                    continue
+                response.raise_for_status()
+                return response.json()
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt < self.max_retries:
+                    delay = backoff_delay(attempt)
+                    print(f"⏳ {command}: {type(e).__name__}, retry in {delay:.2f}s")
+                    time.sleep(delay)
+                    continue
+                print(f"❌ Error calling {command}: {e}")
+                return None
+            except requests.exceptions.RequestException as e:
+                print(f"❌ Error calling {command}: {e}")
+                if getattr(e, 'response', None) is not None:
+                    print(f"Response: {e.response.text}")
+                return None
+
+    def track_revision(self, file_id: str, data: Optional[Dict]) -> None:
+        """Record revn/vern reported by a file-level response"""
+        if isinstance(data, dict) and "revn" in data:
+            self.revisions[file_id] = {
+                "revn": data.get("revn", 0),
+                "vern": data.get("vern", 0)
+            }
 
     def get_profile(self) -> Optional[Dict]:
         """Get user profile"""
@@ -102,33 +301,443 @@ class PenpotAPI:
 
     def create_file(self, project_id: str, name: str) -> Optional[Dict]:
         """Create a new file in a project"""
-        return self.rpc_call("create-file", {
+        result = self.rpc_call("create-file", {
             "project-id": project_id,
             "name": name,
             "is-shared": False
         })
+        if result:
+            self.track_revision(result.get("id"), result)
+        return result
+
+    def list_files(self, project_id: str) -> List[Dict]:
+        """List all files of a project"""
+        result = self.rpc_call("get-project-files", {"project-id": project_id})
+        return result if result else []
 
     def get_file(self, file_id: str) -> Optional[Dict]:
         """Get file data"""
-        return self.rpc_call("get-file", {"id": file_id})
+        result = self.rpc_call("get-file", {"id": file_id})
+        self.track_revision(file_id, result)
+        return result
 
     def update_file(self, file_id: str, changes: List[Dict]) -> Optional[Dict]:
-        """Update file with changes"""
-        return self.rpc_call("update-file", {
+        """Update file with changes, in batches of `batch_size` changes
+
+        Each batch is sent with the latest known revn/vern for the file, which
+        is then advanced from the response (or by one if the server does not
+        echo it). Stops at the first failed batch.
+        """
+        if file_id not in self.revisions:
+            self.get_file(file_id)
+
+        result = None
+        for batch in chunked(changes, self.batch_size):
+            revision = self.revisions.setdefault(file_id, {"revn": 0, "vern": 0})
+            result = self.rpc_call("update-file", {
+                "id": file_id,
+                "session-id": self.session_id,
+                "revn": revision["revn"],
+                "vern": revision["vern"],
+                "changes": batch
+            })
+            if result is None:
+                return None
+            if isinstance(result, dict) and "revn" in result:
+                self.track_revision(file_id, result)
+            else:
+                revision["revn"] += 1
+        return result if result is not None else {}
+
+
+class AsyncPenpotAPI:
+    """Concurrent Penpot client (httpx) for independent RPC calls
+
+    Same retry/backoff policy as PenpotAPI, over one shared HTTP/1.1
+    connection pool. Use it for calls that do not depend on each other (e.g.
+    fetching or updating several files); batches of the same file must stay
+    sequential because each one advances the file revn.
+    """
+
+    def __init__(self, token: str, base_url: str = PENPOT_BASE_URL,
+                 timeout: float = REQUEST_TIMEOUT, max_retries: int = MAX_RETRIES,
+                 concurrency: int = 8):
+        if httpx is None:
+            raise RuntimeError("httpx is required for concurrent Penpot calls (pip install httpx)")
+        self.api_url = f"{base_url.rstrip('/')}/api/rpc/command"
+        self.max_retries = max_retries
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.client = httpx.AsyncClient(
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency),
+            headers={
+                "Authorization": f"Token {token}",
+                "Content-Type": "application/json",
+                "Accept": "application/json"
+            }
+        )
+
+    async def rpc_call(self, command: str, params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Make an RPC call, retrying transient failures with jittered backoff"""
+        url = f"{self.api_url}/{command}"
+
+        async with self.semaphore:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    response = await self.client.post(url, content=dumps(params))
+                    if response.status_code in RETRY_STATUS_CODES and attempt < self.max_retries:
+                        delay = retry_after_delay(response.headers)
+                        await asyncio.sleep(backoff_delay(attempt) if delay is None else delay)
+                        continue
+                    response.raise_for_status()
+                    return response.json()
+                except (httpx.TransportError, httpx.TimeoutException) as e:
+                    if attempt < self.max_retries:
+                        await asyncio.sleep(backoff_delay(attempt))
+                        continue
+                    print(f"❌ Error calling {command}: {e}")
+                    return None
+                except httpx.HTTPStatusError as e:
+                    print(f"❌ Error calling {command}: {e}")
+                    print(f"Response: {e.response.text}")
+                    return None
+
+    async def rpc_many(self, calls: List[Tuple[str, Dict[str, Any]]]) -> List[Optional[Dict[str, Any]]]:
+        """Run independent (command, params) calls concurrently, results in order"""
+        return await asyncio.gather(*(self.rpc_call(command, params) for command, params in calls))
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+
+class LocalPenpotBackend:
+    """Offline drop-in for PenpotAPI writing a local bundle instead of RPC calls
+
+    Keeps the file objects in memory (so the generator can diff against
+    them), streams every update-file batch to `<bundle>.changes.jsonl` as it
+    is applied (e.g. `screens.penpot.changes.jsonl`, so a .penpot and a .json
+    bundle with the same stem keep separate logs), and writes the bundle on
+    close():
+
+    - `.penpot`: zip laid out like a Penpot export (manifest.json,
+      files/<file>.json, files/<file>/pages/<page>.json and one
+      files/<file>/pages/<page>/<object>.json entry per object)
+    - `.json`: a single JSON document with the same content
+
+    An existing bundle is loaded on start, so reruns only log the delta.
+    Ids are derived from names, the same inputs always give the same bundle.
+    """
+
+    def __init__(self, path: str, batch_size: int = UPDATE_BATCH_SIZE):
+        self.path = path
+        self.batch_size = batch_size
+        self.team_id = stable_id("team", "local")
+        self.projects: Dict[str, Dict] = {}
+        self.files: Dict[str, Dict] = {}
+        self.pages: Dict[str, Dict[str, Dict]] = {}  # file id -> page id -> objects
+        self.changes_path = f"{path}.changes.jsonl"
+        self.changes_log = None
+        self.change_count = 0
+
+        if os.path.exists(path):
+            self.load()
+
+    # --- PenpotAPI interface ---
+
+    def get_profile(self) -> Optional[Dict]:
+        return {"fullname": "Offline export", "default-team-id": self.team_id}
+
+    def list_projects(self, team_id: str) -> List[Dict]:
+        return list(self.projects.values())
+
+    def create_project(self, team_id: str, name: str) -> Optional[Dict]:
+        project = {"id": stable_id("project", name), "team-id": team_id, "name": name}
+        self.projects[project["id"]] = project
+        return project
+
+    def create_file(self, project_id: str, name: str) -> Optional[Dict]:
+        file_id = stable_id("file", project_id, name)
+        page_id = stable_id("page", file_id)
+        self.files[file_id] = {
             "id": file_id,
+            "project-id": project_id,
+            "name": name,
             "revn": 0,
-            "changes": changes
+            "vern": 0,
+            "pages": [{"id": page_id, "name": "Page 1"}]
+        }
+        self.pages[file_id] = {page_id: {ROOT_FRAME_ID: self.root_frame()}}
+        return self.files[file_id]
+
+    def list_files(self, project_id: str) -> List[Dict]:
+        return [f for f in self.files.values() if f["project-id"] == project_id]
+
+    def get_file(self, file_id: str) -> Optional[Dict]:
+        meta = self.files.get(file_id)
+        if meta is None:
+            return None
+        return dict(meta, data={
+            "pages": [page["id"] for page in meta["pages"]],
+            "pages-index": {page_id: {"id": page_id, "objects": objects}
+                            for page_id, objects in self.pages[file_id].items()}
         })
 
+    def update_file(self, file_id: str, changes: List[Dict]) -> Optional[Dict]:
+        """Apply changes in batches, appending each batch to the changes log"""
+        meta = self.files.get(file_id)
+        if meta is None:
+            print(f"❌ Unknown file: {file_id}")
+            return None
 
-class EasyCoDesignGenerator:
-    """Generate EasyCo iOS designs in Penpot"""
+        if self.changes_log is None:
+            self.changes_log = open(self.changes_path, "ab")
+
+        for batch in chunked(changes, self.batch_size):
+            for change in batch:
+                self.apply_change(file_id, change)
+            meta["revn"] += 1
+            self.changes_log.write(dumps({
+                "id": file_id,
+                "revn": meta["revn"],
+                "changes": batch
+            }) + b"\n")
+            self.change_count += len(batch)
+        self.changes_log.flush()
+        return {"revn": meta["revn"]}
+
+    # --- Local state ---
+
+    @staticmethod
+    def root_frame() -> Dict:
+        return {
+            "id": ROOT_FRAME_ID,
+            "type": "frame",
+            "name": "Root Frame",
+            "parent-id": ROOT_FRAME_ID,
+            "frame-id": ROOT_FRAME_ID
+        }
 
-    def __init__(self, api: PenpotAPI):
-        self.api = api
+    def apply_change(self, file_id: str, change: Dict) -> None:
+        objects = self.pages[file_id].setdefault(change.get("page-id"), {ROOT_FRAME_ID: self.root_frame()})
+        kind = change["type"]
+
+        if kind == "add-obj":
+            objects[change["id"]] = dict(change["obj"])
+        elif kind == "mod-obj":
+            obj = objects.get(change["id"])
+            if obj is None:
+                return
+            for op in change.get("operations", []):
+                if op.get("type") != "set":
+                    continue
+                if op.get("val") is None:
+                    obj.pop(op["attr"], None)
+                else:
+                    obj[op["attr"]] = op["val"]
+        elif kind == "del-obj":
+            # Like Penpot, deleting a shape deletes its children
+            doomed = {change["id"]}
+            while True:
+                children = {obj_id for obj_id, obj in objects.items()
+                            if obj.get("parent-id") in doomed and obj_id not in doomed
+                            and obj_id != ROOT_FRAME_ID}
+                if not children:
+                    break
+                doomed |= children
+            for obj_id in doomed:
+                objects.pop(obj_id, None)
+
+    def manifest(self) -> Dict:
+        return {
+            "version": 1,
+            "type": "penpot/export-files",
+            "generated-by": "easyco/penpot_generator.py",
+            "projects": list(self.projects.values()),
+            "files": [{"id": f["id"], "name": f["name"], "project-id": f["project-id"]}
+                      for f in self.files.values()]
+        }
+
+    def load(self) -> None:
+        """Load projects, files and objects from an existing bundle"""
+        if self.path.endswith(".json"):
+            with open(self.path, encoding="utf-8") as fh:
+                bundle = json.load(fh)
+            manifest = bundle["manifest"]
+            files = bundle["files"]
+        else:
+            with zipfile.ZipFile(self.path) as zf:
+                manifest = json.loads(zf.read("manifest.json"))
+                files = []
+                for entry in manifest["files"]:
+                    meta = json.loads(zf.read(f"files/{entry['id']}.json"))
+                    meta["pages-index"] = {}
+                    for page in meta["pages"]:
+                        prefix = f"files/{meta['id']}/pages/{page['id']}/"
+                        meta["pages-index"][page["id"]] = {
+                            name[len(prefix):-len(".json")]: json.loads(zf.read(name))
+                            for name in zf.namelist() if name.startswith(prefix)
+                        }
+                    files.append(meta)
+
+        self.projects = {p["id"]: p for p in manifest.get("projects", [])}
+        for meta in files:
+            self.pages[meta["id"]] = meta.pop("pages-index")
+            self.files[meta["id"]] = meta
+
+    def close(self) -> None:
+        """Write the bundle, streaming objects one at a time"""
+        if self.changes_log is not None:
+            self.changes_log.close()
+            self.changes_log = None
+
+        tmp_path = f"{self.path}.tmp"
+        if self.path.endswith(".json"):
+            with open(tmp_path, "wb") as fh:
+                fh.write(b'{"manifest":' + dumps(self.manifest()) + b',"files":[')
+                for i, meta in enumerate(self.files.values()):
+                    fh.write((b"," if i else b"") + dumps(meta)[:-1] + b',"pages-index":{')
+                    for j, (page_id, objects) in enumerate(self.pages[meta["id"]].items()):
+                        fh.write((b"," if j else b"") + dumps(page_id) + b":{")
+                        for k, (obj_id, obj) in enumerate(objects.items()):
+                            fh.write((b"," if k else b"") + dumps(obj_id) + b":" + dumps(obj))
+                        fh.write(b"}")
+                    fh.write(b"}}")
+                fh.write(b"]}\n")
+        else:
+            with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED) as zf:
+                zf.writestr("manifest.json", json.dumps(self.manifest(), indent=2, ensure_ascii=False))
+                for meta in self.files.values():
+                    zf.writestr(f"files/{meta['id']}.json", json.dumps(meta, indent=2, ensure_ascii=False))
+                    for page in meta["pages"]:
+                        prefix = f"files/{meta['id']}/pages/{page['id']}"
+                        zf.writestr(f"{prefix}.json", dumps(page))
+                        for obj_id, obj in self.pages[meta["id"]].get(page["id"], {}).items():
+                            zf.writestr(f"{prefix}/{obj_id}.json", dumps(obj))
+        os.replace(tmp_path, self.path)
+        print(f"📦 Wrote {self.path} ({self.change_count} changes logged to {self.changes_path})")
+
+
+class ScreenBuilder:
+    """Collects the objects of one screen, with ids derived from element keys
+
+    Coordinates passed to the helpers are relative to the screen; they are
+    made absolute here. Objects are kept in insertion order (parents first).
+    """
+
+    def __init__(self, generator: "EasyCoDesignGenerator", name: str, x: int, y: int):
+        self.generator = generator
+        self.name = name
+        self.x = x
+        self.y = y
+        self.frame_id = stable_id(name)
+        self.objects: Dict[str, Dict] = {}
+        self.add(generator.frame_obj(self.frame_id, name, x, y))
+
+    def add(self, obj: Dict) -> Dict:
+        self.objects[obj["id"]] = obj
+        return obj
+
+    def rect(self, key: str, x: int, y: int, width: int, height: int,
+             color: str, radius: int = 0) -> Dict:
+        return self.add(self.generator.rect_obj(
+            stable_id(self.name, key), self.frame_id, key,
+            self.x + x, self.y + y, width, height, color, radius))
+
+    def text(self, key: str, content: str, x: int, y: int, size: int,
+             color: str = "textPrimary", weight: str = "normal") -> Dict:
+        return self.add(self.generator.text_obj(
+            stable_id(self.name, key), self.frame_id, key, content,
+            self.x + x, self.y + y, size, color, weight))
+
+    # --- Components built from the design tokens ---
+
+    def header(self, title: str, subtitle: Optional[str] = None) -> int:
+        """Large title header; returns the y where content starts"""
+        pad = SPACING["lg"]
+        self.text("header/title", title, pad, 64, 32, "textPrimary", "bold")
+        y = 64 + 40
+        if subtitle:
+            self.text("header/subtitle", subtitle, pad, y, 15, "textSecondary")
+            y += 20 + SPACING["xs"]
+        return y + SPACING["lg"]
+
+    def button(self, key: str, label: str, y: int, style: str = "primary") -> int:
+        """Full-width pill button; returns the y below it"""
+        pad = SPACING["lg"]
+        height = 56
+        fill = {"primary": "primary", "accent": "accentOrange", "secondary": "cardBackground"}[style]
+        text_color = "textPrimary" if style == "secondary" else "textOnPrimary"
+        self.rect(f"{key}/bg", pad, y, ARTBOARD_WIDTH - 2 * pad, height, fill, BORDER_RADIUS["pill"])
+        self.text(f"{key}/label", label, pad + SPACING["lg"], y + 18, 17, text_color, "bold")
+        return y + height + SPACING["sm"]
+
+    def input_field(self, key: str, placeholder: str, y: int) -> int:
+        """Rounded text field; returns the y below it"""
+        pad = SPACING["lg"]
+        self.rect(f"{key}/bg", pad, y, ARTBOARD_WIDTH - 2 * pad, 52, "backgroundSecondary", BORDER_RADIUS["md"])
+        self.text(f"{key}/placeholder", placeholder, pad + SPACING["md"], y + 16, 16, "textTertiary")
+        return y + 52 + SPACING["sm"]
+
+    def card(self, key: str, y: int, height: int, title: str,
+             subtitle: Optional[str] = None, accent: Optional[str] = None) -> int:
+        """Content card with optional accent strip; returns the y below it"""
+        pad = SPACING["lg"]
+        width = ARTBOARD_WIDTH - 2 * pad
+        self.rect(f"{key}/bg", pad, y, width, height, "cardBackground", BORDER_RADIUS["lg"])
+        inset = SPACING["md"]
+        if accent:
+            self.rect(f"{key}/accent", pad, y, SPACING["xs"] // 2, height, accent)
+            inset += SPACING["xs"]
+        self.text(f"{key}/title", title, pad + inset, y + SPACING["md"], 17, "textPrimary", "bold")
+        if subtitle:
+            self.text(f"{key}/subtitle", subtitle, pad + inset, y + SPACING["md"] + 24, 14, "textSecondary")
+        return y + height + SPACING["md"]
+
+    def tab_bar(self, active: int) -> None:
+        """Bottom tab bar with five items, `active` highlighted"""
+        height = 83
+        top = ARTBOARD_HEIGHT - height
+        self.rect("tabbar/bg", 0, top, ARTBOARD_WIDTH, height, "cardBackground")
+        self.rect("tabbar/divider", 0, top, ARTBOARD_WIDTH, 1, "divider")
+        slot = ARTBOARD_WIDTH // 5
+        for i, label in enumerate(["Home", "Search", "Match", "Chat", "Profile"]):
+            color = "primary" if i == active else "textTertiary"
+            self.rect(f"tabbar/{i}/icon", i * slot + (slot - 24) // 2, top + SPACING["xs"], 24, 24, color, BORDER_RADIUS["sm"])
+            self.text(f"tabbar/{i}/label", label, i * slot + SPACING["sm"], top + 38, 10, color)
+
+
+class EasyCoDesignGenerator:
+    """Generate EasyCo iOS designs in Penpot
+
+    Each run builds the full desired object graph of every screen from the
+    design tokens, diffs it against the objects already in the file and sends
+    only the add/modify/delete changes. Against a Penpot server, modifications
+    are diffed against the objects sent by the previous run when the file is
+    still at the revn that run left it at (see SENT_STATE_PATH).
+    """
+
+    def __init__(self, api, state_path: Optional[str] = SENT_STATE_PATH):
+        self.api = api  # PenpotAPI or LocalPenpotBackend
+        self.state_path = state_path
         self.project_id = None
         self.file_id = None
         self.page_id = None
+        self.existing_objects: Dict[str, Dict] = {}
+        self.sent_objects: Optional[Dict[str, Dict]] = None
+
+        # Token table compiled once: every shape of a color shares the same
+        # fills list, every text style the same typography dict (read-only)
+        self.fills: Dict[str, List[Dict]] = {
+            token: [{"fill-color": parse_hex_color(hex_color), "fill-opacity": 1.0}]
+            for token, hex_color in COLORS.items()
+        }
+        self.typographies: Dict[Tuple[int, str, str], Dict] = {}
 
     def create_project(self) -> bool:
         """Create EasyCo iOS project"""
@@ -150,13 +759,13 @@ class EasyCoDesignGenerator:
         # Check if project already exists
         projects = self.api.list_projects(team_id)
         for project in projects:
-            if project.get("name") == "EasyCo iOS":
+            if project.get("name") == PROJECT_NAME:
                 print(f"✅ Project already exists: {project.get('id')}")
                 self.project_id = project.get("id")
                 return True
 
         # Create new project
-        project = self.api.create_project(team_id, "EasyCo iOS")
+        project = self.api.create_project(team_id, PROJECT_NAME)
         if not project:
             print("❌ Failed to create project")
             return False
@@ -166,155 +775,350 @@ class EasyCoDesignGenerator:
         return True
 
     def create_file(self) -> bool:
-        """Create design file"""
-        print("📄 Creating design file...")
+        """Find or create the design file and load its current objects"""
+        print("📄 Looking for design file...")
 
         if not self.project_id:
             print("❌ No project ID")
             return False
 
-        file_data = self.api.create_file(self.project_id, "EasyCo iOS Screens")
-        if not file_data:
-            print("❌ Failed to create file")
-            return False
-
-        self.file_id = file_data.get("id")
-
-        # Get file to find page ID
+        for existing in self.api.list_files(self.project_id):
+            if existing.get("name") == FILE_NAME:
+                self.file_id = existing.get("id")
+                print(f"✅ File already exists: {self.file_id}")
+                break
+        else:
+            file_data = self.api.create_file(self.project_id, FILE_NAME)
+            if not file_data:
+                print("❌ Failed to create file")
+                return False
+            self.file_id = file_data.get("id")
+            print(f"✅ Created file: {self.file_id}")
+
+        # Get file to find page ID and current objects
         file_full = self.api.get_file(self.file_id)
         if not file_full:
             print("❌ Failed to get file data")
             return False
 
-        pages = file_full.get("data", {}).get("pages", [])
+        data = file_full.get("data", {})
+        pages = data.get("pages", [])
         if pages:
-            self.page_id = pages[0].get("id")
-
-        print(f"✅ Created file: {self.file_id}")
-        print(f"✅ Found page: {self.page_id}")
+            first = pages[0]
+            self.page_id = first.get("id") if isinstance(first, dict) else first
+        page = data.get("pages-index", {}).get(self.page_id, {})
+        self.existing_objects = page.get("objects", {}) or {}
+
+        print(f"✅ Found page: {self.page_id} ({len(self.existing_objects)} objects)")
+
+        self.sent_objects = None
+        key = self.state_key()
+        saved = load_sent_state(self.state_path).get(key) if key else None
+        if saved:
+            revn = self.api.revisions.get(self.file_id, {}).get("revn")
+            if saved.get("revn") == revn:
+                self.sent_objects = saved.get("objects")
+                print(f"✅ Diffing against the objects sent at revn {revn}")
+            else:
+                print(f"⚠️  File edited since the last run (revn {saved.get('revn')} → {revn}), "
+                      "comparing the attributes we set")
         return True
 
+    def state_key(self) -> Optional[str]:
+        """Sent-state key of the file (None offline: a bundle keeps objects as sent)"""
+        if not self.state_path or not isinstance(self.api, PenpotAPI) or not self.file_id:
+            return None
+        return f"{self.api.api_url}#{self.file_id}"
+
+    def remember_sent(self, desired: Dict[str, Dict]) -> None:
+        """Persist the objects the file now holds, with its current revn"""
+        key = self.state_key()
+        revision = self.api.revisions.get(self.file_id) if key else None
+        if revision is not None:
+            save_sent_state(self.state_path, key, revision["revn"], desired)
+
     def hex_to_rgb(self, hex_color: str) -> Dict[str, float]:
         """Convert hex color to RGB (0-1 range)"""
-        hex_color = hex_color.lstrip('#')
-        r, g, b = tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-        return {
-            "r": r / 255.0,
-            "g": g / 255.0,
-            "b": b / 255.0,
-            "alpha": 1.0
-        }
+        return parse_hex_color(hex_color)
+
+    def fill(self, token: str) -> List[Dict]:
+        """Shared fills for a COLORS token"""
+        return self.fills[token]
+
+    def typography(self, size: int, color: str, weight: str) -> Dict:
+        """Shared typography for a size/COLORS token/weight combination"""
+        key = (size, color, weight)
+        typography = self.typographies.get(key)
+        if typography is None:
+            typography = self.typographies[key] = {
+                "font-family": "SF Pro Display",
+                "font-size": size,
+                "font-weight": weight,
+                "fill-color": self.fills[color][0]["fill-color"]
+            }
+        return typography
 
-    def create_artboard(self, name: str, x: int, y: int) -> Dict:
-        """Create an artboard/frame"""
+    def frame_obj(self, obj_id: str, name: str, x: int, y: int) -> Dict:
+        """Artboard/frame object"""
         return {
-            "type": "add-obj",
-            "page-id": self.page_id,
-            "obj": {
-                "type": "frame",
-                "name": name,
-                "x": x,
-                "y": y,
-                "width": ARTBOARD_WIDTH,
-                "height": ARTBOARD_HEIGHT,
-                "fills": [{
-                    "fill-color": self.hex_to_rgb(COLORS["backgroundPrimary"]),
-                    "fill-opacity": 1.0
-                }]
-            }
+            "id": obj_id,
+            "type": "frame",
+            "name": name,
+            "parent-id": ROOT_FRAME_ID,
+            "frame-id": ROOT_FRAME_ID,
+            "x": x,
+            "y": y,
+            "width": ARTBOARD_WIDTH,
+            "height": ARTBOARD_HEIGHT,
+            "fills": self.fill("backgroundPrimary")
         }
 
-    def create_rectangle(self, parent_id: str, name: str, x: int, y: int,
-                        width: int, height: int, color: str, radius: int = 0) -> Dict:
-        """Create a rectangle shape"""
+    def rect_obj(self, obj_id: str, frame_id: str, name: str, x: int, y: int,
+                 width: int, height: int, color: str, radius: int = 0) -> Dict:
+        """Rectangle object (color is a COLORS token)"""
         return {
-            "type": "add-obj",
-            "page-id": self.page_id,
-            "parent-id": parent_id,
-            "obj": {
-                "type": "rect",
-                "name": name,
-                "x": x,
-                "y": y,
-                "width": width,
-                "height": height,
-                "rx": radius,
-                "ry": radius,
-                "fills": [{
-                    "fill-color": self.hex_to_rgb(color),
-                    "fill-opacity": 1.0
-                }]
-            }
+            "id": obj_id,
+            "type": "rect",
+            "name": name,
+            "parent-id": frame_id,
+            "frame-id": frame_id,
+            "x": x,
+            "y": y,
+            "width": width,
+            "height": height,
+            "rx": radius,
+            "ry": radius,
+            "fills": self.fill(color)
         }
 
-    def create_text(self, parent_id: str, name: str, content: str,
-                   x: int, y: int, size: int, color: str, weight: str = "normal") -> Dict:
-        """Create a text element"""
+    def text_obj(self, obj_id: str, frame_id: str, name: str, content: str,
+                 x: int, y: int, size: int, color: str, weight: str = "normal") -> Dict:
+        """Text object (color is a COLORS token)"""
         return {
-            "type": "add-obj",
-            "page-id": self.page_id,
-            "parent-id": parent_id,
-            "obj": {
-                "type": "text",
-                "name": name,
-                "x": x,
-                "y": y,
-                "content": content,
-                "typography": {
-                    "font-family": "SF Pro Display",
-                    "font-size": size,
-                    "font-weight": weight,
-                    "fill-color": self.hex_to_rgb(color)
-                }
-            }
+            "id": obj_id,
+            "type": "text",
+            "name": name,
+            "parent-id": frame_id,
+            "frame-id": frame_id,
+            "x": x,
+            "y": y,
+            "content": content,
+            "typography": self.typography(size, color, weight)
         }
 
-    def generate_welcome_screen(self) -> List[Dict]:
-        """Generate Welcome Screen"""
-        print("🎨 Generating Welcome Screen...")
-
+    # ============================================
+    # SCREENS
+    # ============================================
+
+    def build_welcome_screen(self, screen: ScreenBuilder) -> None:
+        """Welcome: brand hero, glass sheet with the two entry buttons"""
+        screen.rect("hero", 0, 0, ARTBOARD_WIDTH, 520, "primary")
+        screen.rect("hero/glow", 220, -60, 260, 260, "primaryLight", BORDER_RADIUS["pill"])
+        screen.text("hero/logo", "EasyCo", SPACING["lg"], 300, 44, "textOnPrimary", "bold")
+        screen.text("hero/tagline", "Find your people, not just a place", SPACING["lg"], 356, 17, "textOnPrimary")
+
+        sheet_top = 480
+        screen.rect("sheet", 0, sheet_top, ARTBOARD_WIDTH, ARTBOARD_HEIGHT - sheet_top, "cardBackground", BORDER_RADIUS["xxl"])
+        y = screen.button("cta/signup", "Get started", sheet_top + SPACING["xl"], "primary")
+        y = screen.button("cta/login", "I already have an account", y, "secondary")
+        screen.text("legal", "By continuing you accept our Terms", SPACING["lg"], y + SPACING["md"], 12, "textTertiary")
+
+    def build_login_screen(self, screen: ScreenBuilder) -> None:
+        y = screen.header("Welcome back", "Log in to your EasyCo account")
+        y = screen.input_field("email", "Email", y)
+        y = screen.input_field("password", "Password", y)
+        screen.text("forgot", "Forgot password?", SPACING["lg"], y, 14, "primary")
+        y = screen.button("submit", "Log in", y + SPACING["xl"], "primary")
+        screen.button("apple", "Continue with Apple", y, "secondary")
+
+    def build_resident_dashboard_screen(self, screen: ScreenBuilder) -> None:
+        y = screen.header("Hi Sam 👋", "Your coliving at a glance")
+        pad = SPACING["lg"]
+        half = (ARTBOARD_WIDTH - 2 * pad - SPACING["sm"]) // 2
+        for i, (label, value, color) in enumerate([("Rent due", "€650", "accentOrange"),
+                                                   ("Open tasks", "3", "success")]):
+            x = pad + i * (half + SPACING["sm"])
+            screen.rect(f"stat/{i}/bg", x, y, half, 96, "cardBackground", BORDER_RADIUS["lg"])
+            screen.text(f"stat/{i}/value", value, x + SPACING["md"], y + SPACING["md"], 28, color, "bold")
+            screen.text(f"stat/{i}/label", label, x + SPACING["md"], y + 60, 13, "textSecondary")
+        y += 96 + SPACING["lg"]
+        y = screen.card("expenses", y, 88, "Shared expenses", "2 receipts to review", "accentPink")
+        y = screen.card("calendar", y, 88, "This week", "Cleaning rota · House meeting", "info")
+        screen.card("messages", y, 88, "Messages", "4 unread in House chat", "primary")
+        screen.tab_bar(active=0)
+
+    def build_property_list_screen(self, screen: ScreenBuilder) -> None:
+        y = screen.header("Explore", "Brussels · 128 rooms")
+        y = screen.input_field("search", "Search a neighbourhood", y)
+        for i, (title, subtitle) in enumerate([("Ixelles · Room in 4-person house", "€590/month · 92% match"),
+                                               ("Saint-Gilles · Loft room", "€640/month · 87% match"),
+                                               ("Etterbeek · Studio in coliving", "€720/month · 81% match")]):
+            screen.rect(f"listing/{i}/photo", SPACING["lg"], y, ARTBOARD_WIDTH - 2 * SPACING["lg"], 120,
+                        "backgroundSecondary", BORDER_RADIUS["lg"])
+            y = screen.card(f"listing/{i}", y + 120 - SPACING["lg"], 72, title, subtitle)
+        screen.tab_bar(active=1)
+
+    def build_property_detail_screen(self, screen: ScreenBuilder) -> None:
+        screen.rect("photo", 0, 0, ARTBOARD_WIDTH, 320, "backgroundSecondary")
+        screen.rect("match-badge", SPACING["lg"], 260, 112, 36, "success", BORDER_RADIUS["pill"])
+        screen.text("match-badge/label", "92% match", SPACING["lg"] + SPACING["md"], 268, 14, "textOnPrimary", "bold")
+        y = 320 + SPACING["lg"]
+        screen.text("title", "Room in Ixelles", SPACING["lg"], y, 26, "textPrimary", "bold")
+        screen.text("price", "€590 / month · bills included", SPACING["lg"], y + 36, 16, "textSecondary")
+        y += 72 + SPACING["md"]
+        y = screen.card("housemates", y, 88, "3 housemates", "Students & young professionals", "accentYellow")
+        screen.card("amenities", y, 88, "Amenities", "Garden · Washing machine · Fibre", "info")
+        screen.button("apply", "Apply to visit", ARTBOARD_HEIGHT - 56 - SPACING["xl"], "accent")
+
+    def build_swipe_matching_screen(self, screen: ScreenBuilder) -> None:
+        y = screen.header("Matches", "Swipe to find your housemates")
+        pad = SPACING["lg"]
+        width = ARTBOARD_WIDTH - 2 * pad
+        screen.rect("card/back", pad + SPACING["sm"], y + SPACING["sm"], width - 2 * SPACING["sm"], 440,
+                    "backgroundSecondary", BORDER_RADIUS["xl"])
+        screen.rect("card/front", pad, y, width, 440, "cardBackground", BORDER_RADIUS["xl"])
+        screen.rect("card/photo", pad, y, width, 300, "primaryLight", BORDER_RADIUS["xl"])
+        screen.text("card/name", "Léa, 24", pad + SPACING["md"], y + 316, 24, "textPrimary", "bold")
+        screen.text("card/bio", "Early bird · Loves cooking · Tidy", pad + SPACING["md"], y + 352, 15, "textSecondary")
+        actions_y = y + 440 + SPACING["lg"]
+        for i, color in enumerate(["error", "accentYellow", "success"]):
+            x = ARTBOARD_WIDTH // 2 - 100 + i * 72
+            screen.rect(f"action/{i}", x, actions_y, 56, 56, color, BORDER_RADIUS["pill"])
+        screen.tab_bar(active=2)
+
+    def build_chat_screen(self, screen: ScreenBuilder) -> None:
+        y = screen.header("House chat", "4 members")
+        pad = SPACING["lg"]
+        for i, (mine, text) in enumerate([(False, "Who's home tonight?"),
+                                          (True, "Me! Cooking pasta 🍝"),
+                                          (False, "Save me a plate"),
+                                          (True, "Deal")]):
+            width = 220
+            x = ARTBOARD_WIDTH - pad - width if mine else pad
+            screen.rect(f"bubble/{i}", x, y, width, 48, "primary" if mine else "cardBackground", BORDER_RADIUS["lg"])
+            screen.text(f"bubble/{i}/text", text, x + SPACING["md"], y + 14, 15,
+                        "textOnPrimary" if mine else "textPrimary")
+            y += 48 + SPACING["sm"]
+        composer_y = ARTBOARD_HEIGHT - 83 - 52 - SPACING["sm"]
+        screen.input_field("composer", "Message", composer_y)
+        screen.tab_bar(active=3)
+
+    def build_profile_screen(self, screen: ScreenBuilder) -> None:
+        screen.rect("avatar", (ARTBOARD_WIDTH - 96) // 2, 80, 96, 96, "primaryLight", BORDER_RADIUS["pill"])
+        screen.text("name", "Sam Baudon", SPACING["lg"], 192, 24, "textPrimary", "bold")
+        screen.text("role", "Resident · Brussels", SPACING["lg"], 226, 15, "textSecondary")
+        y = 226 + 20 + SPACING["xl"]
+        for key, title, subtitle in [("lifestyle", "Lifestyle", "Early bird · Non-smoker"),
+                                     ("preferences", "Preferences", "Budget €500-700 · Ixelles"),
+                                     ("verification", "Verification", "ID verified"),
+                                     ("settings", "Settings", None)]:
+            y = screen.card(key, y, 72, title, subtitle)
+        screen.tab_bar(active=4)
+
+    def build_screens(self) -> Dict[str, Dict]:
+        """Desired object graph of every screen, keyed by object id"""
+        desired: Dict[str, Dict] = {}
+        for name, x, y in SCREENS:
+            screen = ScreenBuilder(self, name, x, y)
+            builder = name.lower().replace(" ", "_").removesuffix("_screen")
+            getattr(self, f"build_{builder}_screen")(screen)
+            desired.update(screen.objects)
+        return desired
+
+    # ============================================
+    # CHANGE SET
+    # ============================================
+
+    def diff_objects(self, desired: Dict[str, Dict], existing: Dict[str, Dict],
+                     sent: Optional[Dict[str, Dict]] = None) -> List[Dict]:
+        """Penpot changes turning `existing` into `desired`
+
+        - add-obj for new ids (parents first, desired is in insertion order)
+        - mod-obj with only the attributes whose value changed: compared with
+          `sent` (the objects last sent, while the file is still at that revn)
+          when the object is in it, else with the server copy, attribute by
+          attribute as we set them (same_value ignores server normalization)
+        - del-obj for objects under a generated screen that are no longer
+          desired (only the topmost one of a removed subtree)
+        """
         changes = []
 
-        # Artboard
-        artboard = self.create_artboard("Welcome Screen", 0, 0)
-        changes.append(artboard)
+        for obj_id, obj in desired.items():
+            current = existing.get(obj_id)
+            if current is None:
+                changes.append({
+                    "type": "add-obj",
+                    "id": obj_id,
+                    "page-id": self.page_id,
+                    "parent-id": obj["parent-id"],
+                    "frame-id": obj["frame-id"],
+                    "obj": obj
+                })
+                continue
+            previous = sent.get(obj_id) if sent is not None else None
+            if previous is not None:
+                operations = [{"type": "set", "attr": attr, "val": value}
+                              for attr, value in obj.items() if previous.get(attr) != value]
+            else:
+                operations = [{"type": "set", "attr": attr, "val": value}
+                              for attr, value in obj.items() if not same_value(current.get(attr), value)]
+            if operations:
+                changes.append({
+                    "type": "mod-obj",
+                    "id": obj_id,
+                    "page-id": self.page_id,
+                    "operations": operations
+                })
+
+        managed_roots = {stable_id(name) for name, _, _ in SCREENS}
+
+        def is_managed(obj_id: str) -> bool:
+            seen = set()
+            while obj_id and obj_id != ROOT_FRAME_ID and obj_id not in seen:
+                if obj_id in managed_roots:
+                    return True
+                seen.add(obj_id)
+                obj_id = existing.get(obj_id, {}).get("parent-id")
+            return False
 
-        # TODO: Add glassmorphism sheet, buttons, etc.
-        # This is a simplified version - full implementation would be more complex
+        stale = {obj_id for obj_id in existing if obj_id not in desired and is_managed(obj_id)}
+        for obj_id in stale:
+            if existing[obj_id].get("parent-id") not in stale:
+                changes.append({
+                    "type": "del-obj",
+                    "id": obj_id,
+                    "page-id": self.page_id
+                })
 
         return changes
 
     def generate_all_screens(self) -> bool:
-        """Generate all screens"""
+        """Generate all screens, sending only the delta against the file"""
         print("🎨 Generating all screens...")
 
         if not self.file_id or not self.page_id:
             print("❌ No file/page ID")
             return False
 
-        all_changes = []
+        desired = self.build_screens()
+        changes = self.diff_objects(desired, self.existing_objects, self.sent_objects)
 
-        # Generate each screen
-        screens = [
-            ("Welcome Screen", 0, 0),
-            ("Login", 500, 0),
-            ("Resident Dashboard", 1000, 0),
-            ("Property List", 0, 1000),
-            ("Property Detail", 500, 1000),
-            ("Swipe Matching", 1000, 1000),
-            ("Chat", 0, 2000),
-            ("Profile", 500, 2000)
-        ]
+        counts = {kind: sum(1 for c in changes if c["type"] == kind)
+                  for kind in ("add-obj", "mod-obj", "del-obj")}
+        print(f"🧮 {len(desired)} objects desired → "
+              f"{counts['add-obj']} add, {counts['mod-obj']} modify, {counts['del-obj']} delete")
 
-        for name, x, y in screens:
-            artboard = self.create_artboard(name, x, y)
-            all_changes.append(artboard)
+        if not changes:
+            print("✅ File already up to date")
+            self.remember_sent(desired)
+            return True
 
-        # Update file with all changes
-        result = self.api.update_file(self.file_id, all_changes)
+        # Update file with the delta only
+        result = self.api.update_file(self.file_id, changes)
 
-        if result:
-            print(f"✅ Generated {len(screens)} screens")
+        if result is not None:
+            self.remember_sent(desired)
+            print(f"✅ Generated {len(SCREENS)} screens")
             return True
         else:
             print("❌ Failed to generate screens")
@@ -334,19 +1138,31 @@ class EasyCoDesignGenerator:
             return False
 
         print("\n✅ Design generation complete!")
-        print(f"🌐 View your project: {PENPOT_BASE_URL}/dashboard/project/{self.project_id}")
+        if isinstance(self.api, PenpotAPI):
+            print(f"🌐 View your project: {PENPOT_BASE_URL}/dashboard/project/{self.project_id}")
         return True
 
 
 def main():
     """Main entry point"""
+    # Offline mode: write a local bundle, no token or network needed
+    if len(sys.argv) > 2 and sys.argv[1] == "--offline":
+        backend = LocalPenpotBackend(sys.argv[2])
+        print(f"📦 Offline export to {sys.argv[2]}\n")
+        start = time.perf_counter()
+        success = EasyCoDesignGenerator(backend).run()
+        backend.close()
+        print(f"⏱️  {time.perf_counter() - start:.2f}s")
+        return 0 if success else 1
+
     # Get token from environment or argument
-    token = None
+    token = os.environ.get("PENPOT_TOKEN")
 
     if len(sys.argv) > 1:
         token = sys.argv[1]
-    else:
+    elif not token:
         print("Usage: python penpot_generator.py <PENPOT_TOKEN>")
+        print("       python penpot_generator.py --offline <bundle.penpot|bundle.json>")
         print("\nOr set PENPOT_TOKEN environment variable")
         return 1
 
@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Local Penpot RPC stub
+Serves, in memory, the /api/rpc/command endpoints penpot_generator.py uses
+
+Objects are kept by a LocalPenpotBackend in a temporary directory. Like the
+real server, update-file is rejected (409) unless it carries the file's
+current revn, it answers with the list of lagged changes, not the new revn,
+and get-file returns normalized shapes (float numbers, recomputed selrect,
+points and transform, fills with default keys). Failures can be injected per
+command to exercise the client retries.
+
+Usage:
+    python penpot_stub_server.py --port 8765
+    PENPOT_BASE_URL=http://127.0.0.1:8765 python penpot_generator.py stub-token
+    python penpot_stub_server.py --check     # retries, Retry-After, revn across batches
+"""
+
+import argparse
+import copy
+import json
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+from penpot_generator import EasyCoDesignGenerator, LocalPenpotBackend, PenpotAPI, dumps
+
+RPC_PREFIX = "/api/rpc/command/"
+
+IDENTITY_TRANSFORM = {"a": 1.0, "b": 0.0, "c": 0.0, "d": 1.0, "e": 0.0, "f": 0.0}
+
+
+def normalize_shape(obj: Dict) -> Dict:
+    """A shape as Penpot hands it back, not as it was sent"""
+    shape = {key: float(value) if type(value) is int else value for key, value in obj.items()}
+    if "width" in shape and "height" in shape:
+        x, y = shape.get("x", 0.0), shape.get("y", 0.0)
+        x2, y2 = x + shape["width"], y + shape["height"]
+        shape["selrect"] = {"x": x, "y": y, "width": shape["width"], "height": shape["height"],
+                            "x1": x, "y1": y, "x2": x2, "y2": y2}
+        shape["points"] = [{"x": x, "y": y}, {"x": x2, "y": y}, {"x": x2, "y": y2}, {"x": x, "y": y2}]
+        shape["transform"] = dict(IDENTITY_TRANSFORM)
+        shape["transform-inverse"] = dict(IDENTITY_TRANSFORM)
+    if "fills" in shape:
+        shape["fills"] = [{**fill, "fill-color-ref-id": None, "fill-color-ref-file": None}
+                          for fill in shape["fills"]]
+    return shape
+
+
+class PenpotStub(ThreadingHTTPServer):
+    """HTTP server holding the stub state (backend, request log, injected faults)"""
+
+    daemon_threads = True
+
+    def __init__(self, port: int = 0):
+        super().__init__(("127.0.0.1", port), StubHandler)
+        self.tmp = tempfile.TemporaryDirectory(prefix="penpot-stub-")
+        self.backend = LocalPenpotBackend(f"{self.tmp.name}/stub.json", batch_size=sys.maxsize)
+        self.lock = threading.Lock()
+        # (command, params, HTTP status) of every request, in arrival order
+        self.requests: List[Tuple[str, Dict, int]] = []
+        # command -> [(status, Retry-After header or None)] returned before serving it
+        self.faults: Dict[str, List[Tuple[int, Optional[str]]]] = {}
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def fail(self, command: str, status: int, retry_after: Optional[str] = None, times: int = 1) -> None:
+        self.faults.setdefault(command, []).extend([(status, retry_after)] * times)
+
+    def start(self) -> "PenpotStub":
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+        if self.backend.changes_log is not None:
+            self.backend.changes_log.close()
+        self.tmp.cleanup()
+
+    def dispatch(self, command: str, params: Dict) -> Tuple[int, Any]:
+        backend = self.backend
+        if command == "get-profile":
+            return 200, backend.get_profile()
+        if command == "get-projects":
+            return 200, backend.list_projects(params.get("team-id"))
+        if command == "create-project":
+            return 200, backend.create_project(params.get("team-id"), params["name"])
+        if command == "create-file":
+            return 200, backend.create_file(params["project-id"], params["name"])
+        if command == "get-project-files":
+            return 200, backend.list_files(params["project-id"])
+        if command == "get-file":
+            result = backend.get_file(params["id"])
+            if result is None:
+                return 404, {"type": "not-found"}
+            result = copy.deepcopy(result)
+            for page in result["data"]["pages-index"].values():
+                page["objects"] = {obj_id: normalize_shape(obj) for obj_id, obj in page["objects"].items()}
+            return 200, result
+        if command == "update-file":
+            meta = backend.files.get(params["id"])
+            if meta is None:
+                return 404, {"type": "not-found"}
+            if params.get("revn") != meta["revn"]:
+                return 409, {"type": "validation", "code": "revn-conflict",
+                             "hint": f"file is at revn {meta['revn']}, got {params.get('revn')}"}
+            backend.update_file(params["id"], params.get("changes", []))
+            return 200, []  # no lagged changes from other sessions
+        return 404, {"type": "not-found", "code": "unknown-command"}
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    server: PenpotStub
+
+    def do_POST(self):
+        command = self.path[len(RPC_PREFIX):] if self.path.startswith(RPC_PREFIX) else None
+        length = int(self.headers.get("Content-Length") or 0)
+        params = json.loads(self.rfile.read(length) or b"{}")
+
+        headers = {}
+        with self.server.lock:
+            faults = self.server.faults.get(command)
+            if not self.headers.get("Authorization", "").startswith("Token "):
+                status, body = 401, {"type": "authentication"}
+            elif faults:
+                status, retry_after = faults.pop(0)
+                body = {"type": "stub-fault"}
+                if retry_after is not None:
+                    headers["Retry-After"] = retry_after
+            elif command is None:
+                status, body = 404, {"type": "not-found"}
+            else:
+                status, body = self.server.dispatch(command, params)
+            self.server.requests.append((command, params, status))
+
+        payload = dumps(body)
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+# ============================================
+# SELF-CHECK
+# ============================================
+
+def run_check() -> int:
+    """Exercise PenpotAPI retries and revn batching against the stub"""
+    failures = []
+
+    def check(condition: bool, message: str) -> None:
+        print(f"{'✅' if condition else '❌'} {message}")
+        if not condition:
+            failures.append(message)
+
+    stub = PenpotStub().start()
+    try:
+        api = PenpotAPI("stub-token", base_url=stub.base_url, max_retries=2, batch_size=50)
+        team_id = api.get_profile()["default-team-id"]
+        project = api.create_project(team_id, "Stub project")
+        file_id = api.create_file(project["id"], "Stub file")["id"]
+        page_id = stub.backend.files[file_id]["pages"][0]["id"]
+
+        # 503 + Retry-After on the first batch, then 120 changes in 3 batches
+        stub.fail("update-file", 503, retry_after="0.3")
+        changes = [{"type": "add-obj", "id": f"obj-{i}", "page-id": page_id, "parent-id": None,
+                    "frame-id": None, "obj": {"id": f"obj-{i}", "type": "rect", "name": f"Rect {i}"}}
+                   for i in range(120)]
+        start = time.perf_counter()
+        result = api.update_file(file_id, changes)
+        elapsed = time.perf_counter() - start
+
+        updates = [(params["revn"], len(params["changes"]), status)
+                   for command, params, status in stub.requests if command == "update-file"]
+        check(result is not None, "update-file succeeded after a 503")
+        check(updates[0][2] == 503 and updates[1][:2] == updates[0][:2],
+              f"first batch retried with the same revn after 503 ({updates[:2]})")
+        check(elapsed >= 0.3, f"Retry-After honoured ({elapsed:.2f}s >= 0.3s)")
+        accepted = [(revn, size) for revn, size, status in updates if status == 200]
+        check(accepted == [(0, 50), (1, 50), (2, 20)], f"revn advanced across batches: {accepted}")
+        check(stub.backend.files[file_id]["revn"] == 3 and api.revisions[file_id]["revn"] == 3,
+              "client and server agree on revn 3")
+        check(not any(status == 409 for command, _, status in stub.requests), "no revn conflict")
+
+        # Retries exhausted: the call gives up instead of looping
+        stub.fail("get-profile", 503, retry_after="0", times=3)
+        check(api.get_profile() is None, "gives up after max_retries")
+        stub.faults.clear()
+
+        # Full generator run, then reruns against the normalized shapes that
+        # must find nothing to send: with the sent state, then without it
+        state_path = f"{stub.tmp.name}/sent_state.json"
+
+        def generate(state: Optional[str]) -> Tuple[bool, int]:
+            before = sum(1 for command, _, _ in stub.requests if command == "update-file")
+            ok = EasyCoDesignGenerator(PenpotAPI("stub-token", base_url=stub.base_url), state).run()
+            return ok, sum(1 for command, _, _ in stub.requests if command == "update-file") - before
+
+        check(generate(state_path)[0], "generator run against the stub")
+        check(generate(state_path) == (True, 0), "rerun with the sent state sent no update-file")
+        check(generate(None) == (True, 0), "rerun without sent state sent no update-file")
+    finally:
+        stub.stop()
+
+    print(f"\n{'❌ ' + str(len(failures)) + ' check(s) failed' if failures else '🎉 All stub checks passed'}")
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local Penpot RPC stub for penpot_generator.py")
+    parser.add_argument("--port", type=int, default=8765, help="port to listen on (default: %(default)s)")
+    parser.add_argument("--check", action="store_true", help="run the client checks against the stub and exit")
+    args = parser.parse_args()
+
+    if args.check:
+        return run_check()
+
+    stub = PenpotStub(args.port)
+    print(f"🧪 Penpot stub on {stub.base_url} (PENPOT_BASE_URL={stub.base_url})")
+    try:
+        stub.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,6 +11,7 @@ from pptx.dml.color import RGBColor
 from pptx.oxml.xmlchemy import OxmlElement
 from PIL import Image
 import qrcode
+import copy
 import io
 import os
 
@@ -43,145 +44,228 @@ WHITE = RGBColor(255, 255, 255)
 # Gradient signature colors
 GRADIENT_BRIDGE = RGBColor(200, 85, 112)  # #c85570
 
+# Cache des <a:gradFill> déjà générés, indexé par palette + angle
+_GRADIENT_FILL_CACHE = {}
+
+def build_gradient_fill(stops, angle):
+    """Construit (une seule fois par palette) un <a:gradFill> natif à N stops
+
+    stops: liste de (position 0.0-1.0, RGBColor), comme add_gradient_background
+    angle: même convention que fill.gradient_angle de python-pptx
+    """
+    key = (tuple((round(pos, 4), str(color)) for pos, color in stops), angle)
+    cached = _GRADIENT_FILL_CACHE.get(key)
+    if cached is None:
+        cached = OxmlElement('a:gradFill')
+        cached.set('rotWithShape', '1')
+        gs_lst = OxmlElement('a:gsLst')
+        for pos, color in stops:
+            gs = OxmlElement('a:gs')
+            gs.set('pos', str(int(round(pos * 100000))))
+            srgb = OxmlElement('a:srgbClr')
+            srgb.set('val', str(color))
+            gs.append(srgb)
+            gs_lst.append(gs)
+        cached.append(gs_lst)
+        # python-pptx stocke l'angle dans le sens horaire (ang = 360 - angle)
+        lin = OxmlElement('a:lin')
+        lin.set('ang', str(int(round(((360 - angle) % 360) * 60000))))
+        lin.set('scaled', '0')
+        cached.append(lin)
+        _GRADIENT_FILL_CACHE[key] = cached
+    return copy.deepcopy(cached)
+
+def set_gradient_fill(shape, stops, angle):
+    """Remplace le remplissage d'une shape par un gradient natif multi-stops"""
+    spPr = shape._element.spPr
+    # get_or_change_to_gradFill() place le nœud au bon endroit dans spPr
+    placeholder = spPr.get_or_change_to_gradFill()
+    spPr.replace(placeholder, build_gradient_fill(stops, angle))
+    return shape
+
 def add_gradient_background(slide, prs, colors):
-    """Add gradient background à une slide"""
+    """Add gradient background à une slide (tous les stops, une seule shape)"""
     shape = slide.shapes.add_shape(
         1,  # Rectangle
         0, 0,
         prs.slide_width, prs.slide_height
     )
 
-    fill = shape.fill
-    fill.gradient()
-    fill.gradient_angle = 135.0
-
-    # Python-pptx gradient API: use index-based access
-    gradient_stops = fill.gradient_stops
-
-    # Clear existing stops and set new ones
-    # First stop
-    gradient_stops[0].color.rgb = colors[0][1]
-    gradient_stops[0].position = colors[0][0]
-
-    # Last stop
-    gradient_stops[1].color.rgb = colors[-1][1]
-    gradient_stops[1].position = colors[-1][0]
+    set_gradient_fill(shape, colors, 135.0)
 
     shape.line.fill.background()
     return shape
 
-def add_card(slide, left, top, width, height, title, content, color_scheme='neutral', icon_text=''):
-    """Add une card colorée comme dans le HTML"""
-    # Card background
-    card = slide.shapes.add_shape(1, left, top, width, height)
-
-    # Apply color scheme
-    if color_scheme == 'success':
-        card.fill.solid()
-        card.fill.fore_color.rgb = SUCCESS_LIGHT
-        card.line.color.rgb = SUCCESS
-        border_color = SUCCESS
-    elif color_scheme == 'warning':
-        card.fill.solid()
-        card.fill.fore_color.rgb = WARNING_LIGHT
-        card.line.color.rgb = WARNING
-        border_color = WARNING
-    elif color_scheme == 'owner':
-        card.fill.solid()
-        card.fill.fore_color.rgb = OWNER_LIGHT
-        card.line.color.rgb = OWNER
-        border_color = OWNER
-    elif color_scheme == 'resident':
-        card.fill.solid()
-        card.fill.fore_color.rgb = RESIDENT_LIGHT
-        card.line.color.rgb = RESIDENT
-        border_color = RESIDENT
-    elif color_scheme == 'searcher':
-        card.fill.solid()
-        card.fill.fore_color.rgb = SEARCHER_LIGHT
-        card.line.color.rgb = SEARCHER
-        border_color = SEARCHER
-    else:
-        card.fill.solid()
-        card.fill.fore_color.rgb = WHITE
-        card.line.color.rgb = GRAY_200
-        border_color = GRAY_200
+# ============================================
+# TEMPLATES DE CHROME (construits une fois, clonés ensuite)
+# ============================================
 
-    card.line.width = Pt(3)
+# Couleurs (fond, bordure) de chaque color_scheme des cards
+CARD_SCHEMES = {
+    'success': (SUCCESS_LIGHT, SUCCESS),
+    'warning': (WARNING_LIGHT, WARNING),
+    'owner': (OWNER_LIGHT, OWNER),
+    'resident': (RESIDENT_LIGHT, RESIDENT),
+    'searcher': (SEARCHER_LIGHT, SEARCHER),
+    'neutral': (WHITE, GRAY_200),
+}
+
+# Éléments XML prébuilt, indexés par (type de chrome, variante)
+_CHROME_TEMPLATES = {}
+_SCRATCH = {}
+
+def _scratch_slide():
+    """Slide brouillon (hors deck) sur laquelle les templates sont construits"""
+    if 'slide' not in _SCRATCH:
+        scratch = Presentation()
+        _SCRATCH['slide'] = scratch.slides.add_slide(scratch.slide_layouts[6])
+    return _SCRATCH['slide']
+
+def _chrome_template(key, build):
+    """Retourne l'élément XML du chrome `key`, construit via python-pptx au premier appel"""
+    template = _CHROME_TEMPLATES.get(key)
+    if template is None:
+        template = build(_scratch_slide())._element
+        template.getparent().remove(template)
+        _CHROME_TEMPLATES[key] = template
+    return template
+
+def _clone_chrome(slide, template, left, top, width, height):
+    """Copie un template dans la slide avec un nouvel id et la géométrie demandée"""
+    shapes = slide.shapes
+    element = copy.deepcopy(template)
+    element.xpath('./*[1]/p:cNvPr')[0].set('id', str(shapes._next_shape_id))
+    element.x, element.y, element.cx, element.cy = left, top, width, height
+    shapes._spTree.insert_element_before(element, 'p:extLst')
+    return element
+
+def _set_paragraph_text(p, text):
+    """Patche le texte du premier run d'un paragraphe template"""
+    p.xpath('./a:r/a:t')[0].text = text
+    return p
+
+def _build_background(color):
+    def build(slide):
+        bg = slide.shapes.add_shape(1, 0, 0, Inches(10), Inches(5.625))
+        bg.fill.solid()
+        bg.fill.fore_color.rgb = color
+        bg.line.fill.background()
+        return bg
+    return build
 
-    # Add icon circle (simulated)
-    icon_size = Inches(0.5)
-    icon = slide.shapes.add_shape(
-        1,  # Rectangle/Circle
-        left + Inches(0.15), top + Inches(0.15),
-        icon_size, icon_size
-    )
-    icon.fill.solid()
-    icon.fill.fore_color.rgb = border_color
-    icon.line.fill.background()
+def _build_card_frame(color_scheme):
+    def build(slide):
+        fill_color, border_color = CARD_SCHEMES[color_scheme]
+        card = slide.shapes.add_shape(1, 0, 0, Inches(9), Inches(1.4))
+        card.fill.solid()
+        card.fill.fore_color.rgb = fill_color
+        card.line.color.rgb = border_color
+        card.line.width = Pt(3)
+        return card
+    return build
+
+def _build_card_icon(color_scheme):
+    def build(slide):
+        icon = slide.shapes.add_shape(1, 0, 0, Inches(0.5), Inches(0.5))
+        icon.fill.solid()
+        icon.fill.fore_color.rgb = CARD_SCHEMES[color_scheme][1]
+        icon.line.fill.background()
+        return icon
+    return build
 
-    # Add text
-    text_box = slide.shapes.add_textbox(
-        left + Inches(0.8), top + Inches(0.15),
-        width - Inches(0.95), height - Inches(0.3)
-    )
+def _build_card_text(slide):
+    """Textbox de card avec 3 paragraphes prototypes : titre, puce, texte simple"""
+    text_box = slide.shapes.add_textbox(0, 0, Inches(8), Inches(1))
     tf = text_box.text_frame
     tf.word_wrap = True
     tf.vertical_anchor = MSO_ANCHOR.TOP
 
-    # Title
     p = tf.paragraphs[0]
-    p.text = title
+    p.text = "title"
     p.font.size = Pt(20)
     p.font.bold = True
     p.font.color.rgb = GRAY_900
     p.space_after = Pt(8)
 
-    # Content
-    if isinstance(content, list):
-        for item in content:
-            p = tf.add_paragraph()
-            p.text = f"  • {item}"
-            p.font.size = Pt(13)
-            p.font.color.rgb = GRAY_700
-            p.level = 0
-    else:
-        p = tf.add_paragraph()
-        p.text = content
-        p.font.size = Pt(14)
-        p.font.color.rgb = GRAY_700
+    p = tf.add_paragraph()
+    p.text = "item"
+    p.font.size = Pt(13)
+    p.font.color.rgb = GRAY_700
+    p.level = 0
 
-def add_slide_header(slide, prs, text):
-    """Add header avec gradient border"""
-    # Header text
-    header = slide.shapes.add_textbox(
-        Inches(0.5), Inches(0.3),
-        Inches(9), Inches(0.7)
-    )
+    p = tf.add_paragraph()
+    p.text = "content"
+    p.font.size = Pt(14)
+    p.font.color.rgb = GRAY_700
+    return text_box
+
+def _build_header_text(slide):
+    header = slide.shapes.add_textbox(0, 0, Inches(9), Inches(0.7))
     tf = header.text_frame
-    tf.text = text
+    tf.text = "header"
     p = tf.paragraphs[0]
     p.font.size = Pt(36)
     p.font.bold = True
     p.font.color.rgb = GRAY_900
+    return header
+
+def _build_header_rule(slide):
+    line = slide.shapes.add_shape(1, 0, 0, Inches(9), Inches(0.05))
+    set_gradient_fill(line, [(0.0, OWNER), (0.5, RESIDENT), (1.0, SEARCHER)], 90.0)
+    line.line.fill.background()
+    return line
+
+def add_solid_background(slide, prs, color):
+    """Add fond uni plein écran (cloné depuis le template de la couleur)"""
+    template = _chrome_template(('background', str(color)), _build_background(color))
+    return _clone_chrome(slide, template, 0, 0, prs.slide_width, prs.slide_height)
+
+def add_card(slide, left, top, width, height, title, content, color_scheme='neutral', icon_text=''):
+    """Add une card colorée comme dans le HTML"""
+    if color_scheme not in CARD_SCHEMES:
+        color_scheme = 'neutral'
+
+    # Card background + icon circle (simulated)
+    frame = _chrome_template(('card_frame', color_scheme), _build_card_frame(color_scheme))
+    _clone_chrome(slide, frame, left, top, width, height)
+
+    icon_size = Inches(0.5)
+    icon = _chrome_template(('card_icon', color_scheme), _build_card_icon(color_scheme))
+    _clone_chrome(slide, icon, left + Inches(0.15), top + Inches(0.15), icon_size, icon_size)
 
-    # Gradient line below (simulated with colored rectangle)
-    line = slide.shapes.add_shape(
-        1,
-        Inches(0.5), Inches(1.05),
-        Inches(9), Inches(0.05)
+    # Add text : seuls les runs sont patchés, les styles viennent du template
+    text = _chrome_template(('card_text', None), _build_card_text)
+    text_box = _clone_chrome(
+        slide, text,
+        left + Inches(0.8), top + Inches(0.15),
+        width - Inches(0.95), height - Inches(0.3)
     )
-    # Gradient fill (simplified to 2 colors)
-    fill = line.fill
-    fill.gradient()
-    fill.gradient_angle = 90.0
+    txBody = text_box.txBody
+    title_p, item_p, content_p = txBody.p_lst
 
-    fill.gradient_stops[0].color.rgb = OWNER
-    fill.gradient_stops[0].position = 0.0
-    fill.gradient_stops[1].color.rgb = SEARCHER
-    fill.gradient_stops[1].position = 1.0
+    # Title
+    _set_paragraph_text(title_p, title)
 
-    line.line.fill.background()
+    # Content
+    if isinstance(content, list):
+        for item in content:
+            txBody.append(_set_paragraph_text(copy.deepcopy(item_p), f"  • {item}"))
+    else:
+        txBody.append(_set_paragraph_text(copy.deepcopy(content_p), content))
+
+    txBody.remove(item_p)
+    txBody.remove(content_p)
+
+def add_slide_header(slide, prs, text):
+    """Add header avec gradient border"""
+    # Header text
+    header = _chrome_template(('header_text', None), _build_header_text)
+    element = _clone_chrome(slide, header, Inches(0.5), Inches(0.3), Inches(9), Inches(0.7))
+    _set_paragraph_text(element.txBody.p_lst[0], text)
+
+    # Gradient line below (gradient signature natif, 3 stops)
+    rule = _chrome_template(('header_rule', None), _build_header_rule)
+    _clone_chrome(slide, rule, Inches(0.5), Inches(1.05), Inches(9), Inches(0.05))
 
 def generate_qr_code(data, size=300):
     """Generate QR code as PIL Image"""
@@ -265,10 +349,7 @@ def slide_2_problem(prs):
     slide = prs.slides.add_slide(prs.slide_layouts[6])
 
     # Background
-    bg = slide.shapes.add_shape(1, 0, 0, prs.slide_width, prs.slide_height)
-    bg.fill.solid()
-    bg.fill.fore_color.rgb = RESIDENT_LIGHT
-    bg.line.fill.background()
+    add_solid_background(slide, prs, RESIDENT_LIGHT)
 
     add_slide_header(slide, prs, "Le Problème : Un Marché en Explosion... Mais Non Structuré")
 
@@ -299,10 +380,7 @@ def slide_3_personas(prs):
     slide = prs.slides.add_slide(prs.slide_layouts[6])
 
     # Background
-    bg = slide.shapes.add_shape(1, 0, 0, prs.slide_width, prs.slide_height)
-    bg.fill.solid()
-    bg.fill.fore_color.rgb = SEARCHER_LIGHT
-    bg.line.fill.background()
+    add_solid_background(slide, prs, SEARCHER_LIGHT)
 
     add_slide_header(slide, prs, "3 Personas, 1 Besoin Commun : La Compatibilité")
 
@@ -392,10 +470,7 @@ def slide_4_solution(prs):
     slide = prs.slides.add_slide(prs.slide_layouts[6])
 
     # Background
-    bg = slide.shapes.add_shape(1, 0, 0, prs.slide_width, prs.slide_height)
-    bg.fill.solid()
-    bg.fill.fore_color.rgb = OWNER_LIGHT
-    bg.line.fill.background()
+    add_solid_background(slide, prs, OWNER_LIGHT)
 
     add_slide_header(slide, prs, "Izzico = Tinder meets Airbnb pour le co-living")
 
@@ -439,10 +514,7 @@ def slide_5_market(prs):
     slide = prs.slides.add_slide(prs.slide_layouts[6])
 
     # Background
-    bg = slide.shapes.add_shape(1, 0, 0, prs.slide_width, prs.slide_height)
-    bg.fill.solid()
-    bg.fill.fore_color.rgb = RESIDENT_LIGHT
-    bg.line.fill.background()
+    add_solid_background(slide, prs, RESIDENT_LIGHT)
 
     add_slide_header(slide, prs, "Un Marché de €3.1 Milliards en Belgique")
 
@@ -507,10 +579,7 @@ def slide_13_screenshot_qr(prs):
     slide = prs.slides.add_slide(prs.slide_layouts[6])
 
     # Background gris
-    bg = slide.shapes.add_shape(1, 0, 0, prs.slide_width, prs.slide_height)
-    bg.fill.solid()
-    bg.fill.fore_color.rgb = GRAY_100
-    bg.line.fill.background()
+    add_solid_background(slide, prs, GRAY_100)
 
     # Try to add screenshot if exists
     screenshot_path = os.path.join(os.path.dirname(__file__), '..', 'izzico-homepage-screenshot.png')
@@ -656,10 +725,7 @@ def create_full_deck():
     for i in range(6, 13):
         print(f"  📄 Slide {i}: Placeholder...")
         slide = prs.slides.add_slide(prs.slide_layouts[6])
-        bg = slide.shapes.add_shape(1, 0, 0, prs.slide_width, prs.slide_height)
-        bg.fill.solid()
-        bg.fill.fore_color.rgb = GRAY_50
-        bg.line.fill.background()
+        add_solid_background(slide, prs, GRAY_50)
 
         text = slide.shapes.add_textbox(Inches(2), Inches(2.5), Inches(6), Inches(1))
         tf = text.text_frame
@@ -13,6 +13,7 @@ from pptx.enum.text import PP_ALIGN, MSO_ANCHOR
 from pptx.dml.color import RGBColor
 from pptx.enum.shapes import MSO_SHAPE
 from pptx.oxml.xmlchemy import OxmlElement
+import copy
 
 # ============================================
 # IZZICO BRAND COLORS (Source: globals.css)
@@ -53,21 +54,58 @@ COLORS = {
 # HELPER FUNCTIONS
 # ============================================
 
+# Cache des <a:gradFill> déjà générés, indexé par palette + angle
+_GRADIENT_FILL_CACHE = {}
+
+def build_gradient_fill(stops, angle=135):
+    """Construit (une seule fois par palette) un <a:gradFill> natif à N stops
+
+    stops: liste de (position 0.0-1.0, RGBColor)
+    angle: même convention que fill.gradient_angle de python-pptx
+    """
+    key = (tuple((round(pos, 4), str(color)) for pos, color in stops), angle)
+    cached = _GRADIENT_FILL_CACHE.get(key)
+    if cached is None:
+        cached = OxmlElement('a:gradFill')
+        cached.set('rotWithShape', '1')
+        gs_lst = OxmlElement('a:gsLst')
+        for pos, color in stops:
+            gs = OxmlElement('a:gs')
+            gs.set('pos', str(int(round(pos * 100000))))
+            srgb = OxmlElement('a:srgbClr')
+            srgb.set('val', str(color))
+            gs.append(srgb)
+            gs_lst.append(gs)
+        cached.append(gs_lst)
+        # python-pptx stocke l'angle dans le sens horaire (ang = 360 - angle)
+        lin = OxmlElement('a:lin')
+        lin.set('ang', str(int(round(((360 - angle) % 360) * 60000))))
+        lin.set('scaled', '0')
+        cached.append(lin)
+        _GRADIENT_FILL_CACHE[key] = cached
+    return copy.deepcopy(cached)
+
+def set_gradient_fill(shape, stops, angle=135):
+    """Remplace le remplissage d'une shape par un gradient natif multi-stops"""
+    spPr = shape._element.spPr
+    # get_or_change_to_gradFill() place le nœud au bon endroit dans spPr
+    placeholder = spPr.get_or_change_to_gradFill()
+    spPr.replace(placeholder, build_gradient_fill(stops, angle))
+    return shape
+
 def apply_gradient_background(slide, colors_list):
-    """Applique un gradient background à une slide (simulé via shapes overlappées)"""
-    # PowerPoint ne supporte pas les gradients CSS natifs, on simule avec des rectangles
+    """Applique un gradient background à une slide (une seule shape, N stops natifs)"""
     background = slide.shapes.add_shape(
         MSO_SHAPE.RECTANGLE,
         Inches(0), Inches(0),
         Inches(10), Inches(7.5)
     )
-    fill = background.fill
-    fill.gradient()
-    fill.gradient_angle = 135
 
-    # Gradient stops (PowerPoint limite à 2 couleurs pour gradient simple)
-    fill.gradient_stops[0].color.rgb = colors_list[0]
-    fill.gradient_stops[1].color.rgb = colors_list[-1]
+    # Stops répartis uniformément : le gradient signature complet est rendu
+    # par PowerPoint via <a:gsLst>, sans shapes supplémentaires
+    last = max(len(colors_list) - 1, 1)
+    stops = [(i / last, color) for i, color in enumerate(colors_list)]
+    set_gradient_fill(background, stops, angle=135)
 
     # Move to back
     slide.shapes._spTree.remove(background._element)
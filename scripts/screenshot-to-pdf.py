@@ -2,30 +2,251 @@
 """
 Prend des screenshots de chaque slide du HTML scrollable
 et les assemble en PDF paysage
+
+Usage:
+    python3 screenshot-to-pdf.py                      # capture parallèle (4 pages)
+    python3 screenshot-to-pdf.py --workers 8
+    python3 screenshot-to-pdf.py --mode serial        # ancien mode scroll + sleep
+    python3 screenshot-to-pdf.py --mode vector        # PDF vectoriel Chromium (page.pdf)
+    python3 screenshot-to-pdf.py --mode compare       # vector vs raster : taille + temps
 """
 
+from playwright.async_api import async_playwright
 from playwright.sync_api import sync_playwright
 from PIL import Image
+import argparse
+import asyncio
+import io
 import os
+import struct
+import time
 
-def capture_slides_to_pdf():
-    """Capture chaque slide individuellement et assemble en PDF"""
-    print("🚀 Capture des slides en screenshots...\n")
+VIEWPORT = {'width': 1920, 'height': 1080}
 
-    html_path = os.path.join(os.path.dirname(__file__), '..', 'izzico-pitch-deck-scrollable.html')
-    output_pdf = os.path.join(os.path.dirname(__file__), '..', 'izzico-pitch-deck-screenshots.pdf')
+# Une seule promesse côté document : fonts, icônes lucide et QR code prêts.
+# Le polling se fait sur requestAnimationFrame (aucun sleep fixe), puis on
+# attend deux frames pour que le dernier layout soit peint.
+# Icônes prêtes = lucide chargé et createIcons() passé : plus aucun <i>, ou
+# des <svg> déjà générés et un nombre de <i> stable sur STABLE_FRAMES frames.
+# Lucide laisse en place le <i> d'un nom qu'il ne connaît pas (lucide@latest
+# a renommé alert-triangle, code-2...) : on ne peut pas exiger qu'il n'en
+# reste aucun.
+READY_JS = """() => Promise.all([
+    document.fonts.ready,
+    new Promise(resolve => {
+        const STABLE_FRAMES = 3;
+        let lastPending = -1;
+        let stable = 0;
+        const check = () => {
+            const qr = document.getElementById('qrcode');
+            const pending = document.querySelectorAll('i[data-lucide]').length;
+            const drawn = document.querySelectorAll('svg[data-lucide], svg.lucide').length;
+            stable = pending === lastPending ? stable + 1 : 0;
+            lastPending = pending;
+            const iconsReady = typeof lucide !== 'undefined'
+                && (pending === 0 || (drawn > 0 && stable >= STABLE_FRAMES));
+            if (iconsReady && qr && qr.querySelector('canvas')) {
+                resolve();
+            } else {
+                requestAnimationFrame(check);
+            }
+        };
+        check();
+    }),
+]).then(() => new Promise(resolve =>
+    requestAnimationFrame(() => requestAnimationFrame(resolve))
+))"""
 
-    if not os.path.exists(html_path):
-        print(f"❌ Fichier HTML introuvable : {html_path}")
-        return
+# Ce qui manque encore quand READY_JS n'a pas abouti à temps
+UNREADY_JS = """() => ({
+    lucide: typeof lucide !== 'undefined',
+    icons: Array.from(new Set(Array.from(document.querySelectorAll('i[data-lucide]'),
+                                         i => i.dataset.lucide))),
+    qrcode: !!document.querySelector('#qrcode canvas'),
+})"""
+
+# Rectangles des slides en coordonnées page (indépendantes du scroll)
+SLIDE_RECTS_JS = """() => Array.from(document.querySelectorAll('.slide')).map(slide => {
+    const r = slide.getBoundingClientRect();
+    return {
+        x: r.left + window.scrollX,
+        y: r.top + window.scrollY,
+        width: r.width,
+        height: r.height,
+    };
+})"""
+
+READY_TIMEOUT_S = 10
+
+# CSS d'impression injecté en mode vector : une slide = une page 1920×1080.
+# Complète le @media print du HTML (qui garde max-width/marges à l'écran).
+PRINT_PAGE_CSS = """
+@page { size: 1920px 1080px; margin: 0; }
+html, body { margin: 0 !important; padding: 0 !important; background: white !important; }
+.slide {
+    width: 1920px !important;
+    max-width: none !important;
+    height: 1080px !important;
+    margin: 0 !important;
+    box-shadow: none !important;
+    break-after: page;
+    break-inside: avoid;
+}
+.slide:last-of-type { break-after: auto; }
+"""
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+# Couleurs par color type PNG embarquable tel quel (gris, RGB ; 8 bits)
+PNG_PASSTHROUGH_COLORS = {0: 1, 2: 3}
+JPEG_SOF_MARKERS = {0xC0, 0xC1, 0xC2}
+JPEG_COLORSPACES = {1: '/DeviceGray', 3: '/DeviceRGB', 4: '/DeviceCMYK'}
+
+
+def _png_idat_stream(data):
+    """Extrait (width, height, colors, idat) d'un PNG embarquable sans décodage
+
+    Les données IDAT d'un PNG sont déjà un flux zlib avec prédicteurs PNG,
+    que PDF lit nativement (FlateDecode + Predictor 15). Retourne None si le
+    PNG nécessite un décodage (alpha, palette, entrelacement, 16 bits).
+    """
+    if not data.startswith(PNG_SIGNATURE):
+        return None
+
+    pos = len(PNG_SIGNATURE)
+    header = None
+    idat = []
+    while pos < len(data):
+        length, chunk_type = struct.unpack('>I4s', data[pos:pos + 8])
+        chunk = data[pos + 8:pos + 8 + length]
+        pos += 12 + length
+        if chunk_type == b'IHDR':
+            header = struct.unpack('>IIBBBBB', chunk)
+        elif chunk_type == b'IDAT':
+            idat.append(chunk)
+        elif chunk_type == b'IEND':
+            break
+
+    width, height, bit_depth, color_type, _, _, interlace = header
+    if bit_depth != 8 or interlace or color_type not in PNG_PASSTHROUGH_COLORS:
+        return None
+    return width, height, PNG_PASSTHROUGH_COLORS[color_type], b''.join(idat)
+
+
+def _jpeg_size(data):
+    """Lit (width, height, components) dans le marqueur SOF d'un JPEG"""
+    pos = 2
+    while pos < len(data):
+        marker, length = struct.unpack('>xBH', data[pos:pos + 4])
+        if marker in JPEG_SOF_MARKERS:
+            height, width, components = struct.unpack('>HHB', data[pos + 5:pos + 10])
+            return width, height, components
+        pos += 2 + length
+    raise ValueError("JPEG sans marqueur SOF")
 
-    print(f"📄 HTML : {html_path}")
-    print(f"📦 Output : {output_pdf}\n")
 
+class StreamingPdfWriter:
+    """Écrit un PDF image par image, sans garder les pages précédentes en mémoire
+
+    Chaque screenshot est embarqué dès qu'il arrive (dans n'importe quel ordre) :
+    PNG RGB/gris en FlateDecode direct, JPEG en DCTDecode direct, et sinon un
+    unique décodage PIL vers RGB ré-encodé en JPEG. Seul l'arbre /Pages et la
+    table xref sont écrits à la fermeture.
+    """
+
+    CATALOG_ID = 1
+    PAGES_ID = 2
+
+    def __init__(self, path, resolution=100.0, quality=95):
+        self.file = open(path, 'wb')
+        self.scale = 72.0 / resolution
+        self.quality = quality
+        self.offsets = {}
+        self.page_ids = {}
+        self.next_id = self.PAGES_ID + 1
+        self.file.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+
+    def _reserve_id(self):
+        obj_id = self.next_id
+        self.next_id += 1
+        return obj_id
+
+    def _write_object(self, obj_id, body, stream=None):
+        self.offsets[obj_id] = self.file.tell()
+        self.file.write(f'{obj_id} 0 obj\n'.encode())
+        self.file.write(body.encode())
+        if stream is not None:
+            self.file.write(b'\nstream\n')
+            self.file.write(stream)
+            self.file.write(b'\nendstream')
+        self.file.write(b'\nendobj\n')
+
+    def _image_object(self, data):
+        """Retourne (width, height, colorspace, filtre, flux) pour un screenshot"""
+        png = _png_idat_stream(data)
+        if png is not None:
+            width, height, colors, idat = png
+            colorspace = '/DeviceRGB' if colors == 3 else '/DeviceGray'
+            params = (f'/Filter /FlateDecode /DecodeParms << /Predictor 15 /Colors {colors} '
+                      f'/BitsPerComponent 8 /Columns {width} >>')
+            return width, height, colorspace, params, idat
+
+        if not data.startswith(b'\xff\xd8'):
+            # PNG avec alpha/palette : un seul décodage, ré-encodé en JPEG
+            buffer = io.BytesIO()
+            with Image.open(io.BytesIO(data)) as img:
+                img.convert('RGB').save(buffer, 'JPEG', quality=self.quality)
+            data = buffer.getvalue()
+
+        width, height, components = _jpeg_size(data)
+        return width, height, JPEG_COLORSPACES[components], '/Filter /DCTDecode', data
+
+    def add_page(self, index, data):
+        """Embarque le screenshot `data` (PNG ou JPEG) comme page numéro `index`"""
+        width, height, colorspace, params, stream = self._image_object(data)
+        page_w, page_h = width * self.scale, height * self.scale
+
+        image_id, content_id, page_id = (self._reserve_id() for _ in range(3))
+        self._write_object(image_id, (
+            f'<< /Type /XObject /Subtype /Image /Width {width} /Height {height} '
+            f'/ColorSpace {colorspace} /BitsPerComponent 8 {params} /Length {len(stream)} >>'
+        ), stream)
+
+        content = f'q {page_w:.2f} 0 0 {page_h:.2f} 0 0 cm /Im0 Do Q'.encode()
+        self._write_object(content_id, f'<< /Length {len(content)} >>', content)
+
+        self._write_object(page_id, (
+            f'<< /Type /Page /Parent {self.PAGES_ID} 0 R /MediaBox [0 0 {page_w:.2f} {page_h:.2f}] '
+            f'/Resources << /XObject << /Im0 {image_id} 0 R >> >> /Contents {content_id} 0 R >>'
+        ))
+        self.page_ids[index] = page_id
+
+    def close(self):
+        """Écrit l'arbre des pages (dans l'ordre des index), la xref et le trailer"""
+        kids = ' '.join(f'{self.page_ids[i]} 0 R' for i in sorted(self.page_ids))
+        self._write_object(self.PAGES_ID, f'<< /Type /Pages /Kids [{kids}] /Count {len(self.page_ids)} >>')
+        self._write_object(self.CATALOG_ID, f'<< /Type /Catalog /Pages {self.PAGES_ID} 0 R >>')
+
+        xref_offset = self.file.tell()
+        self.file.write(f'xref\n0 {self.next_id}\n'.encode())
+        self.file.write(b'0000000000 65535 f \n')
+        for obj_id in range(1, self.next_id):
+            self.file.write(f'{self.offsets[obj_id]:010d} 00000 n \n'.encode())
+        self.file.write((
+            f'trailer\n<< /Size {self.next_id} /Root {self.CATALOG_ID} 0 R >>\n'
+            f'startxref\n{xref_offset}\n%%EOF\n'
+        ).encode())
+        self.file.close()
+
+
+def capture_slides_serial(html_path, on_slide):
+    """Capture chaque slide en scrollant (mode historique, avec sleeps fixes)
+
+    Chaque PNG est transmis à on_slide(index, png) dès sa capture.
+    """
     with sync_playwright() as p:
         # Launch browser
         browser = p.chromium.launch()
-        page = browser.new_page(viewport={'width': 1920, 'height': 1080})
+        page = browser.new_page(viewport=VIEWPORT)
 
         # Load HTML
         page.goto(f'file://{html_path}', wait_until='networkidle')
@@ -51,8 +272,6 @@ def capture_slides_to_pdf():
         num_slides = page.evaluate("() => document.querySelectorAll('.slide').length")
         print(f"📊 Total slides détectées : {num_slides}\n")
 
-        screenshots = []
-
         # Capture each slide
         for i in range(num_slides):
             print(f"  📸 Capture slide {i + 1}/{num_slides}...")
@@ -67,38 +286,173 @@ def capture_slides_to_pdf():
             page.wait_for_timeout(500)
 
             # Take screenshot
-            screenshot_path = f'/tmp/izzico_slide_{i + 1}.png'
-            page.screenshot(path=screenshot_path, full_page=False)
-            screenshots.append(screenshot_path)
+            on_slide(i, page.screenshot(full_page=False))
 
         browser.close()
 
-        print(f"\n✅ {num_slides} screenshots capturés\n")
-        print("📦 Assemblage en PDF...")
+    return num_slides
+
 
-        # Convert screenshots to PDF
-        images = [Image.open(path) for path in screenshots]
+async def _wait_ready(page):
+    """Attend READY_JS, puis signale ce qui manque (sans bloquer la capture)"""
+    try:
+        await asyncio.wait_for(page.evaluate(READY_JS), READY_TIMEOUT_S)
+    except asyncio.TimeoutError:
+        print(f"⚠️  Page pas prête après {READY_TIMEOUT_S}s, capture quand même")
+    missing = await page.evaluate(UNREADY_JS)
+    if not missing['lucide']:
+        print("⚠️  lucide non chargé")
+    if missing['icons']:
+        print(f"⚠️  Icônes lucide non résolues : {', '.join(missing['icons'])}")
+    if not missing['qrcode']:
+        print("⚠️  QR code absent")
 
-        # Save as PDF (landscape A4)
-        images[0].save(
-            output_pdf,
-            save_all=True,
-            append_images=images[1:],
-            resolution=100.0,
-            quality=95
-        )
 
-        # Cleanup temp files
-        for path in screenshots:
-            os.remove(path)
+async def _open_ready_page(context, url):
+    """Ouvre une page et attend la promesse de readiness du document"""
+    page = await context.new_page()
+    await page.goto(url, wait_until='load')
+    await _wait_ready(page)
+    return page
 
-        file_size = os.path.getsize(output_pdf) / (1024 * 1024)
 
-        print(f"\n✅ PDF généré avec succès !")
-        print(f"   📦 Fichier : {output_pdf}")
-        print(f"   📊 Taille : {file_size:.2f} MB")
-        print(f"   📄 Slides : {num_slides}")
-        print(f"\n🎯 Le PDF est EXACTEMENT identique à ce que tu vois dans le navigateur !")
+async def _capture_worker(context, url, rects, indices, on_slide):
+    """Capture les slides `indices` par rectangle de clip, sans scroll"""
+    page = await _open_ready_page(context, url)
+    for i in indices:
+        on_slide(i, await page.screenshot(clip=rects[i], full_page=True))
+        print(f"  📸 Slide {i + 1}/{len(rects)} capturée")
+    await page.close()
+
+
+async def capture_slides_parallel(html_path, on_slide, workers=4):
+    """Capture toutes les slides dans N pages parallèles d'un même contexte
+
+    Chaque PNG est transmis à on_slide(index, png) dès sa capture, dans
+    l'ordre d'arrivée (pas forcément l'ordre des slides).
+    """
+    url = f'file://{html_path}'
+
+    async with async_playwright() as p:
+        browser = await p.chromium.launch()
+        context = await browser.new_context(viewport=VIEWPORT)
+
+        # Première page : lit la géométrie des slides une seule fois
+        first = await _open_ready_page(context, url)
+        rects = await first.evaluate(SLIDE_RECTS_JS)
+        await first.close()
+
+        print("✅ Page chargée (fonts, icons, QR)\n")
+        print(f"📊 Total slides détectées : {len(rects)}\n")
+
+        # Répartition round-robin des slides entre les pages
+        workers = max(1, min(workers, len(rects)))
+        await asyncio.gather(*(
+            _capture_worker(context, url, rects, range(k, len(rects), workers), on_slide)
+            for k in range(workers)
+        ))
+
+        await context.close()
+        await browser.close()
+
+    return len(rects)
+
+
+async def capture_slides_vector(html_path, output_pdf):
+    """Imprime tout le deck en un seul appel page.pdf() (texte sélectionnable)"""
+    async with async_playwright() as p:
+        browser = await p.chromium.launch()
+        page = await browser.new_page(viewport=VIEWPORT)
+        await page.goto(f'file://{html_path}', wait_until='load')
+        await _wait_ready(page)
+
+        print("✅ Page chargée (fonts, icons, QR)\n")
+
+        await page.add_style_tag(content=PRINT_PAGE_CSS)
+        num_slides = await page.evaluate("() => document.querySelectorAll('.slide').length")
+        await page.pdf(path=output_pdf, print_background=True, prefer_css_page_size=True)
+        await browser.close()
+
+    return num_slides
+
+
+def export_raster_pdf(html_path, output_pdf, mode='parallel', workers=4):
+    """Screenshots (parallel ou serial) assemblés en PDF ; retourne (slides, secondes)"""
+    # Chaque screenshot est écrit dans le PDF dès sa capture : un seul
+    # slide en mémoire par page Chromium, aucun fichier temporaire
+    writer = StreamingPdfWriter(output_pdf, resolution=100.0, quality=95)
+
+    start = time.perf_counter()
+    try:
+        if mode == 'serial':
+            num_slides = capture_slides_serial(html_path, writer.add_page)
+        else:
+            num_slides = asyncio.run(capture_slides_parallel(html_path, writer.add_page, workers))
+    finally:
+        writer.close()
+    return num_slides, time.perf_counter() - start
+
+
+def export_vector_pdf(html_path, output_pdf):
+    """PDF vectoriel natif Chromium ; retourne (slides, secondes)"""
+    start = time.perf_counter()
+    num_slides = asyncio.run(capture_slides_vector(html_path, output_pdf))
+    return num_slides, time.perf_counter() - start
+
+
+def print_comparison(results):
+    """Affiche taille et temps de chaque export, relativement au raster"""
+    raster_size, raster_time = results['raster'][1], results['raster'][2]
+
+    print("\n📊 Comparaison vector vs raster :")
+    print(f"   {'Mode':<8} {'Taille':>10} {'Temps':>9} {'Taille/raster':>14} {'Temps/raster':>13}")
+    for name, (_, size, elapsed) in results.items():
+        print(f"   {name:<8} {size / (1024 * 1024):>8.2f}MB {elapsed:>8.2f}s "
+              f"{size / raster_size:>13.1%} {elapsed / raster_time:>12.1%}")
+
+
+def capture_slides_to_pdf(mode='parallel', workers=4):
+    """Capture chaque slide individuellement et assemble en PDF"""
+    print("🚀 Export du pitch deck en PDF...\n")
+
+    root = os.path.join(os.path.dirname(__file__), '..')
+    html_path = os.path.abspath(os.path.join(root, 'izzico-pitch-deck-scrollable.html'))
+    raster_pdf = os.path.join(root, 'izzico-pitch-deck-screenshots.pdf')
+    vector_pdf = os.path.join(root, 'izzico-pitch-deck-vector.pdf')
+
+    if not os.path.exists(html_path):
+        print(f"❌ Fichier HTML introuvable : {html_path}")
+        return
+
+    print(f"📄 HTML : {html_path}")
+    print(f"⚙️  Mode : {mode}" + (f" ({workers} pages)" if mode in ('parallel', 'compare') else "") + "\n")
+
+    results = {}
+    if mode in ('vector', 'compare'):
+        num_slides, elapsed = export_vector_pdf(html_path, vector_pdf)
+        results['vector'] = (vector_pdf, os.path.getsize(vector_pdf), elapsed)
+    if mode != 'vector':
+        # Le raster reste la référence de fidélité (rendu écran pixel-perfect)
+        raster_mode = 'serial' if mode == 'serial' else 'parallel'
+        num_slides, elapsed = export_raster_pdf(html_path, raster_pdf, raster_mode, workers)
+        results['raster'] = (raster_pdf, os.path.getsize(raster_pdf), elapsed)
+
+    print(f"\n✅ PDF généré avec succès !")
+    for name, (path, size, elapsed) in results.items():
+        print(f"   📦 {name} : {path}")
+        print(f"      📊 Taille : {size / (1024 * 1024):.2f} MB | ⏱️  {elapsed:.2f}s")
+    print(f"   📄 Slides : {num_slides}")
+
+    if mode == 'compare':
+        print_comparison(results)
 
 if __name__ == '__main__':
-    capture_slides_to_pdf()
+    parser = argparse.ArgumentParser(description="Export du pitch deck HTML en PDF")
+    parser.add_argument('--mode', choices=['parallel', 'serial', 'vector', 'compare'], default='parallel',
+                        help="parallel : clip par slide dans N pages ; serial : scroll + sleeps ; "
+                             "vector : page.pdf() natif ; compare : vector + parallel avec comparaison")
+    parser.add_argument('--workers', type=int, default=4,
+                        help="Nombre de pages Chromium en parallèle (modes parallel/compare)")
+    args = parser.parse_args()
+
+    capture_slides_to_pdf(mode=args.mode, workers=args.workers)
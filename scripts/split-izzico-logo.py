@@ -4,46 +4,285 @@ Script pour découper le logo IzzIco en lettres individuelles
 Permet d'animer chaque lettre séparément
 """
 
+from concurrent.futures import ThreadPoolExecutor
 from PIL import Image
+import hashlib
+import io
+import json
+import math
 import numpy as np
 import os
 
-def find_letter_bounds(img_array, threshold=250):
+try:
+    from scipy import ndimage
+except ImportError:  # scipy optionnel : repli sur l'étiquetage par runs ci-dessous
+    ndimage = None
+
+# Noms uniques (les deux z et les deux I ne s'écrasent pas)
+LETTER_NAMES = ['I', 'z1', 'z2', 'I2', 'c', 'o']
+
+# Réglages encodeurs : PNG optimisé, WebP/AVIF compressés avec alpha intact
+ENCODER_OPTIONS = {
+    'png': {'format': 'PNG', 'optimize': True},
+    'webp': {'format': 'WEBP', 'quality': 90, 'alpha_quality': 100, 'method': 4},
+    'avif': {'format': 'AVIF', 'quality': 80, 'speed': 6},
+}
+
+# Au-delà de ce budget (octets décodés), le master est mappé en mémoire
+MEMORY_BUDGET = 512 * 1024 * 1024
+# Hauteur des bandes pour les calculs d'occupation (mémoire bornée)
+STRIP_ROWS = 512
+
+# Modes que Pillow sait décoder directement dans un buffer externe
+# (RGB est stocké en RGBX par Pillow : 4 octets/pixel, canal X ignoré)
+MAPPED_MODES = {'L': 'L', 'RGB': 'RGBX', 'RGBA': 'RGBA'}
+MODE_NAMES = {1: 'L', 3: 'RGB', 4: 'RGBA'}
+
+def _cache_path(input_path, buffer_mode):
+    """
+    Chemin du .npy décodé, dans le cache utilisateur (jamais à côté du master)
+    """
+    cache_dir = os.path.join(os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache'),
+                             'izzico-logo')
+    os.makedirs(cache_dir, exist_ok=True)
+    key = hashlib.sha256(os.path.abspath(input_path).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir, f"{key}.{buffer_mode}.npy")
+
+def _decode_into_memmap(img, buffer_mode, cache_path):
+    """
+    Décode img directement dans un .npy mappé en mémoire
+
+    ImageFile.load() garde le cœur d'image qu'on lui fournit : on lui donne
+    celui de Image.frombuffer() sur le mmap, et le décodeur y écrit ses
+    lignes au fil de la décompression, sans image complète en RAM.
+    """
+    width, height = img.size
+    channels = len(buffer_mode)
+    tmp_path = cache_path + '.tmp'
+    buffer = np.lib.format.open_memmap(
+        tmp_path, mode='w+', dtype=np.uint8,
+        shape=(height, width, channels) if channels > 1 else (height, width))
+    target = Image.frombuffer(buffer_mode, img.size, buffer, 'raw', buffer_mode, 0, 1)
+    img._mode = buffer_mode
+    img.im = target.im
+    img.load()
+    decoded_in_place = img.im is target.im
+    buffer.flush()
+    del target, buffer
+    if not decoded_in_place:
+        os.remove(tmp_path)
+        raise RuntimeError("cette version de Pillow ne décode pas dans un buffer externe")
+    os.replace(tmp_path, cache_path)
+
+def open_master_buffer(input_path, memory_budget=MEMORY_BUDGET):
+    """
+    Retourne l'unique buffer numpy (H, W, C) du master
+
+    Petit master : décodé puis l'image PIL est libérée (pas de double copie).
+    Gros master (L, RGB, RGBA) : décodé une seule fois directement dans un
+    .npy du cache utilisateur, puis mappé en mémoire (mmap) ; les lancements
+    suivants réutilisent ce .npy tant que le master n'a pas changé.
+    """
+    with Image.open(input_path) as img:
+        width, height = img.size
+        buffer_mode = MAPPED_MODES.get(img.mode)
+        channels = len(buffer_mode) if buffer_mode else 4
+
+        if width * height * channels > memory_budget and buffer_mode:
+            cache_path = _cache_path(input_path, buffer_mode)
+            fresh = os.path.exists(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(input_path)
+            if not fresh:
+                print(f"🗺️  Master > budget mémoire : décodage direct dans {cache_path}")
+                try:
+                    _decode_into_memmap(img, buffer_mode, cache_path)
+                    fresh = True
+                except RuntimeError as e:
+                    print(f"⚠️  {e} : décodage complet en mémoire")
+            if fresh:
+                buffer = np.load(cache_path, mmap_mode='r')
+                return buffer[:, :, :3] if buffer_mode == 'RGBX' else buffer
+
+        if width * height * channels > memory_budget:
+            print(f"⚠️  Mode {img.mode} non mappable : décodage complet en mémoire")
+        if img.mode not in ('RGBA', 'RGB', 'L'):
+            img = img.convert('RGBA')
+        return np.asarray(img)
+
+def resize_buffer(buffer, width, strip_rows=STRIP_ROWS):
+    """
+    Lanczos du buffer (éventuellement mmap) vers la largeur `width`, bande par bande
+
+    Chaque bande de sortie est calculée depuis les seules lignes sources
+    qu'elle lit (support Lanczos compris, via le paramètre box de resize) :
+    le résultat est celui d'un resize complet (à l'arrondi près), sans image
+    source en RAM.
+    """
+    src_height, src_width = buffer.shape[:2]
+    height = round(src_height * width / src_width)
+    factor = src_height / height
+    # Lanczos lit 3 pixels de chaque côté, multipliés par le facteur de réduction
+    support = math.ceil(3 * max(factor, 1.0)) + 1
+    band = max(1, int(strip_rows / factor))
+
+    out = None
+    for out_top in range(0, height, band):
+        out_bottom = min(height, out_top + band)
+        y0, y1 = out_top * factor, out_bottom * factor
+        top, bottom = max(0, int(y0) - support), min(src_height, math.ceil(y1) + support)
+        strip = Image.fromarray(np.ascontiguousarray(buffer[top:bottom]))
+        part = strip.resize((width, out_bottom - out_top), Image.LANCZOS,
+                            box=(0, y0 - top, src_width, y1 - top))
+        if out is None:
+            out = Image.new(part.mode, (width, height))
+        out.paste(part, (0, out_top))
+    return out
+
+def _strips(source, strip_rows=STRIP_ROWS):
+    """
+    Itère (top, bande numpy) sur un buffer numpy/mmap ou une image PIL,
+    sans jamais matérialiser une copie complète de l'image
+    """
+    if isinstance(source, Image.Image):
+        width, height = source.size
+        for top in range(0, height, strip_rows):
+            yield top, np.asarray(source.crop((0, top, width, min(height, top + strip_rows))))
+    else:
+        for top in range(0, source.shape[0], strip_rows):
+            yield top, source[top:top + strip_rows]
+
+def ink_mask(img_array, threshold=250):
     """
-    Trouve les limites de chaque lettre en détectant les colonnes vides
+    Masque booléen des pixels "encrés" (lettres) de l'image
     """
     # Convertir en niveaux de gris si nécessaire
     if len(img_array.shape) == 3:
         # Prendre le canal alpha si disponible, sinon moyenne RGB
         if img_array.shape[2] == 4:
-            gray = img_array[:, :, 3]  # Canal alpha
-        else:
-            gray = np.mean(img_array[:, :, :3], axis=2)
+            # Canal alpha : opaque = contenu, transparent = fond
+            return img_array[:, :, 3] > (255 - threshold)
+        gray = np.mean(img_array[:, :, :3], axis=2)
     else:
         gray = img_array
 
-    # Détecter les colonnes qui contiennent du contenu (non blanc/transparent)
-    col_has_content = np.any(gray < threshold, axis=0)
+    # Contenu = pixels non blancs
+    return gray < threshold
 
-    # Trouver les groupes de colonnes consécutives avec du contenu
-    letters = []
-    in_letter = False
-    start_col = 0
-
-    for i, has_content in enumerate(col_has_content):
-        if has_content and not in_letter:
-            # Début d'une nouvelle lettre
-            start_col = i
-            in_letter = True
-        elif not has_content and in_letter:
-            # Fin de la lettre
-            letters.append((start_col, i))
-            in_letter = False
-
-    # Si la dernière lettre va jusqu'au bord
-    if in_letter:
-        letters.append((start_col, len(col_has_content)))
+def find_runs(occupancy):
+    """
+    Retourne les intervalles [start, end) des runs True d'un vecteur booléen (vectorisé)
+    """
+    edges = np.diff(np.concatenate(([0], occupancy.view(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+    return list(zip(starts.tolist(), ends.tolist()))
+
+def _label_runs(mask):
+    """
+    Étiquetage 8-connexe par runs horizontaux + union-find (repli sans scipy)
+
+    Le nombre de runs par ligne est faible pour un logo, la boucle Python
+    porte donc sur quelques runs par ligne et non sur les pixels.
+    """
+    parent = []
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    runs = []  # (row, start, end, run_id)
+    previous = []
+    for row in np.flatnonzero(mask.any(axis=1)).tolist():
+        current = []
+        for start, end in find_runs(mask[row]):
+            run_id = len(parent)
+            parent.append(run_id)
+            # 8-connexité : chevauchement avec les runs de la ligne précédente (±1 px)
+            if previous and previous[0][0] == row - 1:
+                for _, p_start, p_end, p_id in previous:
+                    if p_start <= end and start <= p_end:
+                        root_a, root_b = find(run_id), find(p_id)
+                        if root_a != root_b:
+                            parent[max(root_a, root_b)] = min(root_a, root_b)
+            current.append((row, start, end, run_id))
+        runs.extend(current)
+        previous = current
+
+    boxes = {}
+    for row, start, end, run_id in runs:
+        root = find(run_id)
+        left, top, right, bottom = boxes.get(root, (start, row, end, row + 1))
+        boxes[root] = (min(left, start), min(top, row), max(right, end), max(bottom, row + 1))
+    return list(boxes.values())
+
+def connected_component_boxes(mask):
+    """
+    Boîtes (left, top, right, bottom) des composantes connexes du masque
+    """
+    if ndimage is not None:
+        labels, _ = ndimage.label(mask, structure=np.ones((3, 3), dtype=bool))
+        return [(sl[1].start, sl[0].start, sl[1].stop, sl[0].stop)
+                for sl in ndimage.find_objects(labels) if sl is not None]
+    return _label_runs(mask)
+
+def _merge_stacked(boxes):
+    """
+    Fusionne les composantes empilées verticalement (points, accents)
+    avec la lettre qu'elles surplombent
+    """
+    merged = []
+    for box in sorted(boxes, key=lambda b: b[2] - b[0], reverse=True):
+        for i, (left, top, right, bottom) in enumerate(merged):
+            overlap = min(right, box[2]) - max(left, box[0])
+            if overlap > 0.5 * min(right - left, box[2] - box[0]):
+                merged[i] = (min(left, box[0]), min(top, box[1]),
+                             max(right, box[2]), max(bottom, box[3]))
+                break
+        else:
+            merged.append(box)
+    return sorted(merged)
+
+def find_letter_bounds(source, threshold=250, expected_letters=None, strip_rows=STRIP_ROWS):
+    """
+    Trouve la boîte englobante serrée (left, top, right, bottom) de chaque lettre
 
+    Découpe d'abord sur les colonnes vides (np.diff vectorisé). Si cela donne
+    moins de lettres qu'attendu (glyphes crénés ou qui se touchent), repli
+    sur l'étiquetage 2-D en composantes connexes.
+
+    source: buffer numpy (éventuellement mmap) ou image PIL ; l'occupation
+    est calculée par bandes de strip_rows lignes (mémoire bornée).
+    """
+    if isinstance(source, Image.Image):
+        width, height = source.size
+    else:
+        height, width = source.shape[:2]
+
+    # Colonnes qui contiennent du contenu, puis runs de colonnes consécutives
+    columns = np.zeros(width, dtype=bool)
+    for _, strip in _strips(source, strip_rows):
+        columns |= ink_mask(strip, threshold).any(axis=0)
+    column_runs = find_runs(columns)
+
+    if expected_letters is not None and len(column_runs) < expected_letters:
+        # Le masque 2-D (1 octet/pixel) n'est construit que pour ce repli
+        mask = np.empty((height, width), dtype=bool)
+        for top, strip in _strips(source, strip_rows):
+            mask[top:top + strip.shape[0]] = ink_mask(strip, threshold)
+        return _merge_stacked(connected_component_boxes(mask))
+
+    # Étendue verticale de chaque lettre, bande par bande
+    row_hits = np.zeros((len(column_runs), height), dtype=bool)
+    for top, strip in _strips(source, strip_rows):
+        mask = ink_mask(strip, threshold)
+        for i, (start, end) in enumerate(column_runs):
+            row_hits[i, top:top + mask.shape[0]] = mask[:, start:end].any(axis=1)
+
+    letters = []
+    for (start, end), hits in zip(column_runs, row_hits):
+        rows = np.flatnonzero(hits)
+        letters.append((start, int(rows[0]), end, int(rows[-1]) + 1))
     return letters
 
 def split_logo_into_letters(input_path, output_dir, letter_names=['I', 'z', 'z', 'I', 'c', 'o']):
@@ -53,20 +292,20 @@ def split_logo_into_letters(input_path, output_dir, letter_names=['I', 'z', 'z',
     # Créer le dossier de sortie
     os.makedirs(output_dir, exist_ok=True)
 
-    # Charger l'image
-    img = Image.open(input_path)
-    img_array = np.array(img)
+    # Charger l'image (un seul buffer, mappé en mémoire pour les gros masters)
+    img_array = open_master_buffer(input_path)
+    height, width = img_array.shape[:2]
 
-    print(f"📸 Image chargée: {img.size[0]}x{img.size[1]} pixels")
-    print(f"   Mode: {img.mode}")
+    print(f"📸 Image chargée: {width}x{height} pixels")
+    print(f"   Canaux: {img_array.shape[2] if img_array.ndim == 3 else 1}")
 
     # Trouver les limites des lettres
-    letter_bounds = find_letter_bounds(img_array)
+    letter_bounds = find_letter_bounds(img_array, expected_letters=len(letter_names))
 
     print(f"✂️  {len(letter_bounds)} lettres détectées")
 
     # Découper et sauvegarder chaque lettre
-    for idx, (start, end) in enumerate(letter_bounds):
+    for idx, (left, top, right, bottom) in enumerate(letter_bounds):
         if idx >= len(letter_names):
             letter_name = f"letter_{idx}"
         else:
@@ -74,41 +313,201 @@ def split_logo_into_letters(input_path, output_dir, letter_names=['I', 'z', 'z',
 
         # Découper la lettre avec un peu de marge
         margin = 5
-        crop_start = max(0, start - margin)
-        crop_end = min(img.size[0], end + margin)
+        box = (max(0, left - margin), max(0, top - margin),
+               min(width, right + margin), min(height, bottom + margin))
 
-        # Cropper l'image
-        letter_img = img.crop((crop_start, 0, crop_end, img.size[1]))
+        # Cropper le buffer (seule la lettre est copiée)
+        letter_img = Image.fromarray(np.ascontiguousarray(img_array[box[1]:box[3], box[0]:box[2]]))
 
         # Sauvegarder
         output_path = os.path.join(output_dir, f"izzico-{letter_name}.png")
         letter_img.save(output_path)
 
-        width = crop_end - crop_start
-        print(f"   ✅ {letter_name}: {width}px large → {output_path}")
+        print(f"   ✅ {letter_name}: {box[2] - box[0]}x{box[3] - box[1]}px → {output_path}")
 
     print(f"\n🎉 Terminé ! {len(letter_bounds)} lettres sauvegardées dans {output_dir}")
     return len(letter_bounds)
 
+def _encode_asset(img, fmt, output_path):
+    """Encode une image dans `fmt` et retourne son entrée de manifest"""
+    buffer = io.BytesIO()
+    img.save(buffer, **ENCODER_OPTIONS[fmt])
+    data = buffer.getvalue()
+    with open(output_path, 'wb') as f:
+        f.write(data)
+    return {
+        'width': img.size[0],
+        'height': img.size[1],
+        'bytes': len(data),
+        'sha256': hashlib.sha256(data).hexdigest(),
+    }
+
+def supported_formats(formats):
+    """Filtre les formats dont l'encodeur est disponible dans Pillow"""
+    available = {ext.lstrip('.') for ext, name in Image.registered_extensions().items()
+                 if name in Image.SAVE}
+    missing = [fmt for fmt in formats if fmt not in available]
+    if missing:
+        print(f"⚠️  Encodeur(s) indisponible(s), ignoré(s): {', '.join(missing)}")
+    return [fmt for fmt in formats if fmt in available]
+
+def pack_rects(rect_sizes, padding=2):
+    """
+    Bin-packing en étagères (first-fit, hauteurs décroissantes)
+
+    Retourne la position (x, y) de chaque rectangle et la taille de l'atlas.
+    La largeur vise un atlas à peu près carré (racine de l'aire totale).
+    """
+    order = sorted(range(len(rect_sizes)), key=lambda i: rect_sizes[i][1], reverse=True)
+    area = sum((w + padding) * (h + padding) for w, h in rect_sizes)
+    atlas_width = max(max(w for w, _ in rect_sizes) + padding, math.ceil(math.sqrt(area)))
+
+    positions = [None] * len(rect_sizes)
+    shelves = []  # [y, hauteur, curseur x]
+    atlas_height = 0
+    for i in order:
+        w, h = rect_sizes[i][0] + padding, rect_sizes[i][1] + padding
+        for shelf in shelves:
+            if shelf[2] + w <= atlas_width and h <= shelf[1]:
+                positions[i] = (shelf[2], shelf[0])
+                shelf[2] += w
+                break
+        else:
+            positions[i] = (0, atlas_height)
+            shelves.append([atlas_height, h, w])
+            atlas_height += h
+
+    return positions, (atlas_width, atlas_height)
+
+def build_logo_atlas(letter_images, output_dir, formats=('png', 'webp'), padding=2,
+                     name='izzico-atlas'):
+    """
+    Empile toutes les lettres (toutes tailles) dans une seule sprite sheet
+
+    letter_images: {(size, letter_name): image PIL}
+    Écrit l'atlas dans chaque format, plus une carte de coordonnées en JSON
+    (web + iOS) et en CSS (une classe par lettre et par taille).
+    """
+    keys = list(letter_images)
+    positions, atlas_size = pack_rects([letter_images[k].size for k in keys], padding)
+
+    atlas = Image.new('RGBA', atlas_size, (0, 0, 0, 0))
+    frames = {}
+    css = [f".{name} {{ background-image: url('{name}.{formats[0]}'); "
+           f"background-repeat: no-repeat; display: inline-block; }}"]
+    for (size, letter_name), (x, y) in zip(keys, positions):
+        img = letter_images[(size, letter_name)]
+        atlas.paste(img.convert('RGBA'), (x, y))
+        frame_id = f"{letter_name}-{size}"
+        frames[frame_id] = {'letter': letter_name, 'size': size,
+                            'x': x, 'y': y, 'width': img.size[0], 'height': img.size[1]}
+        css.append(f".{name}-{frame_id} {{ background-position: {-x}px {-y}px; "
+                   f"width: {img.size[0]}px; height: {img.size[1]}px; }}")
+
+    images = {fmt: _encode_asset(atlas, fmt, os.path.join(output_dir, f"{name}.{fmt}"))
+              for fmt in supported_formats(formats)}
+
+    with open(os.path.join(output_dir, f"{name}.json"), 'w') as f:
+        json.dump({'width': atlas_size[0], 'height': atlas_size[1],
+                   'images': images, 'frames': frames}, f, indent=2)
+    with open(os.path.join(output_dir, f"{name}.css"), 'w') as f:
+        f.write("\n".join(css) + "\n")
+
+    print(f"🧩 Atlas {atlas_size[0]}x{atlas_size[1]}px: {len(frames)} lettres → {name}.json/.css")
+    return frames
+
+def build_logo_assets(master_path, output_dir, sizes=(1200, 2400),
+                      formats=('png', 'webp', 'avif'), letter_names=LETTER_NAMES,
+                      margin=5, workers=None, atlas=False):
+    """
+    Génère en une passe toutes les tailles, lettres et formats du logo
+
+    Le master est décodé une seule fois ; chaque taille en est dérivée
+    directement par rééchantillonnage Lanczos et les boîtes des lettres, détectées
+    une fois sur le master, sont mises à l'échelle. Les encodages tournent dans
+    un pool de threads (Pillow relâche le GIL) et un manifest.json liste
+    dimensions et hashes de chaque fichier. Avec atlas=True, toutes les
+    lettres sont aussi regroupées dans une sprite sheet (build_logo_atlas).
+    """
+    formats = supported_formats(formats)
+
+    # Un seul buffer : mappé en mémoire (décodé dans le mmap) pour les gros masters
+    master = open_master_buffer(master_path)
+    height, width = master.shape[:2]
+    mode = MODE_NAMES[master.shape[2] if master.ndim == 3 else 1]
+    print(f"📸 Master: {width}x{height} pixels ({mode})")
+
+    letter_bounds = find_letter_bounds(master, expected_letters=len(letter_names))
+    print(f"✂️  {len(letter_bounds)} lettres détectées")
+
+    jobs = []
+    letter_images = {}
+    # Chaque taille part du master : pas de Lanczos en cascade (pertes cumulées)
+    for size in sorted(sizes, reverse=True):
+        scale = size / width
+        current = master if size == width else resize_buffer(master, size)
+        current_width, current_height = (width, height) if size == width else current.size
+        size_dir = os.path.join(output_dir, f"letters-{size}px")
+        os.makedirs(size_dir, exist_ok=True)
+
+        for idx, (left, top, right, bottom) in enumerate(letter_bounds):
+            letter_name = letter_names[idx] if idx < len(letter_names) else f"letter_{idx}"
+            box = (max(0, round((left - margin) * scale)), max(0, round((top - margin) * scale)),
+                   min(current_width, round((right + margin) * scale)),
+                   min(current_height, round((bottom + margin) * scale)))
+            if current is master:
+                # Seule la lettre est copiée hors du buffer
+                letter_img = Image.fromarray(np.ascontiguousarray(master[box[1]:box[3], box[0]:box[2]]))
+            else:
+                letter_img = current.crop(box)
+                letter_img.load()
+            letter_images[(size, letter_name)] = letter_img
+            for fmt in formats:
+                path = os.path.join(size_dir, f"izzico-{letter_name}.{fmt}")
+                jobs.append(((size, letter_name, fmt, path), letter_img))
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [(key, pool.submit(_encode_asset, img, key[2], key[3])) for key, img in jobs]
+        assets = []
+        for (size, letter_name, fmt, path), future in futures:
+            entry = future.result()
+            assets.append({'letter': letter_name, 'size': size, 'format': fmt,
+                           'path': os.path.relpath(path, output_dir), **entry})
+
+    master_hash = hashlib.sha256()
+    for _, strip in _strips(master):
+        master_hash.update(np.ascontiguousarray(strip).tobytes())
+    manifest = {
+        'master': os.path.basename(master_path),
+        'master_sha256': master_hash.hexdigest(),
+        'master_size': [width, height],
+        'letters': [letter_names[i] if i < len(letter_names) else f"letter_{i}"
+                    for i in range(len(letter_bounds))],
+        'assets': assets,
+    }
+    if atlas:
+        manifest['atlas'] = "izzico-atlas.json"
+        build_logo_atlas(letter_images, output_dir)
+
+    with open(os.path.join(output_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+
+    total = sum(a['bytes'] for a in assets) / 1024
+    print(f"\n🎉 {len(assets)} fichiers ({total:.0f} KB) + manifest.json dans {output_dir}")
+    return manifest
+
 if __name__ == "__main__":
     # Chemins
     logo_dir = "/Users/samuelbaudon/Desktop/Easy Co/graphisme/izzico logo"
 
-    # Versions à découper
-    versions = [
-        ("izzico-1G-1200px.png", "1200px"),
-        ("izzico-1G-2400px.png", "2400px"),
-    ]
-
-    for logo_file, size in versions:
-        input_path = os.path.join(logo_dir, logo_file)
-        output_dir = os.path.join(logo_dir, f"letters-{size}")
+    # Master le plus grand : toutes les tailles en sont dérivées
+    master_path = os.path.join(logo_dir, "izzico-1G-2400px.png")
 
-        print(f"\n{'='*60}")
-        print(f"🔤 Découpage du logo {size}")
-        print(f"{'='*60}")
+    print(f"\n{'='*60}")
+    print(f"🔤 Découpage du logo (1200px, 2400px) + atlas")
+    print(f"{'='*60}")
 
-        if os.path.exists(input_path):
-            split_logo_into_letters(input_path, output_dir)
-        else:
-            print(f"❌ Fichier introuvable: {input_path}")
+    if os.path.exists(master_path):
+        build_logo_assets(master_path, logo_dir, sizes=(1200, 2400), atlas=True)
+    else:
+        print(f"❌ Fichier introuvable: {master_path}")
@@ -1,39 +1,146 @@
 #!/usr/bin/env python3
 """
 Script pour découper manuellement le logo IzzIco en 6 lettres
-Basé sur une division approximative de la largeur
+Basé sur une division approximative de la largeur, ou calibrée
+automatiquement par recherche de seams (--calibrate)
 """
 
 from PIL import Image
+import hashlib
+import json
+import numpy as np
 import os
+import sys
 
-def split_logo_manual(input_path, output_dir):
+# IzzIco = 6 lettres
+LETTER_NAMES = ['I', 'z1', 'z2', 'I2', 'c', 'o']
+
+# Positions approximatives (point de départ de la calibration)
+# Format: (start_ratio, end_ratio)
+DEFAULT_POSITIONS = [
+    (0.00, 0.15),   # I (étroit)
+    (0.15, 0.30),   # z
+    (0.30, 0.45),   # z
+    (0.45, 0.60),   # I (étroit)
+    (0.60, 0.78),   # c
+    (0.78, 1.00),   # o
+]
+
+# Demi-largeur de la fenêtre de recherche autour de chaque frontière approximative
+SEAM_WINDOW_RATIO = 0.05
+
+CACHE_FILENAME = "letter-positions-cache.json"
+
+def find_split_seams(alpha, boundaries, half_window):
     """
-    Découpe le logo en 6 parties égales (une par lettre: I-z-z-I-c-o)
+    Recherche vectorisée du seam vertical de moindre encre autour de chaque frontière
+
+    Programmation dynamique ligne par ligne (déplacement de ±1 colonne par ligne).
+    Toutes les fenêtres sont juxtaposées dans une seule matrice de coût, séparées
+    par des colonnes de coût infini : un seul passage DP traite toutes les
+    frontières. Retourne pour chaque frontière la colonne médiane de son seam,
+    recentrée dans la gouttière vide qui l'entoure quand il y en a une.
+    """
+    height, width = alpha.shape
+    windows = [(max(1, b - half_window), min(width - 1, b + half_window + 1)) for b in boundaries]
+
+    # Matrice de coût : [inf | fenêtre 1 | inf | fenêtre 2 | ... | inf]
+    blocks, offsets = [np.full((height, 1), np.inf)], []
+    col = 1
+    for lo, hi in windows:
+        offsets.append((col, lo))
+        blocks.append(alpha[:, lo:hi].astype(np.float64))
+        blocks.append(np.full((height, 1), np.inf))
+        col += hi - lo + 1
+    cost = np.hstack(blocks)
+
+    # Coût cumulé + direction choisie (-1, 0, +1) pour chaque pixel
+    total = cost[0].copy()
+    moves = np.zeros(cost.shape, dtype=np.int8)
+    for row in range(1, height):
+        candidates = np.stack([
+            np.concatenate(([np.inf], total[:-1])),   # vient de la gauche
+            total,                                    # tout droit
+            np.concatenate((total[1:], [np.inf])),    # vient de la droite
+        ])
+        choice = np.argmin(candidates, axis=0)
+        moves[row] = choice - 1
+        total = cost[row] + candidates[choice, np.arange(total.size)]
+
+    column_ink = alpha.sum(axis=0)
+
+    split_columns = []
+    for (start, image_lo), (lo, hi) in zip(offsets, windows):
+        # Fin du seam : minimum de la dernière ligne dans la fenêtre, puis remontée
+        x = start + int(np.argmin(total[start:start + hi - lo]))
+        path = np.empty(height, dtype=np.int64)
+        for row in range(height - 1, -1, -1):
+            path[row] = x
+            x += int(moves[row, x])
+        split = int(np.median(path)) - start + image_lo
+
+        # Recentrage : milieu du run de colonnes vides contenant le split
+        if column_ink[split] == 0:
+            inked = np.flatnonzero(column_ink[lo:hi])
+            left = inked[inked < split - lo]
+            right = inked[inked > split - lo]
+            gap_lo = lo + (int(left[-1]) + 1 if left.size else 0)
+            gap_hi = lo + (int(right[0]) if right.size else hi - lo)
+            split = (gap_lo + gap_hi) // 2
+        split_columns.append(split)
+    return split_columns
+
+def calibrate_positions(img, cache_path=None):
+    """
+    Calcule les positions (start_ratio, end_ratio) des lettres sur le canal alpha
+
+    Les ratios sont indépendants de la résolution et mis en cache par hash
+    des pixels du master : une image déjà calibrée n'est pas recalculée.
+    """
+    # Seul le canal alpha est extrait (1 octet/pixel) : pas de copie RGBA complète.
+    # Sans alpha, l'encre est l'inverse de la luminance (logo sombre sur fond clair).
+    if 'A' in img.getbands():
+        alpha = np.asarray(img.getchannel('A'))
+    else:
+        alpha = 255 - np.asarray(img.convert('L'))
+    image_hash = hashlib.sha256(alpha.tobytes()).hexdigest()
+
+    cache = {}
+    if cache_path and os.path.exists(cache_path):
+        with open(cache_path) as f:
+            cache = json.load(f)
+    if image_hash in cache:
+        print("♻️  Positions calibrées trouvées dans le cache")
+        return [tuple(p) for p in cache[image_hash]]
+
+    width = alpha.shape[1]
+    boundaries = [int(width * end) for _, end in DEFAULT_POSITIONS[:-1]]
+    splits = find_split_seams(alpha, boundaries, int(width * SEAM_WINDOW_RATIO))
+
+    edges = [0.0] + [x / width for x in splits] + [1.0]
+    positions = [(round(edges[i], 5), round(edges[i + 1], 5)) for i in range(len(edges) - 1)]
+
+    if cache_path:
+        cache[image_hash] = positions
+        with open(cache_path, 'w') as f:
+            json.dump(cache, f, indent=2)
+    print(f"🎯 Positions calibrées: {', '.join(f'{end:.3f}' for _, end in positions[:-1])}")
+    return positions
+
+def split_logo_manual(img, output_dir, positions=DEFAULT_POSITIONS):
+    """
+    Découpe le logo en 6 parties (une par lettre: I-z-z-I-c-o)
+
+    img: image PIL déjà décodée (le master n'est ouvert qu'une fois)
+    positions: ratios (start, end) par lettre, approximatifs ou calibrés
     """
     os.makedirs(output_dir, exist_ok=True)
 
-    # Charger l'image
-    img = Image.open(input_path)
     width, height = img.size
 
     print(f"📸 Image: {width}x{height}px")
 
-    # IzzIco = 6 lettres
-    # Approximation: diviser en 6 parties égales
-    # Ajuster selon la largeur réelle de chaque lettre
-    letter_names = ['I', 'z1', 'z2', 'I2', 'c', 'o']
-
-    # Positions approximatives (à ajuster après visualisation)
-    # Format: (start_ratio, end_ratio)
-    positions = [
-        (0.00, 0.15),   # I (étroit)
-        (0.15, 0.30),   # z
-        (0.30, 0.45),   # z
-        (0.45, 0.60),   # I (étroit)
-        (0.60, 0.78),   # c
-        (0.78, 1.00),   # o
-    ]
+    letter_names = LETTER_NAMES
 
     for idx, (start_ratio, end_ratio) in enumerate(positions):
         letter_name = letter_names[idx]
@@ -46,7 +153,7 @@ def split_logo_manual(input_path, output_dir):
 
         # Sauvegarder
         output_path = os.path.join(output_dir, f"izzico-{letter_name}.png")
-        letter_img.save(output_path)
+        letter_img.save(output_path, optimize=True)
 
         letter_width = end_px - start_px
         print(f"   ✅ {letter_name}: {letter_width}px ({start_px}-{end_px}px) → {output_path}")
@@ -56,20 +163,34 @@ def split_logo_manual(input_path, output_dir):
 if __name__ == "__main__":
     logo_dir = "/Users/samuelbaudon/Desktop/Easy Co/graphisme/izzico logo"
 
+    # Un seul décodage du master 2400px ; la version 1200px en est dérivée
+    master_path = os.path.join(logo_dir, "izzico-1G-2400px.png")
+
     versions = [
-        ("izzico-1G-1200px.png", "letters-manual-1200px"),
-        ("izzico-1G-2400px.png", "letters-manual-2400px"),
+        (2400, "letters-manual-2400px"),
+        (1200, "letters-manual-1200px"),
     ]
 
-    for logo_file, output_subdir in versions:
-        input_path = os.path.join(logo_dir, logo_file)
-        output_dir = os.path.join(logo_dir, output_subdir)
-
-        print(f"\n{'='*60}")
-        print(f"🔤 Découpage manuel: {logo_file}")
-        print(f"{'='*60}")
-
-        if os.path.exists(input_path):
-            split_logo_manual(input_path, output_dir)
-        else:
-            print(f"❌ Fichier introuvable: {input_path}")
+    if not os.path.exists(master_path):
+        print(f"❌ Fichier introuvable: {master_path}")
+    else:
+        master = Image.open(master_path)
+        master.load()
+
+        # --calibrate : frontières calculées une fois sur le master (ratios)
+        positions = DEFAULT_POSITIONS
+        if "--calibrate" in sys.argv:
+            positions = calibrate_positions(master, os.path.join(logo_dir, CACHE_FILENAME))
+
+        for target_width, output_subdir in versions:
+            output_dir = os.path.join(logo_dir, output_subdir)
+
+            print(f"\n{'='*60}")
+            print(f"🔤 Découpage manuel: {target_width}px")
+            print(f"{'='*60}")
+
+            img = master
+            if master.size[0] != target_width:
+                target_height = round(master.size[1] * target_width / master.size[0])
+                img = master.resize((target_width, target_height), Image.LANCZOS)
+            split_logo_manual(img, output_dir, positions)
@@ -2,14 +2,54 @@
 """
 Migration Cleanup Script
 Identifies duplicate and invalid migration files
+
+It also reads the SQL itself: every migration is tokenised, the DDL objects
+it touches (tables, columns, constraints, indexes, policies, functions,
+triggers, views...) are extracted and a dependency DAG is built between
+migrations, so identical and superseded migrations can be found by content.
+The analysis also catalogues every index of the resulting schema and flags
+duplicate, left-prefix-covered and overlapping partial indexes.
+
+Usage:
+    python cleanup_migrations.py             # duplicates + invalid files, delete script
+    python cleanup_migrations.py analyze     # content analysis (hashes, objects, DAG, indexes)
+    python cleanup_migrations.py squash      # one baseline migration for fresh databases
+    python cleanup_migrations.py bench       # replay on a throwaway Postgres: time, locks, catalog
+    python cleanup_migrations.py lint --since 127   # lock-heavy DDL, with safer online alternatives
+    python cleanup_migrations.py tracking --dump remote.csv   # diff/repair schema_migrations
 """
 
+import argparse
+import bisect
+import hashlib
+import json
 import os
 import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from collections import defaultdict
 
-MIGRATIONS_DIR = Path("/Users/samuelbaudon/easyco-onboarding/supabase/migrations")
+SUPABASE_DIR = Path(__file__).resolve().parent
+MIGRATIONS_DIR = Path(os.environ.get("MIGRATIONS_DIR", SUPABASE_DIR / "migrations"))
+
+# Schema that existed before the first migration (users, user_profiles...)
+BASE_SCHEMA = SUPABASE_DIR / "schema.sql"
+
+# Roles, auth/storage schemas and publication a plain Postgres lacks
+SUPABASE_SHIM = SUPABASE_DIR / "local_shim.sql"
+
+# Parsed migrations are cached by file content hash; bump PARSER_VERSION
+# whenever the parser output changes so stale entries are ignored
+CACHE_PATH = SUPABASE_DIR / ".cache" / "migration_analysis.json"
+PARSER_VERSION = 2
+
+# Below this many files to parse, a process pool costs more than it saves
+PARALLEL_THRESHOLD = 8
 
 def parse_migration_filename(filename):
     """Extract version number from migration filename"""
@@ -39,6 +79,2806 @@ def should_keep_migration(filename):
     # Base score
     return 0
 
+# ============================================
+# SQL TOKENIZER
+# ============================================
+
+TOKEN_RE = re.compile(r"""
+    (?P<space>\s+)
+  | (?P<comment>--[^\n]*|/\*.*?\*/)
+  | (?P<dollar>\$(?P<tag>[A-Za-z_]\w*|)\$.*?\$(?P=tag)\$)
+  | (?P<string>[EeBbXxNn]?'(?:[^']|'')*')
+  | (?P<ident>"(?:[^"]|"")*")
+  | (?P<number>\d+(?:\.\d*)?(?:[eE][+-]?\d+)?)
+  | (?P<word>[A-Za-z_À-￿][\w$]*)
+  | (?P<param>\$\d+)
+  | (?P<op>::|<>|<=|>=|!=|->>|->|\#>>|\#>|@>|<@|\|\||&&|[-+*/<>=~!@\#%^&|`?:\[\]])
+  | (?P<punct>[(),;.])
+  | (?P<other>.)
+""", re.S | re.X)
+
+# A token is (kind, value, start, end): words are lowercased, quoted
+# identifiers unquoted; the original text is always sql[start:end]
+KIND, VALUE, START, END = range(4)
+
+def tokenize(sql):
+    """Split SQL into tokens, dropping whitespace and comments"""
+    tokens = []
+    append = tokens.append
+    for m in TOKEN_RE.finditer(sql):
+        kind = m.lastgroup
+        if kind == "space" or kind == "comment":
+            continue
+        text = m.group()
+        if kind == "word":
+            value = text.lower()
+        elif kind == "ident":
+            value = text[1:-1].replace('""', '"')
+        else:
+            value = text
+        append((kind, value, m.start(), m.end()))
+    return tokens
+
+def split_statements(tokens):
+    """Split a token list on top-level semicolons (bodies are single tokens)"""
+    statements = []
+    current = []
+    for token in tokens:
+        if token[KIND] == "punct" and token[VALUE] == ";":
+            if current:
+                statements.append(current)
+                current = []
+        else:
+            current.append(token)
+    if current:
+        statements.append(current)
+    return statements
+
+def normalized_hash(tokens):
+    """Hash of the token stream: insensitive to comments, whitespace and keyword case"""
+    h = hashlib.sha256()
+    for token in tokens:
+        h.update(f"{token[KIND]}\x1f{token[VALUE]}\x1e".encode("utf-8"))
+    return h.hexdigest()
+
+def render(tokens, sql):
+    """Compact single-line SQL text for a token slice"""
+    out = []
+    prev = None
+    for token in tokens:
+        kind, value = token[KIND], token[VALUE]
+        if prev is not None:
+            glue = (prev[VALUE] in ("(", ".", "::") and prev[KIND] in ("punct", "op")) or \
+                   (kind in ("punct", "op") and value in (")", ",", ".", "::")) or \
+                   (kind == "punct" and value == "(" and prev[KIND] in ("word", "ident")
+                    and prev[VALUE] not in RESERVED_BEFORE_PAREN)
+            if not glue:
+                out.append(" ")
+        out.append(sql[token[START]:token[END]])
+        prev = token
+    return "".join(out)
+
+# Keywords that keep a space before "(" when rendering
+RESERVED_BEFORE_PAREN = {
+    "and", "or", "not", "in", "exists", "as", "on", "using", "check", "with",
+    "where", "when", "then", "else", "select", "from", "join", "any", "all",
+    "values", "returns", "table", "key", "references", "unique", "include", "over"
+}
+
+def split_commas(tokens):
+    """Split tokens on top-level commas"""
+    parts = []
+    current = []
+    depth = 0
+    for token in tokens:
+        if token[KIND] == "punct":
+            if token[VALUE] == "(":
+                depth += 1
+            elif token[VALUE] == ")":
+                depth -= 1
+            elif token[VALUE] == "," and depth == 0:
+                parts.append(current)
+                current = []
+                continue
+        elif token[KIND] == "op" and token[VALUE] in ("[", "]"):
+            depth += 1 if token[VALUE] == "[" else -1
+        current.append(token)
+    if current:
+        parts.append(current)
+    return parts
+
+def find_top_level(tokens, words, start=0):
+    """Index of the first top-level word in `words` at or after `start`"""
+    depth = 0
+    for i in range(start, len(tokens)):
+        token = tokens[i]
+        if token[KIND] == "punct":
+            if token[VALUE] == "(":
+                depth += 1
+            elif token[VALUE] == ")":
+                depth -= 1
+        elif depth == 0 and token[KIND] == "word" and token[VALUE] in words:
+            return i
+    return len(tokens)
+
+class TokenCursor:
+    """Small look-ahead cursor over the tokens of one statement"""
+
+    def __init__(self, tokens, sql):
+        self.tokens = tokens
+        self.sql = sql
+        self.pos = 0
+
+    def peek(self, offset=0):
+        i = self.pos + offset
+        return self.tokens[i] if i < len(self.tokens) else None
+
+    def word(self, offset=0):
+        token = self.peek(offset)
+        return token[VALUE] if token is not None and token[KIND] == "word" else None
+
+    def at_end(self):
+        return self.pos >= len(self.tokens)
+
+    def next(self):
+        token = self.peek()
+        self.pos += 1
+        return token
+
+    def accept(self, *words):
+        """Consume the keyword sequence if it is next"""
+        for i, word in enumerate(words):
+            if self.word(i) != word:
+                return False
+        self.pos += len(words)
+        return True
+
+    def accept_punct(self, value):
+        token = self.peek()
+        if token is not None and token[KIND] in ("punct", "op") and token[VALUE] == value:
+            self.pos += 1
+            return True
+        return False
+
+    def is_punct(self, value, offset=0):
+        token = self.peek(offset)
+        return token is not None and token[KIND] in ("punct", "op") and token[VALUE] == value
+
+    def name(self):
+        """Read a possibly qualified name, as a tuple of parts"""
+        parts = []
+        token = self.peek()
+        while token is not None and token[KIND] in ("word", "ident", "string"):
+            parts.append(token[VALUE].strip("'") if token[KIND] == "string" else token[VALUE])
+            self.pos += 1
+            if self.is_punct(".") and self.peek(1) is not None and self.peek(1)[KIND] in ("word", "ident"):
+                self.pos += 1
+                token = self.peek()
+            else:
+                break
+        return tuple(parts)
+
+    def parens(self):
+        """Tokens inside the parenthesised group at the cursor (consumed)"""
+        if not self.is_punct("("):
+            return []
+        depth = 0
+        start = self.pos
+        while not self.at_end():
+            token = self.next()
+            if token[KIND] == "punct" and token[VALUE] == "(":
+                depth += 1
+            elif token[KIND] == "punct" and token[VALUE] == ")":
+                depth -= 1
+                if depth == 0:
+                    return self.tokens[start + 1:self.pos - 1]
+        return self.tokens[start + 1:]
+
+    def rest(self):
+        tokens = self.tokens[self.pos:]
+        self.pos = len(self.tokens)
+        return tokens
+
+    def text(self, tokens):
+        return render(tokens, self.sql)
+
+# ============================================
+# OBJECT NAMES
+# ============================================
+
+TYPE_ALIASES = {
+    "int": "integer", "int4": "integer", "int8": "bigint", "int2": "smallint",
+    "bool": "boolean", "float8": "double precision", "float4": "real",
+    "varchar": "character varying", "char": "character", "decimal": "numeric",
+    "timestamptz": "timestamp with time zone", "timestamp": "timestamp without time zone",
+    "timetz": "time with time zone", "time": "time without time zone"
+}
+
+# First words of multi-word builtin types (so they are not taken as argument names)
+MULTI_WORD_TYPES = {"timestamp", "time", "double", "character", "bit", "interval"}
+
+def qualify(parts, default_schema="public"):
+    """'schema.name' for a name tuple, defaulting to the public schema"""
+    if not parts:
+        return None
+    if len(parts) == 1:
+        return f"{default_schema}.{parts[0]}"
+    return ".".join(parts[-2:])
+
+def normalize_type(text):
+    """Canonical type name for signatures (aliases expanded, typmods dropped)"""
+    text = re.sub(r"\s+", " ", text.strip().lower())
+    text = re.sub(r"\s*\([^)]*\)", "", text)
+    text = re.sub(r"^public\.", "", text)
+    array = ""
+    while text.endswith("[]"):
+        array += "[]"
+        text = text[:-2].strip()
+    if text == "timestamp with time zone" or text == "timestamp without time zone":
+        return text + array
+    return TYPE_ALIASES.get(text, text) + array
+
+def base_key(key):
+    """Object key without a function signature"""
+    return key.split("(", 1)[0]
+
+def object_type(key):
+    return key.split(":", 1)[0]
+
+# Object type -> (singular, plural) report label, other types just take an "s"
+TYPE_LABELS = {"index": ("index", "indexes"), "policy": ("policy", "policies"),
+               "rls": ("RLS toggle", "RLS toggles")}
+
+def count_label(n, kind):
+    """'1 table', '3 indexes', '2 policies'..."""
+    singular, plural = TYPE_LABELS.get(kind, (kind, f"{kind}s"))
+    return f"{n} {singular if n == 1 else plural}"
+
+# ============================================
+# STATEMENT PARSER
+# ============================================
+
+COLUMN_CONSTRAINT_WORDS = {"not", "null", "default", "primary", "unique", "references",
+                           "check", "constraint", "generated", "collate"}
+TABLE_CONSTRAINT_WORDS = {"constraint", "primary", "unique", "foreign", "check", "exclude", "like"}
+REFERENCE_WORDS = {"from", "join", "into", "update", "references", "table"}
+NOT_A_TABLE = {"select", "lateral", "only", "unnest", "jsonb_array_elements", "generate_series",
+               "json_array_elements", "jsonb_each", "json_each", "string_to_array", "regexp_split_to_table",
+               "set", "if", "exists", "not", "new", "old", "each", "row", "public", "function", "values"}
+# Statements inside plpgsql bodies start at the first of these words
+NESTED_VERBS = {"create", "alter", "drop", "comment", "grant", "revoke", "insert", "update", "delete",
+                "execute", "truncate"}
+
+def scan_references(tokens):
+    """Tables referenced after FROM/JOIN/INTO/UPDATE/REFERENCES/TABLE"""
+    refs = set()
+    n = len(tokens)
+    for i, token in enumerate(tokens):
+        if token[KIND] != "word" or token[VALUE] not in REFERENCE_WORDS or i + 1 >= n:
+            continue
+        j = i + 1
+        if tokens[j][KIND] == "word" and tokens[j][VALUE] == "only":
+            j += 1
+        if j >= n or tokens[j][KIND] not in ("word", "ident"):
+            continue
+        if tokens[j][KIND] == "word" and tokens[j][VALUE] in NOT_A_TABLE:
+            continue
+        parts = [tokens[j][VALUE]]
+        if j + 2 < n and tokens[j + 1][VALUE] == "." and tokens[j + 2][KIND] in ("word", "ident"):
+            parts.append(tokens[j + 2][VALUE])
+            j += 2
+        # name( is a function call, not a table (except REFERENCES t(col))
+        if j + 1 < n and tokens[j + 1][VALUE] == "(" and token[VALUE] != "references":
+            continue
+        refs.add("table:" + qualify(tuple(parts)))
+    return refs
+
+def default_constraint_name(table, columns, suffix):
+    """Name Postgres generates for an unnamed constraint"""
+    name = table.split(".", 1)[1]
+    if suffix == "pkey":
+        return f"{name}_pkey"[:63]
+    return "_".join([name] + list(columns) + [suffix])[:63]
+
+def parse_references(cur):
+    """REFERENCES table [(cols)] [ON DELETE action] [ON UPDATE action] ..."""
+    table = qualify(cur.name())
+    columns = [t[VALUE] for t in cur.parens() if t[KIND] in ("word", "ident")]
+    on_delete = on_update = None
+    while True:
+        if cur.accept("on", "delete"):
+            on_delete = parse_fk_action(cur)
+        elif cur.accept("on", "update"):
+            on_update = parse_fk_action(cur)
+        elif cur.word() in ("match", "deferrable", "initially", "not") and cur.word(1) != "null":
+            if cur.accept("not", "valid"):
+                continue
+            cur.next()
+            if cur.word() in ("full", "partial", "simple", "deferred", "immediate", "deferrable"):
+                cur.next()
+        else:
+            break
+    return {"table": table, "columns": columns, "on_delete": on_delete, "on_update": on_update}
+
+def parse_fk_action(cur):
+    words = []
+    while cur.word() in ("cascade", "restrict", "set", "null", "default", "no", "action"):
+        words.append(cur.next()[VALUE])
+        if words[-1] in ("cascade", "restrict", "null", "action") or (words[-1] == "default" and len(words) > 1):
+            break
+    return " ".join(words)
+
+def column_list(tokens):
+    return [t[VALUE] for t in tokens if t[KIND] in ("word", "ident")]
+
+def parse_table_constraint(tokens, sql, table):
+    """Table-level constraint element of CREATE/ALTER TABLE"""
+    cur = TokenCursor(tokens, sql)
+    name = None
+    if cur.accept("constraint"):
+        name = cur.name()[0]
+    constraint = {"name": name, "type": None, "columns": [], "not_valid": False}
+
+    if cur.accept("primary", "key"):
+        constraint["type"] = "primary_key"
+        constraint["columns"] = column_list(cur.parens())
+        suffix = "pkey"
+    elif cur.accept("unique"):
+        constraint["type"] = "unique"
+        cur.accept("nulls", "not", "distinct") or cur.accept("nulls", "distinct")
+        constraint["columns"] = column_list(cur.parens())
+        suffix = "key"
+    elif cur.accept("foreign", "key"):
+        constraint["type"] = "foreign_key"
+        constraint["columns"] = column_list(cur.parens())
+        if cur.accept("references"):
+            constraint["references"] = parse_references(cur)
+        suffix = "fkey"
+    elif cur.accept("check"):
+        constraint["type"] = "check"
+        constraint["expr"] = cur.text(cur.parens())
+        suffix = "check"
+    elif cur.accept("exclude"):
+        constraint["type"] = "exclude"
+        constraint["expr"] = cur.text(cur.rest())
+        suffix = "excl"
+    else:
+        constraint["type"] = "other"
+        constraint["expr"] = cur.text(cur.rest())
+        suffix = "constraint"
+
+    if cur.accept("not", "valid"):
+        constraint["not_valid"] = True
+    if name is None:
+        constraint["name"] = default_constraint_name(table, constraint["columns"], suffix)
+    return constraint
+
+def parse_column(tokens, sql, table):
+    """Column definition: name, type and inline constraints"""
+    cur = TokenCursor(tokens, sql)
+    column = {"name": cur.next()[VALUE], "type": None, "not_null": False, "default": None,
+              "primary_key": False, "unique": False, "references": None, "check": None,
+              "generated": None}
+    end = find_top_level(tokens, COLUMN_CONSTRAINT_WORDS, cur.pos)
+    column["type"] = render(tokens[cur.pos:end], sql)
+    cur.pos = end
+
+    while not cur.at_end():
+        if cur.accept("constraint"):
+            cur.name()
+        elif cur.accept("not", "null"):
+            column["not_null"] = True
+        elif cur.accept("null"):
+            column["not_null"] = False
+        elif cur.accept("default"):
+            if cur.word() == "null":
+                cur.next()
+                column["default"] = "NULL"
+                continue
+            start = cur.pos
+            cur.pos = find_top_level(tokens, COLUMN_CONSTRAINT_WORDS - {"null"} | {"not"}, start + 1)
+            column["default"] = render(tokens[start:cur.pos], sql)
+        elif cur.accept("primary", "key"):
+            column["primary_key"] = True
+            column["not_null"] = True
+        elif cur.accept("unique"):
+            column["unique"] = True
+        elif cur.accept("references"):
+            column["references"] = parse_references(cur)
+        elif cur.accept("check"):
+            column["check"] = cur.text(cur.parens())
+            cur.accept("no", "inherit")
+        elif cur.accept("generated"):
+            start = cur.pos - 1
+            cur.pos = find_top_level(tokens, COLUMN_CONSTRAINT_WORDS, start + 2)
+            column["generated"] = render(tokens[start:cur.pos], sql)
+        elif cur.accept("collate"):
+            cur.name()
+        else:
+            cur.next()
+    return column
+
+def column_constraints(column, table):
+    """Constraints implied by inline column clauses"""
+    constraints = []
+    name = column["name"]
+    if column["primary_key"]:
+        constraints.append({"name": default_constraint_name(table, [], "pkey"), "type": "primary_key",
+                            "columns": [name], "not_valid": False})
+    if column["unique"]:
+        constraints.append({"name": default_constraint_name(table, [name], "key"), "type": "unique",
+                            "columns": [name], "not_valid": False})
+    if column["references"]:
+        constraints.append({"name": default_constraint_name(table, [name], "fkey"), "type": "foreign_key",
+                            "columns": [name], "references": column["references"], "not_valid": False})
+    if column["check"]:
+        constraints.append({"name": default_constraint_name(table, [name], "check"), "type": "check",
+                            "columns": [name], "expr": column["check"], "not_valid": False})
+    return constraints
+
+def table_objects(stmt, table, columns, constraints, action):
+    for column in columns:
+        stmt["objects"].append([f"column:{table}.{column['name']}", action, f"table:{table}"])
+    for constraint in constraints:
+        stmt["objects"].append([f"constraint:{table}.{constraint['name']}", action, f"table:{table}"])
+        if constraint.get("references"):
+            stmt["references"].add("table:" + constraint["references"]["table"])
+
+def parse_create_table(cur, stmt, temporary):
+    stmt["kind"] = "create_table"
+    stmt["if_not_exists"] = cur.accept("if", "not", "exists")
+    table = qualify(cur.name(), "pg_temp" if temporary else "public")
+    stmt["table"] = table
+    columns, constraints = [], []
+    if cur.is_punct("("):
+        for element in split_commas(cur.parens()):
+            if not element:
+                continue
+            if element[0][KIND] == "word" and element[0][VALUE] in TABLE_CONSTRAINT_WORDS:
+                constraints.append(parse_table_constraint(element, cur.sql, table))
+            else:
+                column = parse_column(element, cur.sql, table)
+                columns.append(column)
+                constraints.extend(column_constraints(column, table))
+    stmt["columns"] = columns
+    stmt["constraints"] = constraints
+    stmt["objects"].append([f"table:{table}", "create", None])
+    table_objects(stmt, table, columns, constraints, "create")
+
+def parse_index_element(tokens, sql):
+    """One key of CREATE INDEX: a column or an expression, with ordering"""
+    element = {"expr": None, "column": None, "desc": False, "nulls": None, "opclass": None}
+    end = len(tokens)
+    while end > 0 and tokens[end - 1][KIND] == "word" and tokens[end - 1][VALUE] in ("asc", "desc", "first", "last", "nulls"):
+        end -= 1
+    suffix = [t[VALUE] for t in tokens[end:]]
+    element["desc"] = "desc" in suffix
+    if "nulls" in suffix:
+        element["nulls"] = suffix[suffix.index("nulls") + 1] if suffix.index("nulls") + 1 < len(suffix) else None
+    body = tokens[:end]
+    if len(body) == 2 and body[1][KIND] == "word":  # column opclass (e.g. gin_trgm_ops)
+        element["opclass"] = body[1][VALUE]
+        body = body[:1]
+    if len(body) == 1 and body[0][KIND] in ("word", "ident"):
+        element["column"] = body[0][VALUE]
+        element["expr"] = body[0][VALUE]
+    else:
+        element["expr"] = render(body, sql)
+    return element
+
+def parse_create_index(cur, stmt, unique):
+    stmt["kind"] = "create_index"
+    stmt["unique"] = unique
+    stmt["concurrently"] = cur.accept("concurrently")
+    stmt["if_not_exists"] = cur.accept("if", "not", "exists")
+    name = cur.name() if cur.word() != "on" else ()
+    cur.accept("on")
+    cur.accept("only")
+    table = qualify(cur.name())
+    method = "btree"
+    if cur.accept("using"):
+        method = cur.next()[VALUE]
+    elements = [parse_index_element(el, cur.sql) for el in split_commas(cur.parens()) if el]
+    include = []
+    where = None
+    while not cur.at_end():
+        if cur.accept("include"):
+            include = column_list(cur.parens())
+        elif cur.accept("where"):
+            where = cur.text(cur.rest())
+        elif cur.accept("with"):
+            cur.parens()
+        else:
+            cur.next()
+    if not name:
+        cols = [e["column"] or "expr" for e in elements]
+        name = (default_constraint_name(table, cols, "idx"),)
+    schema = table.split(".", 1)[0]
+    stmt.update({
+        "index": f"{schema}.{name[-1]}",
+        "table": table,
+        "method": method,
+        "keys": elements,
+        "include": include,
+        "where": where
+    })
+    stmt["objects"].append([f"index:{schema}.{name[-1]}", "create", f"table:{table}"])
+    stmt["references"].add(f"table:{table}")
+
+def parse_policy_clauses(cur, stmt):
+    while not cur.at_end():
+        if cur.accept("as"):
+            stmt["permissive"] = cur.next()[VALUE] != "restrictive"
+        elif cur.accept("for"):
+            stmt["command"] = cur.next()[VALUE]
+        elif cur.accept("to"):
+            roles = []
+            while cur.word() is not None or (cur.peek() is not None and cur.peek()[KIND] == "ident"):
+                if cur.word() in ("using", "with"):
+                    break
+                roles.append(cur.next()[VALUE])
+                if not cur.accept_punct(","):
+                    break
+            stmt["roles"] = roles
+        elif cur.accept("using"):
+            stmt["using"] = cur.text(cur.parens())
+        elif cur.accept("with", "check"):
+            stmt["check"] = cur.text(cur.parens())
+        elif cur.accept("rename", "to"):
+            stmt["rename_to"] = cur.name()[0]
+        else:
+            cur.next()
+
+def parse_create_policy(cur, stmt):
+    stmt["kind"] = "create_policy"
+    name = cur.name()[0]
+    cur.accept("on")
+    table = qualify(cur.name())
+    stmt.update({"policy": name, "table": table, "permissive": True, "command": "all",
+                 "roles": ["public"], "using": None, "check": None})
+    parse_policy_clauses(cur, stmt)
+    stmt["objects"].append([f"policy:{table}.{name}", "create", f"table:{table}"])
+    stmt["references"].add(f"table:{table}")
+    for clause in ("using", "check"):
+        if stmt[clause]:
+            stmt["references"] |= scan_references(tokenize(stmt[clause]))
+
+def parse_function_args(tokens, sql):
+    """Argument list -> (args, identity signature types)"""
+    args, signature = [], []
+    for element in split_commas(tokens):
+        if not element:
+            continue
+        end = find_top_level(element, {"default"})
+        for i, token in enumerate(element[:end]):
+            if token[KIND] == "op" and token[VALUE] == "=":
+                end = i
+                break
+        body = element[:end]
+        mode = "in"
+        if body and body[0][KIND] == "word" and body[0][VALUE] in ("in", "out", "inout", "variadic"):
+            mode = body[0][VALUE]
+            body = body[1:]
+        name = None
+        if len(body) >= 2 and body[0][KIND] in ("word", "ident") and body[1][KIND] in ("word", "ident") \
+                and not (body[0][KIND] == "word" and body[0][VALUE] in MULTI_WORD_TYPES):
+            name = body[0][VALUE]
+            body = body[1:]
+        type_text = render(body, sql)
+        args.append({"name": name, "mode": mode, "type": type_text,
+                     "default": render(element[end + 1:], sql) if end < len(element) else None})
+        if mode != "out":
+            signature.append(normalize_type(type_text))
+    return args, signature
+
+def parse_create_function(cur, stmt, kind):
+    stmt["kind"] = "create_function"
+    name = qualify(cur.name())
+    args, signature = parse_function_args(cur.parens(), cur.sql)
+    stmt.update({"function": name, "routine": kind, "args": args, "signature": signature,
+                 "returns": None, "language": None, "security_definer": False,
+                 "volatility": "volatile", "body": None})
+    while not cur.at_end():
+        if cur.accept("returns"):
+            start = cur.pos
+            if cur.accept("table"):
+                cur.parens()
+            else:
+                cur.pos = find_top_level(cur.tokens, {"as", "language", "security", "immutable", "stable",
+                                                      "volatile", "strict", "set", "cost", "parallel",
+                                                      "called", "returns", "begin", "leakproof"}, start + 1)
+            stmt["returns"] = cur.text(cur.tokens[start:cur.pos])
+        elif cur.accept("language"):
+            stmt["language"] = cur.next()[VALUE].strip("'").lower()
+        elif cur.accept("security", "definer"):
+            stmt["security_definer"] = True
+        elif cur.accept("security", "invoker"):
+            stmt["security_definer"] = False
+        elif cur.word() in ("immutable", "stable", "volatile"):
+            stmt["volatility"] = cur.next()[VALUE]
+        elif cur.accept("as"):
+            token = cur.next()
+            if token is not None and token[KIND] == "dollar":
+                stmt["body"] = dollar_body(token)
+                stmt["body_offset"] = token[START] + token[VALUE].index("$", 1) + 1
+            elif token is not None and token[KIND] == "string":
+                stmt["body"] = token[VALUE][1:-1].replace("''", "'")
+        else:
+            cur.next()
+    key = f"function:{name}({','.join(signature)})"
+    stmt["objects"].append([key, "replace" if stmt.get("or_replace") else "create", None])
+    if stmt["body"]:
+        stmt["references"] |= scan_references(tokenize(stmt["body"]))
+
+def dollar_body(token):
+    """Content of a $tag$...$tag$ token"""
+    value = token[VALUE]
+    tag_end = value.index("$", 1) + 1
+    return value[tag_end:len(value) - tag_end]
+
+def parse_create_trigger(cur, stmt):
+    stmt["kind"] = "create_trigger"
+    name = cur.name()[0]
+    on = find_top_level(cur.tokens, {"on"}, cur.pos)
+    stmt["timing"] = " ".join(t[VALUE] for t in cur.tokens[cur.pos:on] if t[KIND] == "word")
+    cur.pos = on + 1
+    table = qualify(cur.name())
+    function = None
+    while not cur.at_end():
+        if cur.accept("execute"):
+            cur.next()  # FUNCTION / PROCEDURE
+            function = qualify(cur.name())
+            cur.parens()
+        else:
+            cur.next()
+    stmt.update({"trigger": name, "table": table, "function": function})
+    stmt["objects"].append([f"trigger:{table}.{name}", "replace" if stmt.get("or_replace") else "create",
+                            f"table:{table}"])
+    stmt["references"].add(f"table:{table}")
+    if function:
+        stmt["references"].add(f"function:{function}")
+
+def parse_create_view(cur, stmt, materialized):
+    stmt["kind"] = "create_view"
+    stmt["materialized"] = materialized
+    stmt["if_not_exists"] = cur.accept("if", "not", "exists")
+    name = qualify(cur.name())
+    stmt["view"] = name
+    stmt["objects"].append([f"view:{name}", "replace" if stmt.get("or_replace") else "create", None])
+    stmt["references"] |= scan_references(cur.rest())
+
+def parse_create(cur, stmt):
+    cur.accept("create")
+    stmt["or_replace"] = cur.accept("or", "replace")
+    unique = temporary = materialized = False
+    while True:
+        if cur.accept("unique"):
+            unique = True
+        elif cur.word() in ("temp", "temporary"):
+            cur.next()
+            temporary = True
+        elif cur.word() in ("unlogged", "global", "local", "constraint", "trusted", "procedural", "recursive"):
+            cur.next()
+        elif cur.accept("materialized"):
+            materialized = True
+        else:
+            break
+
+    what = cur.word()
+    cur.next()
+    if what == "table":
+        parse_create_table(cur, stmt, temporary)
+    elif what == "index":
+        parse_create_index(cur, stmt, unique)
+    elif what == "policy":
+        parse_create_policy(cur, stmt)
+    elif what in ("function", "procedure"):
+        parse_create_function(cur, stmt, what)
+    elif what == "trigger":
+        parse_create_trigger(cur, stmt)
+    elif what == "view":
+        parse_create_view(cur, stmt, materialized)
+    elif what in ("type", "sequence", "domain", "extension", "schema"):
+        stmt["kind"] = f"create_{what}"
+        stmt["if_not_exists"] = cur.accept("if", "not", "exists")
+        parts = cur.name()
+        key = parts[-1] if what in ("extension", "schema") else qualify(parts)
+        stmt["objects"].append([f"{what}:{key}", "create", None])
+    else:
+        stmt["kind"] = f"create_{what or 'other'}"
+
+def parse_alter_table(cur, stmt):
+    stmt["kind"] = "alter_table"
+    stmt["if_exists"] = cur.accept("if", "exists")
+    cur.accept("only")
+    table = qualify(cur.name())
+    stmt["table"] = table
+    tkey = f"table:{table}"
+    stmt["references"].add(tkey)
+    actions = []
+
+    for element in split_commas(cur.rest()):
+        sub = TokenCursor(element, cur.sql)
+        action = {"action": "other", "sql": render(element, cur.sql)}
+        if sub.accept("add"):
+            if sub.word() in TABLE_CONSTRAINT_WORDS - {"like"}:
+                constraint = parse_table_constraint(sub.rest(), cur.sql, table)
+                action.update(action="add_constraint", constraint=constraint)
+                table_objects(stmt, table, [], [constraint], "create")
+            else:
+                sub.accept("column")
+                action["if_not_exists"] = sub.accept("if", "not", "exists")
+                column = parse_column(sub.rest(), cur.sql, table)
+                action.update(action="add_column", column=column)
+                table_objects(stmt, table, [column], column_constraints(column, table), "create")
+        elif sub.accept("drop", "constraint"):
+            action["if_exists"] = sub.accept("if", "exists")
+            name = sub.name()[0]
+            action.update(action="drop_constraint", name=name)
+            stmt["objects"].append([f"constraint:{table}.{name}", "drop", tkey])
+        elif sub.accept("drop"):
+            sub.accept("column")
+            action["if_exists"] = sub.accept("if", "exists")
+            name = sub.name()[0]
+            action.update(action="drop_column", name=name)
+            stmt["objects"].append([f"column:{table}.{name}", "drop", tkey])
+        elif sub.accept("alter"):
+            sub.accept("column")
+            name = sub.name()[0]
+            action["column"] = name
+            if sub.accept("set", "data", "type") or sub.accept("type"):
+                end = find_top_level(element, {"using", "collate"}, sub.pos)
+                action.update(action="alter_column_type", type=render(element[sub.pos:end], cur.sql))
+                if end < len(element) and element[end][VALUE] == "using":
+                    action["using"] = render(element[end + 1:], cur.sql)
+            elif sub.accept("set", "default"):
+                action.update(action="set_default", default=sub.text(sub.rest()))
+            elif sub.accept("drop", "default"):
+                action["action"] = "drop_default"
+            elif sub.accept("set", "not", "null"):
+                action["action"] = "set_not_null"
+            elif sub.accept("drop", "not", "null"):
+                action["action"] = "drop_not_null"
+            else:
+                action["action"] = "alter_column"
+            stmt["objects"].append([f"column:{table}.{name}", "alter", tkey])
+        elif sub.word() in ("enable", "disable", "force", "no") and "security" in [t[VALUE] for t in element]:
+            words = [t[VALUE] for t in element]
+            if "force" in words:
+                action.update(action="rls_force", force=words[0] != "no")
+            else:
+                action.update(action="rls", enabled=words[0] == "enable")
+            stmt["objects"].append([f"rls:{table}", "set", tkey])
+        elif sub.accept("rename", "column") or (sub.word() == "rename" and sub.word(1) not in ("to", "constraint")
+                                                and sub.accept("rename")):
+            old = sub.name()[0]
+            sub.accept("to")
+            new = sub.name()[0]
+            action.update(action="rename_column", name=old, to=new)
+            stmt["objects"].append([f"column:{table}.{old}", "drop", tkey])
+            stmt["objects"].append([f"column:{table}.{new}", "create", tkey])
+        elif sub.accept("rename", "to"):
+            new = qualify((table.split(".", 1)[0], sub.name()[0]))
+            action.update(action="rename_table", to=new)
+            stmt["objects"].append([tkey, "drop", None])
+            stmt["objects"].append([f"table:{new}", "create", None])
+        elif sub.accept("validate", "constraint"):
+            action.update(action="validate_constraint", name=sub.name()[0])
+        actions.append(action)
+
+    stmt["actions"] = actions
+    stmt["objects"].insert(0, [tkey, "alter", None])
+
+def parse_alter(cur, stmt):
+    cur.accept("alter")
+    what = cur.word()
+    cur.next()
+    if what == "table":
+        parse_alter_table(cur, stmt)
+    elif what == "policy":
+        stmt["kind"] = "alter_policy"
+        name = cur.name()[0]
+        cur.accept("on")
+        table = qualify(cur.name())
+        stmt.update({"policy": name, "table": table})
+        parse_policy_clauses(cur, stmt)
+        stmt["objects"].append([f"policy:{table}.{name}", "alter", f"table:{table}"])
+        if stmt.get("rename_to"):
+            stmt["objects"].append([f"policy:{table}.{name}", "drop", f"table:{table}"])
+            stmt["objects"].append([f"policy:{table}.{stmt['rename_to']}", "create", f"table:{table}"])
+    elif what in ("function", "procedure"):
+        stmt["kind"] = "alter_function"
+        name = qualify(cur.name())
+        _, signature = parse_function_args(cur.parens(), cur.sql)
+        stmt["objects"].append([f"function:{name}({','.join(signature)})", "alter", None])
+    else:
+        stmt["kind"] = f"alter_{what or 'other'}"
+        if what in ("index", "view", "type", "sequence"):
+            cur.accept("if", "exists")
+            stmt["objects"].append([f"{what}:{qualify(cur.name())}", "alter", None])
+        stmt["references"] |= scan_references(cur.rest())
+
+def parse_drop(cur, stmt):
+    cur.accept("drop")
+    materialized = cur.accept("materialized")
+    what = cur.word()
+    cur.next()
+    stmt["kind"] = "drop"
+    stmt["object_type"] = "view" if materialized else what
+    stmt["concurrently"] = cur.accept("concurrently")
+    stmt["if_exists"] = cur.accept("if", "exists")
+    stmt["cascade"] = any(t[KIND] == "word" and t[VALUE] == "cascade" for t in cur.tokens)
+    names = []
+
+    if what in ("policy", "trigger", "rule"):
+        name = cur.name()[0]
+        cur.accept("on")
+        table = qualify(cur.name())
+        names.append(f"{table}.{name}")
+        stmt["table"] = table
+        stmt["objects"].append([f"{what}:{table}.{name}", "drop", f"table:{table}"])
+    elif what in ("function", "procedure"):
+        for element in split_commas(cur.rest()):
+            sub = TokenCursor(element, cur.sql)
+            name = qualify(sub.name())
+            if sub.is_punct("("):
+                _, signature = parse_function_args(sub.parens(), cur.sql)
+                key = f"function:{name}({','.join(signature)})"
+            else:
+                key = f"function:{name}"  # every overload
+            names.append(key.split(":", 1)[1])
+            stmt["objects"].append([key, "drop", None])
+    else:
+        for element in split_commas(cur.rest()):
+            sub = TokenCursor(element, cur.sql)
+            parts = sub.name()
+            if not parts or parts[0] in ("cascade", "restrict"):
+                continue
+            name = parts[-1] if what in ("extension", "schema") else qualify(parts)
+            names.append(name)
+            stmt["objects"].append([f"{stmt['object_type']}:{name}", "drop", None])
+    stmt["names"] = names
+
+COMMENT_TARGETS = {"table", "column", "index", "function", "policy", "trigger", "view", "type",
+                   "schema", "constraint", "extension", "sequence", "procedure", "materialized"}
+
+def parse_comment(cur, stmt):
+    stmt["kind"] = "comment"
+    cur.accept("comment", "on")
+    what = cur.word()
+    cur.next()
+    if what == "materialized":
+        cur.next()
+        what = "view"
+    if what not in COMMENT_TARGETS:
+        return
+    parts = cur.name()
+    if what in ("policy", "trigger", "constraint"):
+        cur.accept("on")
+        key = f"{what}:{qualify(cur.name())}.{parts[0]}"
+    elif what == "column":
+        key = f"column:{qualify(parts[:-1])}.{parts[-1]}"
+    elif what in ("function", "procedure"):
+        _, signature = parse_function_args(cur.parens(), cur.sql)
+        key = f"function:{qualify(parts)}({','.join(signature)})"
+    elif what in ("schema", "extension"):
+        key = f"{what}:{parts[-1]}"
+    else:
+        key = f"{what}:{qualify(parts)}"
+    stmt["objects"].append([key, "comment", None])
+    if cur.accept("is"):
+        token = cur.next()
+        stmt["comment"] = None if token is None or token[VALUE] == "null" else token[VALUE][1:-1].replace("''", "'")
+
+def parse_grant(cur, stmt):
+    stmt["kind"] = "grant"
+    on = find_top_level(cur.tokens, {"on"})
+    cur.pos = on + 1
+    what = cur.word()
+    if what in ("function", "procedure", "table", "sequence", "schema", "all"):
+        cur.next()
+    if what == "all":  # ALL TABLES IN SCHEMA x
+        return
+    target = cur.name()
+    if not target:
+        return
+    if what in ("function", "procedure"):
+        _, signature = parse_function_args(cur.parens(), cur.sql)
+        stmt["objects"].append([f"function:{qualify(target)}({','.join(signature)})", "grant", None])
+    elif what == "schema":
+        stmt["objects"].append([f"schema:{target[-1]}", "grant", None])
+    else:
+        stmt["objects"].append([f"table:{qualify(target)}", "grant", None])
+
+def parse_dml(cur, stmt):
+    stmt["kind"] = "dml"
+    refs = scan_references(cur.tokens)
+    stmt["references"] |= refs
+    verb = cur.word()
+    target = {"insert": "into", "update": "update", "delete": "from", "truncate": "truncate"}.get(verb)
+    if target:
+        i = find_top_level(cur.tokens, {target})
+        if i < len(cur.tokens):
+            cur.pos = i + 1
+            cur.accept("table")
+            cur.accept("only")
+            parts = cur.name()
+            if parts:
+                stmt["objects"].append([f"table:{qualify(parts)}", "data", None])
+
+def parse_statement(tokens, sql):
+    """Parse one statement into a JSON-serialisable dict"""
+    cur = TokenCursor(tokens, sql)
+    stmt = {"kind": "other", "objects": [], "references": set()}
+    verb = cur.word()
+    try:
+        if verb == "create":
+            parse_create(cur, stmt)
+        elif verb == "alter":
+            parse_alter(cur, stmt)
+        elif verb == "drop":
+            parse_drop(cur, stmt)
+        elif verb == "comment":
+            parse_comment(cur, stmt)
+        elif verb in ("grant", "revoke"):
+            parse_grant(cur, stmt)
+        elif verb in ("insert", "update", "delete", "truncate", "copy", "merge"):
+            parse_dml(cur, stmt)
+        elif verb in ("select", "with", "values"):
+            stmt["kind"] = "query"
+            stmt["references"] |= scan_references(tokens)
+        elif verb in ("begin", "commit", "rollback", "start", "end", "savepoint"):
+            stmt["kind"] = "transaction"
+        elif verb in ("set", "reset"):
+            stmt["kind"] = "set"
+        elif verb == "do":
+            stmt["kind"] = "do"
+    except (IndexError, TypeError, AttributeError, ValueError):
+        # Unusual syntax: keep what was extracted, never fail the analysis
+        stmt["parse_error"] = True
+    return stmt
+
+def parse_sql(sql, line_offset=0, nested=False):
+    """Parse every statement of a SQL text (recursing into DO blocks)"""
+    tokens = tokenize(sql)
+    newlines = [m.start() for m in re.finditer("\n", sql)]
+    statements = []
+
+    for stmt_tokens in split_statements(tokens):
+        if nested:
+            # plpgsql: skip control flow (IF ... THEN, ELSE, BEGIN) up to the SQL verb
+            i = find_top_level(stmt_tokens, NESTED_VERBS)
+            if i == len(stmt_tokens):
+                continue
+            stmt_tokens = stmt_tokens[i:]
+            if stmt_tokens[0][VALUE] == "execute":
+                # EXECUTE 'literal sql' is parsed; format()/concatenation cannot be
+                if len(stmt_tokens) == 2 and stmt_tokens[1][KIND] == "string":
+                    literal = stmt_tokens[1]
+                    inner = literal[VALUE][1:-1].replace("''", "'")
+                    line = bisect.bisect_left(newlines, literal[START]) + line_offset
+                    for inner_stmt in parse_sql(inner, line, nested=False):
+                        inner_stmt["in_do"] = True
+                        statements.append(inner_stmt)
+                continue
+
+        start, end = stmt_tokens[0][START], stmt_tokens[-1][END]
+        stmt = parse_statement(stmt_tokens, sql)
+        stmt["line"] = bisect.bisect_left(newlines, start) + 1 + line_offset
+        stmt["sql"] = sql[start:end]
+        if nested:
+            stmt["in_do"] = True
+        stmt["references"] = sorted(stmt["references"])
+        statements.append(stmt)
+
+        if stmt["kind"] == "do":
+            for token in stmt_tokens:
+                if token[KIND] == "dollar":
+                    body_line = bisect.bisect_left(newlines, token[START]) + line_offset
+                    statements.extend(parse_sql(dollar_body(token), body_line, nested=True))
+                    break
+
+    return statements
+
+def parse_migration_text(text):
+    """Parse one migration (cacheable: depends only on the file content)"""
+    statements = parse_sql(text)
+    objects = {}
+    references = set()
+    for stmt in statements:
+        for key, action, parent in stmt["objects"]:
+            entry = objects.setdefault(key, {"actions": [], "parent": parent})
+            if action not in entry["actions"]:
+                entry["actions"].append(action)
+        references.update(stmt["references"])
+    return {
+        "parser_version": PARSER_VERSION,
+        "sha256": hashlib.sha256(text.encode("utf-8")).hexdigest(),
+        "normalized_hash": normalized_hash(tokenize(text)),
+        "statements": statements,
+        "objects": objects,
+        "references": sorted(references)
+    }
+
+# ============================================
+# CORPUS LOADING (parallel + cached)
+# ============================================
+
+def load_cache(path=CACHE_PATH):
+    try:
+        with open(path) as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if cache.get("parser_version") != PARSER_VERSION:
+        return {}
+    return cache.get("entries", {})
+
+def save_cache(entries, path=CACHE_PATH):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w") as f:
+        json.dump({"parser_version": PARSER_VERSION, "entries": entries}, f)
+    os.replace(tmp, path)
+
+def parse_files(paths, jobs=None, use_cache=True, stats=None):
+    """Parse SQL files in parallel, cached by content hash (identical files are parsed once)"""
+    texts = [Path(p).read_text(encoding="utf-8", errors="replace") for p in paths]
+    digests = [hashlib.sha256(t.encode("utf-8")).hexdigest() for t in texts]
+
+    cache = load_cache() if use_cache else {}
+    missing = {}
+    for text, digest in zip(texts, digests):
+        if digest not in cache:
+            missing.setdefault(digest, text)
+
+    start = time.perf_counter()
+    if len(missing) >= PARALLEL_THRESHOLD and jobs != 1:
+        with ProcessPoolExecutor(max_workers=jobs) as pool:
+            parsed = list(pool.map(parse_migration_text, missing.values(), chunksize=2))
+    else:
+        parsed = [parse_migration_text(text) for text in missing.values()]
+    cache.update(zip(missing, parsed))
+
+    if use_cache and missing:
+        save_cache(cache)
+    if stats is not None:
+        stats.update(files=len(paths), parsed=len(missing), cached=len(paths) - len(missing),
+                     seconds=time.perf_counter() - start)
+    return [dict(cache[digest]) for digest in digests]
+
+def load_migrations(directory=None, jobs=None, use_cache=True, stats=None):
+    """Parse every .sql migration (in apply order), in parallel, cached by content hash"""
+    directory = Path(directory or MIGRATIONS_DIR)
+    files = sorted(directory.glob("*.sql"), key=lambda p: p.name)
+    migrations = []
+    for path, migration in zip(files, parse_files(files, jobs, use_cache, stats)):
+        migration["file"] = path.name
+        migration["version"] = parse_migration_filename(path.name)
+        migrations.append(migration)
+    return migrations
+
+# ============================================
+# CONTENT ANALYSIS
+# ============================================
+
+# Actions that fully redefine an object for everything applied before
+OVERRIDING_ACTIONS = {"replace", "drop"}
+
+def build_dependency_graph(migrations):
+    """Edges file -> files it depends on, plus forward references
+
+    A migration depends on the latest earlier migration that created an
+    object it alters, drops, comments, references or builds on (parent
+    table). References to objects only created by a *later* migration are
+    reported as forward dependencies (wrong order, or guarded by IF EXISTS).
+    """
+    creators = {}
+    first_creator = {}
+    for index, migration in enumerate(migrations):
+        for key, entry in migration["objects"].items():
+            if "create" in entry["actions"] or "replace" in entry["actions"]:
+                first_creator.setdefault(base_key(key), index)
+
+    depends_on = defaultdict(set)
+    forward = []
+    for index, migration in enumerate(migrations):
+        needed = set()
+        for key, entry in migration["objects"].items():
+            if entry["actions"] != ["create"] and entry["actions"] != ["replace"]:
+                needed.add(base_key(key))
+            if entry["parent"]:
+                needed.add(entry["parent"])
+        needed.update(base_key(ref) for ref in migration["references"])
+
+        for key in sorted(needed):
+            creator = creators.get(key)
+            if creator is not None and creator != index:
+                depends_on[index].add(creator)
+            elif creator is None and first_creator.get(key, -1) > index:
+                forward.append((migration["file"], key, migrations[first_creator[key]]["file"]))
+
+        for key, entry in migration["objects"].items():
+            if "create" in entry["actions"] or "replace" in entry["actions"]:
+                creators[base_key(key)] = index
+            elif "drop" in entry["actions"]:
+                creators.pop(base_key(key), None)
+
+    return depends_on, forward
+
+def find_superseded(migrations):
+    """Migrations whose every effect is redefined or dropped by later ones
+
+    Creating a table/column, a data change or a grant is only superseded
+    by dropping the object (or its table) later; functions, policies, views
+    and triggers also by being replaced; comments and RLS flags by being
+    set again.
+    """
+    later_actions = defaultdict(list)  # key -> [(index, action)]
+    for index, migration in enumerate(migrations):
+        for key, entry in migration["objects"].items():
+            for action in entry["actions"]:
+                later_actions[key].append((index, action))
+
+    def overridden_by(key, action, index):
+        """First later migration making this effect irrelevant, or None"""
+        kind = object_type(key)
+        for other, other_action in later_actions.get(key, ()):
+            if other <= index:
+                continue
+            if other_action == "drop":
+                return other
+            if other_action == "replace" and kind not in ("table", "column"):
+                return other
+            if other_action == action and action in ("comment", "set"):
+                return other
+            if action == "drop" and other_action in ("create", "replace"):
+                return other
+        return None
+
+    superseded = []
+    for index, migration in enumerate(migrations):
+        if not migration["objects"]:
+            continue
+        by = set()
+        for key, entry in migration["objects"].items():
+            for action in entry["actions"]:
+                if action == "alter" and object_type(key) == "table":
+                    continue  # the column/constraint changes are checked themselves
+                other = overridden_by(key, action, index)
+                if other is None and object_type(key) == "function" and "(" in key:
+                    other = overridden_by(base_key(key), action, index)  # DROP FUNCTION f (all overloads)
+                if other is None and entry["parent"]:
+                    other = overridden_by(entry["parent"], "create", index)  # table dropped
+                if other is None:
+                    by = None
+                    break
+                by.add(other)
+            if by is None:
+                break
+        if by:
+            superseded.append((migration["file"], sorted(migrations[i]["file"] for i in by)))
+    return superseded
+
+def find_overlaps(migrations, threshold=0.5):
+    """Pairs (earlier, later) where the later migration touches again most objects of the earlier"""
+    touched_by = defaultdict(list)
+    for index, migration in enumerate(migrations):
+        for key, entry in migration["objects"].items():
+            if set(entry["actions"]) - {"grant", "comment"}:
+                touched_by[key].append(index)
+
+    shared = defaultdict(int)
+    sizes = defaultdict(int)
+    for key, indexes in touched_by.items():
+        for i in indexes:
+            sizes[i] += 1
+        for a in range(len(indexes)):
+            for b in range(a + 1, len(indexes)):
+                shared[(indexes[a], indexes[b])] += 1
+
+    overlaps = []
+    for (a, b), count in shared.items():
+        ratio = count / sizes[a]
+        if ratio >= threshold and count >= 2:
+            overlaps.append((migrations[a]["file"], migrations[b]["file"], ratio, count))
+    overlaps.sort(key=lambda o: (-o[2], -o[3], o[0]))
+    return overlaps
+
+def find_identical(migrations):
+    """Groups of migrations with the same normalized content hash"""
+    groups = defaultdict(list)
+    for migration in migrations:
+        groups[migration["normalized_hash"]].append(migration["file"])
+    return [files for files in groups.values() if len(files) > 1]
+
+def analyze_content(migrations):
+    depends_on, forward = build_dependency_graph(migrations)
+    return {
+        "identical": find_identical(migrations),
+        "superseded": find_superseded(migrations),
+        "overlaps": find_overlaps(migrations),
+        "forward": forward,
+        "depends_on": {migrations[i]["file"]: sorted(migrations[d]["file"] for d in deps)
+                       for i, deps in depends_on.items()}
+    }
+
+def write_dot(migrations, depends_on, path):
+    """Graphviz view of the migration dependency DAG"""
+    with open(path, "w") as f:
+        f.write("digraph migrations {\n  rankdir=LR;\n  node [shape=box, fontsize=10];\n")
+        for migration in migrations:
+            f.write(f'  "{migration["file"]}";\n')
+        for file, deps in sorted(depends_on.items()):
+            for dep in deps:
+                f.write(f'  "{dep}" -> "{file}";\n')
+        f.write("}\n")
+
+def print_analysis(migrations, analysis, stats):
+    statements = sum(len(m["statements"]) for m in migrations)
+    objects = {key for m in migrations for key in m["objects"]}
+    print(f"📊 {len(migrations)} migrations, {statements} statements, {len(objects)} distinct objects")
+    print(f"⚡ {stats['parsed']} parsed, {stats['cached']} from cache ({stats['seconds']:.2f}s)\n")
+
+    by_type = defaultdict(int)
+    for key in objects:
+        by_type[object_type(key)] += 1
+    print("🧱 Objects: " + ", ".join(count_label(n, t) for t, n in sorted(by_type.items(), key=lambda x: -x[1])))
+    print()
+
+    if analysis["identical"]:
+        print(f"🔁 Identical content ({len(analysis['identical'])} groups):")
+        for files in analysis["identical"]:
+            print(f"  - {', '.join(files)}")
+        print()
+
+    if analysis["superseded"]:
+        print(f"🪦 Superseded migrations ({len(analysis['superseded'])}): every object redefined later")
+        for file, by in analysis["superseded"]:
+            print(f"  - {file} → {', '.join(by)}")
+        print()
+
+    if analysis["overlaps"]:
+        print(f"🧩 Overlapping migrations ({len(analysis['overlaps'])}): later file touches again ≥50% of the objects")
+        for earlier, later, ratio, count in analysis["overlaps"][:30]:
+            print(f"  - {earlier} → {later}: {ratio:.0%} ({count} objects)")
+        if len(analysis["overlaps"]) > 30:
+            print(f"  ... {len(analysis['overlaps']) - 30} more (see --json)")
+        print()
+
+    if analysis["forward"]:
+        print(f"⚠️  Forward dependencies ({len(analysis['forward'])}): object created by a later migration")
+        for file, key, creator in analysis["forward"][:30]:
+            print(f"  - {file}: {key} (created in {creator})")
+        print()
+
+    edges = sum(len(d) for d in analysis["depends_on"].values())
+    roots = [m["file"] for m in migrations if m["file"] not in analysis["depends_on"]]
+    print(f"🕸️  Dependency DAG: {edges} edges, {len(roots)} migrations without dependencies")
+
+def analysis_to_json(migrations, analysis):
+    return {
+        "migrations": [{
+            "file": m["file"],
+            "version": m["version"],
+            "sha256": m["sha256"],
+            "normalized_hash": m["normalized_hash"],
+            "objects": m["objects"],
+            "references": m["references"],
+            "depends_on": analysis["depends_on"].get(m["file"], [])
+        } for m in migrations],
+        "identical": analysis["identical"],
+        "superseded": [{"file": f, "superseded_by": by} for f, by in analysis["superseded"]],
+        "overlaps": [{"file": a, "later": b, "ratio": round(r, 3), "objects": n}
+                     for a, b, r, n in analysis["overlaps"]],
+        "forward_dependencies": [{"file": f, "object": k, "created_in": c} for f, k, c in analysis["forward"]],
+        "indexes": analysis.get("indexes"),
+        "lint": analysis.get("lint")
+    }
+
+# ============================================
+# SQUASH / BASELINE
+# ============================================
+
+QUOTE_FREE_IDENT = re.compile(r"^[a-z_][a-z0-9_$]*$")
+RESERVED_IDENTS = {
+    "all", "analyse", "analyze", "and", "any", "array", "as", "asc", "both", "case", "cast", "check",
+    "collate", "column", "constraint", "create", "default", "desc", "distinct", "do", "else", "end",
+    "except", "false", "for", "foreign", "from", "grant", "group", "having", "in", "into", "leading",
+    "limit", "not", "null", "offset", "on", "only", "or", "order", "primary", "references", "select",
+    "table", "then", "to", "true", "union", "unique", "user", "using", "when", "where", "window", "with"
+}
+
+def quote_ident(name):
+    if QUOTE_FREE_IDENT.match(name) and name not in RESERVED_IDENTS:
+        return name
+    return '"' + name.replace('"', '""') + '"'
+
+def quote_qualified(name):
+    schema, _, rest = name.partition(".")
+    return f"{quote_ident(schema)}.{quote_ident(rest)}"
+
+def new_schema_model():
+    """Empty in-memory schema: what a fresh database looks like after replay"""
+    return {
+        "extensions": {}, "schemas": {}, "types": {}, "sequences": {}, "tables": {},
+        "indexes": {}, "functions": {}, "views": {}, "triggers": {}, "policies": {},
+        "comments": {}, "grants": [], "publications": [], "data": [], "warnings": []
+    }
+
+def _index_uses_column(index, column):
+    pattern = re.compile(r"\b" + re.escape(column) + r"\b")
+    return any(key["column"] == column or (key["column"] is None and pattern.search(key["expr"]))
+               for key in index["keys"]) or (index["where"] and pattern.search(index["where"]))
+
+def _drop_table(model, table):
+    model["tables"].pop(table, None)
+    for bucket in ("indexes",):
+        for key in [k for k, v in model[bucket].items() if v["table"] == table]:
+            del model[bucket][key]
+    for bucket in ("policies", "triggers"):
+        for key in [k for k in model[bucket] if k[0] == table]:
+            del model[bucket][key]
+    for other in model["tables"].values():
+        for name in [n for n, c in other["constraints"].items()
+                     if c.get("references") and c["references"]["table"] == table]:
+            del other["constraints"][name]
+    prefix = f"column:{table}."
+    for key in [k for k in model["comments"] if k == f"table:{table}" or k.startswith(prefix)]:
+        del model["comments"][key]
+
+def _table_or_skip(model, stmt, table, file):
+    """The table model, or None (with a warning unless the statement was guarded)"""
+    found = model["tables"].get(table)
+    if found is None and not stmt.get("in_do") and not stmt.get("if_exists") \
+            and not table.startswith(("auth.", "storage.", "pg_temp.")):
+        model["warnings"].append(f"{file}:{stmt['line']}: {stmt['kind']} on missing table {table}, skipped")
+    return found
+
+def _store_column(column):
+    return {k: column[k] for k in ("name", "type", "not_null", "default", "generated")}
+
+def squash_create_table(model, stmt, file):
+    table = stmt["table"]
+    if table in model["tables"]:
+        if stmt["if_not_exists"]:
+            return
+        model["warnings"].append(f"{file}:{stmt['line']}: table {table} created twice, keeping the later one")
+    model["tables"][table] = {
+        "columns": {c["name"]: _store_column(c) for c in stmt["columns"]},
+        "constraints": {c["name"]: json.loads(json.dumps(c)) for c in stmt["constraints"]},
+        "rls": False, "force_rls": False, "extra": []
+    }
+
+def squash_alter_table(model, stmt, file):
+    table = stmt["table"]
+    model_table = _table_or_skip(model, stmt, table, file)
+    if model_table is None:
+        return
+    columns, constraints = model_table["columns"], model_table["constraints"]
+
+    for action in stmt["actions"]:
+        kind = action["action"]
+        if kind == "add_column":
+            column = action["column"]
+            if column["name"] in columns:
+                if not action["if_not_exists"] and not stmt.get("in_do"):
+                    model["warnings"].append(f"{file}:{stmt['line']}: column {table}.{column['name']} added twice")
+                continue
+            columns[column["name"]] = _store_column(column)
+            for constraint in column_constraints(column, table):
+                constraints[constraint["name"]] = constraint
+        elif kind == "drop_column":
+            name = action["name"]
+            columns.pop(name, None)
+            for cname in [n for n, c in constraints.items() if name in c.get("columns", [])]:
+                del constraints[cname]
+            for key in [k for k, v in model["indexes"].items() if v["table"] == table and _index_uses_column(v, name)]:
+                del model["indexes"][key]
+            model["comments"].pop(f"column:{table}.{name}", None)
+        elif kind in ("alter_column_type", "set_default", "drop_default", "set_not_null", "drop_not_null"):
+            column = columns.get(action["column"])
+            if column is None:
+                model["warnings"].append(f"{file}:{stmt['line']}: {kind} on missing column {table}.{action['column']}")
+                continue
+            if kind == "alter_column_type":
+                column["type"] = action["type"]
+            elif kind == "set_default":
+                column["default"] = action["default"]
+            elif kind == "drop_default":
+                column["default"] = None
+            else:
+                column["not_null"] = kind == "set_not_null"
+        elif kind == "add_constraint":
+            constraint = action["constraint"]
+            if constraint["name"] in constraints and not stmt.get("in_do"):
+                model["warnings"].append(f"{file}:{stmt['line']}: constraint {constraint['name']} added twice")
+            constraints[constraint["name"]] = json.loads(json.dumps(constraint))
+        elif kind == "drop_constraint":
+            constraints.pop(action["name"], None)
+        elif kind == "validate_constraint":
+            if action["name"] in constraints:
+                constraints[action["name"]]["not_valid"] = False
+        elif kind == "rls":
+            model_table["rls"] = action["enabled"]
+        elif kind == "rls_force":
+            model_table["force_rls"] = action["force"]
+        elif kind == "rename_column":
+            old, new = action["name"], action["to"]
+            if old in columns:
+                columns[new] = dict(columns.pop(old), name=new)
+            for constraint in constraints.values():
+                constraint["columns"] = [new if c == old else c for c in constraint.get("columns", [])]
+            for index in model["indexes"].values():
+                if index["table"] == table:
+                    for key in index["keys"]:
+                        if key["column"] == old:
+                            key["column"] = key["expr"] = new
+        elif kind == "rename_table":
+            new = action["to"]
+            model["tables"][new] = model["tables"].pop(table)
+            for index in model["indexes"].values():
+                if index["table"] == table:
+                    index["table"] = new
+            for bucket in ("policies", "triggers"):
+                for key in [k for k in model[bucket] if k[0] == table]:
+                    model[bucket][(new, key[1])] = model[bucket].pop(key)
+            table = new
+        else:
+            model_table["extra"].append(action["sql"])
+
+def squash_create_index(model, stmt, file):
+    table = _table_or_skip(model, stmt, stmt["table"], file)
+    if table is None:
+        return
+    if stmt["index"] in model["indexes"] and stmt["if_not_exists"]:
+        return
+    # Production may have diverged from the chain: never emit an index on an unknown column
+    missing = [k["column"] for k in stmt["keys"] + [{"column": c} for c in stmt["include"]]
+               if k["column"] and k["column"] not in table["columns"]]
+    if missing:
+        model["warnings"].append(f"{file}:{stmt['line']}: index {stmt['index']} on unknown column(s) "
+                                 f"{', '.join(missing)} of {stmt['table']}, skipped")
+        return
+    model["indexes"][stmt["index"]] = dict(json.loads(json.dumps(stmt)), file=file)
+
+def squash_create_policy(model, stmt, file):
+    if _table_or_skip(model, stmt, stmt["table"], file) is None:
+        return
+    key = (stmt["table"], stmt["policy"])
+    if key in model["policies"] and not stmt.get("in_do"):
+        model["warnings"].append(f"{file}:{stmt['line']}: policy {stmt['policy']!r} on {stmt['table']} created twice")
+    model["policies"][key] = {k: stmt[k] for k in ("policy", "table", "permissive", "command", "roles", "using", "check")}
+
+def squash_alter_policy(model, stmt, file):
+    key = (stmt["table"], stmt["policy"])
+    policy = model["policies"].get(key)
+    if policy is None:
+        model["warnings"].append(f"{file}:{stmt['line']}: ALTER POLICY on missing policy {stmt['policy']!r}")
+        return
+    for field in ("roles", "using", "check"):
+        if field in stmt and stmt[field] is not None:
+            policy[field] = stmt[field]
+    if stmt.get("rename_to"):
+        policy["policy"] = stmt["rename_to"]
+        model["policies"][(stmt["table"], stmt["rename_to"])] = model["policies"].pop(key)
+
+def squash_create_function(model, stmt, file):
+    key = stmt["objects"][0][0]
+    model["functions"][key] = {"sql": stmt["sql"], "language": stmt["language"], "returns": stmt["returns"],
+                               "args": stmt["args"], "alters": []}
+
+def squash_alter_function(model, stmt, file):
+    function = model["functions"].get(stmt["objects"][0][0])
+    if function is not None:
+        function["alters"].append(stmt["sql"])
+
+def squash_create_trigger(model, stmt, file):
+    if _table_or_skip(model, stmt, stmt["table"], file) is None:
+        return
+    model["triggers"][(stmt["table"], stmt["trigger"])] = stmt["sql"]
+
+def squash_create_view(model, stmt, file):
+    key = stmt["view"]
+    if key in model["views"] and stmt["if_not_exists"]:
+        return
+    model["views"][key] = stmt["sql"]
+
+def squash_create_simple(model, stmt, file):
+    bucket = {"create_type": "types", "create_extension": "extensions", "create_schema": "schemas",
+              "create_sequence": "sequences"}[stmt["kind"]]
+    key = stmt["objects"][0][0]
+    if key not in model[bucket] or not stmt.get("if_not_exists"):
+        model[bucket][key] = {"sql": stmt["sql"], "alters": []}
+
+def squash_drop(model, stmt, file):
+    what = stmt["object_type"]
+    for name in stmt["names"]:
+        if what == "table":
+            _drop_table(model, name)
+        elif what == "index":
+            model["indexes"].pop(name, None)
+        elif what in ("policy", "trigger"):
+            table, _, object_name = name.partition(".")[2].partition(".")
+            table = name.split(".", 2)
+            bucket = "policies" if what == "policy" else "triggers"
+            model[bucket].pop((f"{table[0]}.{table[1]}", table[2]), None)
+        elif what in ("function", "procedure"):
+            key = f"function:{name}"
+            if "(" in name:
+                model["functions"].pop(key, None)
+            else:
+                for other in [k for k in model["functions"] if base_key(k) == key]:
+                    del model["functions"][other]
+        elif what == "view":
+            model["views"].pop(name, None)
+        elif what in ("type", "extension", "schema", "sequence"):
+            model[{"type": "types", "extension": "extensions", "schema": "schemas",
+                   "sequence": "sequences"}[what]].pop(f"{what}:{name}", None)
+    # Triggers go away with their function when dropped with CASCADE
+    if what in ("function", "procedure") and stmt["cascade"]:
+        dropped = {base_key(f"function:{n}").split(":", 1)[1] for n in stmt["names"]}
+        for key in [k for k, sql in model["triggers"].items()
+                    if any(re.search(r"\b" + re.escape(d.split(".", 1)[1]) + r"\s*\(", sql) for d in dropped)]:
+            del model["triggers"][key]
+
+def squash_comment(model, stmt, file):
+    if not stmt["objects"]:
+        return
+    key = stmt["objects"][0][0]
+    if stmt.get("comment") is None:
+        model["comments"].pop(key, None)
+    else:
+        model["comments"][key] = stmt["sql"]
+
+def squash_grant(model, stmt, file):
+    key = stmt["objects"][0][0] if stmt["objects"] else None
+    model["grants"].append((key, stmt["sql"]))
+
+def squash_alter_publication(model, stmt, file):
+    model["publications"].append((stmt["references"], stmt["sql"]))
+
+def squash_alter_type(model, stmt, file):
+    entry = model["types"].get(stmt["objects"][0][0]) if stmt["objects"] else None
+    if entry is not None:
+        entry["alters"].append(stmt["sql"])
+
+def squash_dml(model, stmt, file):
+    """Only literal seed rows (INSERT ... VALUES) are kept for a fresh database"""
+    if not stmt["objects"] or not re.match(r"\s*insert\b", stmt["sql"], re.I):
+        return
+    tokens = tokenize(stmt["sql"])
+    if find_top_level(tokens, {"values"}) == len(tokens) or find_top_level(tokens, {"select"}) < len(tokens):
+        return
+    table = stmt["objects"][0][0].split(":", 1)[1]
+    model["data"].append((table, stmt["sql"]))
+
+SQUASH_HANDLERS = {
+    "create_table": squash_create_table,
+    "alter_table": squash_alter_table,
+    "create_index": squash_create_index,
+    "create_policy": squash_create_policy,
+    "alter_policy": squash_alter_policy,
+    "create_function": squash_create_function,
+    "alter_function": squash_alter_function,
+    "create_trigger": squash_create_trigger,
+    "create_view": squash_create_view,
+    "create_type": squash_create_simple,
+    "create_extension": squash_create_simple,
+    "create_schema": squash_create_simple,
+    "create_sequence": squash_create_simple,
+    "alter_type": squash_alter_type,
+    "drop": squash_drop,
+    "comment": squash_comment,
+    "grant": squash_grant,
+    "alter_publication": squash_alter_publication,
+    "dml": squash_dml,
+}
+
+def load_base_schema():
+    """schema.sql parsed like a migration, as a one-element list (empty if missing)"""
+    if not BASE_SCHEMA.exists():
+        return []
+    return [dict(parse_migration_text(BASE_SCHEMA.read_text()), file=BASE_SCHEMA.name, version=None)]
+
+def replay_migrations(migrations):
+    """Replay migrations in order into an in-memory schema model
+
+    Statements nested in DO blocks are usually guarded (IF EXISTS ...): when
+    they target a table that does not exist at that point they are skipped,
+    as the guard would have skipped them.
+    """
+    model = new_schema_model()
+    for migration in migrations:
+        for stmt in migration["statements"]:
+            handler = SQUASH_HANDLERS.get(stmt["kind"])
+            if handler is not None and not stmt.get("parse_error"):
+                handler(model, stmt, migration["file"])
+    return model
+
+def render_column(column):
+    parts = [quote_ident(column["name"]), column["type"]]
+    if column["generated"]:
+        parts.append(column["generated"])
+    if column["default"] is not None:
+        parts.append(f"DEFAULT {column['default']}")
+    if column["not_null"]:
+        parts.append("NOT NULL")
+    return " ".join(parts)
+
+def render_constraint(constraint):
+    name = f"CONSTRAINT {quote_ident(constraint['name'])} "
+    columns = ", ".join(quote_ident(c) for c in constraint["columns"])
+    kind = constraint["type"]
+    if kind == "primary_key":
+        body = f"PRIMARY KEY ({columns})"
+    elif kind == "unique":
+        body = f"UNIQUE ({columns})"
+    elif kind == "foreign_key":
+        ref = constraint["references"]
+        body = f"FOREIGN KEY ({columns}) REFERENCES {quote_qualified(ref['table'])}"
+        if ref["columns"]:
+            body += f" ({', '.join(quote_ident(c) for c in ref['columns'])})"
+        if ref["on_delete"]:
+            body += f" ON DELETE {ref['on_delete'].upper()}"
+        if ref["on_update"]:
+            body += f" ON UPDATE {ref['on_update'].upper()}"
+    elif kind == "check":
+        body = f"CHECK ({constraint['expr']})"
+    else:
+        body = constraint["expr"]
+    if constraint.get("not_valid"):
+        body += " NOT VALID"
+    return name + body
+
+def render_index(index):
+    keys = []
+    for key in index["keys"]:
+        text = quote_ident(key["column"]) if key["column"] else key["expr"]
+        if key["opclass"]:
+            text += f" {key['opclass']}"
+        if key["desc"]:
+            text += " DESC"
+        if key["nulls"]:
+            text += f" NULLS {key['nulls'].upper()}"
+        keys.append(text)
+    schema, name = index["index"].split(".", 1)
+    sql = f"CREATE {'UNIQUE ' if index['unique'] else ''}INDEX {quote_ident(name)} ON {quote_qualified(index['table'])}"
+    if index["method"] != "btree":
+        sql += f" USING {index['method']}"
+    sql += f" ({', '.join(keys)})"
+    if index["include"]:
+        sql += f" INCLUDE ({', '.join(quote_ident(c) for c in index['include'])})"
+    if index["where"]:
+        sql += f" WHERE {index['where']}"
+    return sql
+
+def render_policy(policy):
+    sql = f"CREATE POLICY {quote_ident(policy['policy'])} ON {quote_qualified(policy['table'])}"
+    if not policy["permissive"]:
+        sql += " AS RESTRICTIVE"
+    sql += f" FOR {policy['command'].upper()}"
+    sql += f" TO {', '.join(policy['roles'])}"
+    if policy["using"]:
+        sql += f"\n  USING ({policy['using']})"
+    if policy["check"]:
+        sql += f"\n  WITH CHECK ({policy['check']})"
+    return sql
+
+def _needs_tables(function, tables):
+    """SQL-language bodies and table-typed signatures are checked at CREATE time"""
+    if function["language"] == "sql":
+        return True
+    names = {t.split(".", 1)[1] for t in tables}
+    text = " ".join([function["returns"] or ""] + [a["type"] for a in function["args"]]).lower()
+    return any(re.search(r"\b" + re.escape(n) + r"\b", text) for n in names)
+
+def render_baseline(model, migrations, base=()):
+    """Consolidated SQL for the final schema of a replayed model"""
+    digest = hashlib.sha256("".join(m["sha256"] for m in list(base) + migrations).encode()).hexdigest()[:16]
+    out = [
+        "-- ============================================================================",
+        f"-- BASELINE: squash of {len(migrations)} migrations"
+        + (f" on top of {', '.join(b['file'] for b in base)}" if base else ""),
+        f"-- From {migrations[0]['file']} to {migrations[-1]['file']} (source digest {digest})",
+        "-- Generated by supabase/cleanup_migrations.py squash - do not edit by hand",
+        "-- ============================================================================",
+        ""
+    ]
+
+    def section(title, statements):
+        statements = [s.rstrip().rstrip(";") for s in statements]
+        if statements:
+            out.append(f"-- {title}")
+            out.extend(s + ";\n" for s in statements)
+
+    section("Extensions", [e["sql"] for e in model["extensions"].values()])
+    section("Schemas", [e["sql"] for e in model["schemas"].values()])
+    section("Types", [s for e in model["types"].values() for s in [e["sql"]] + e["alters"]])
+    section("Sequences", [e["sql"] for e in model["sequences"].values()])
+
+    functions_early, functions_late = [], []
+    for function in model["functions"].values():
+        bucket = functions_late if _needs_tables(function, model["tables"]) else functions_early
+        bucket.extend([function["sql"]] + function["alters"])
+    section("Functions (no table dependency at creation)", functions_early)
+
+    tables, foreign_keys = [], []
+    for name, table in model["tables"].items():
+        lines = [render_column(c) for c in table["columns"].values()]
+        for constraint in table["constraints"].values():
+            if constraint["type"] == "foreign_key":
+                foreign_keys.append(f"ALTER TABLE {quote_qualified(name)} ADD {render_constraint(constraint)}")
+            else:
+                lines.append(render_constraint(constraint))
+        tables.append(f"CREATE TABLE {quote_qualified(name)} (\n  " + ",\n  ".join(lines) + "\n)")
+    section("Tables", tables)
+    section("Foreign keys", foreign_keys)
+    section("Functions", functions_late)
+    section("Views", list(model["views"].values()))
+    section("Indexes", [render_index(i) for i in model["indexes"].values()])
+
+    rls = []
+    for name, table in model["tables"].items():
+        if table["rls"]:
+            rls.append(f"ALTER TABLE {quote_qualified(name)} ENABLE ROW LEVEL SECURITY")
+        if table["force_rls"]:
+            rls.append(f"ALTER TABLE {quote_qualified(name)} FORCE ROW LEVEL SECURITY")
+    section("Row level security", rls)
+    section("Policies", [render_policy(p) for p in model["policies"].values()])
+    section("Triggers", list(model["triggers"].values()))
+    section("Table options", [f"ALTER TABLE {quote_qualified(n)} {sql}" for n, t in model["tables"].items()
+                              for sql in t["extra"]])
+
+    existing = set()
+    existing.update(f"table:{t}" for t in model["tables"])
+    existing.update(f"view:{v}" for v in model["views"])
+    existing.update(model["functions"])
+    existing.update(f"index:{i}" for i in model["indexes"])
+    existing.update(f"policy:{t}.{p}" for t, p in model["policies"])
+    existing.update(f"trigger:{t}.{n}" for t, n in model["triggers"])
+    existing.update(f"column:{t}.{c}" for t, table in model["tables"].items() for c in table["columns"])
+    existing.update(f"constraint:{t}.{c}" for t, table in model["tables"].items() for c in table["constraints"])
+    existing.update(model["types"])
+    existing.update(model["schemas"])
+
+    section("Comments", [sql for key, sql in model["comments"].items() if key in existing])
+    section("Grants", [sql for key, sql in model["grants"]
+                       if key is None or key in existing or object_type(key) == "schema"])
+    section("Realtime publication", [sql for refs, sql in model["publications"]
+                                     if all(r.split(":", 1)[1] in model["tables"] for r in refs)])
+    section("Seed data", [sql for table, sql in model["data"]
+                          if table in model["tables"] or not table.startswith("public.")])
+    return "\n".join(out)
+
+def squash(args):
+    print("🗜️  Squashing migrations into a baseline...\n")
+    migrations = load_migrations(jobs=args.jobs, use_cache=not args.no_cache)
+    if args.upto:
+        migrations = [m for m in migrations if m["file"] <= args.upto or m["version"] == args.upto]
+    if not migrations:
+        print("❌ No migrations to squash")
+        return 1
+
+    base = [] if args.no_base else load_base_schema()
+    if base:
+        print(f"🧱 Base schema: {BASE_SCHEMA.name}")
+
+    model = replay_migrations(base + migrations)
+    sql = render_baseline(model, migrations, base)
+
+    output = Path(args.output or SUPABASE_DIR / "baseline" / f"{migrations[-1]['version']}_baseline.sql")
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(sql)
+
+    counts = {
+        "tables": len(model["tables"]),
+        "columns": sum(len(t["columns"]) for t in model["tables"].values()),
+        "indexes": len(model["indexes"]),
+        "policies": len(model["policies"]),
+        "functions": len(model["functions"]),
+        "triggers": len(model["triggers"]),
+        "views": len(model["views"])
+    }
+    print(f"📦 {len(migrations)} migrations → " + ", ".join(f"{n} {k}" for k, n in counts.items()))
+    if model["warnings"]:
+        print(f"\n⚠️  {len(model['warnings'])} replay warnings:")
+        for warning in model["warnings"]:
+            print(f"  - {warning}")
+    print(f"\n📝 Baseline written: {output} ({len(sql.splitlines())} lines)")
+    print("   Apply it on a fresh database instead of the squashed migrations, then the later ones.")
+    return 0
+
+# ============================================
+# INDEX CATALOGUE
+# ============================================
+
+# Rough cost of maintaining one index entry per written row, relative to a
+# btree insert (GIN/GiST write several entries or go through a pending list)
+INDEX_WRITE_COST = {"btree": 1.0, "hash": 1.0, "gist": 2.0, "spgist": 2.0, "gin": 3.0, "brin": 0.1}
+
+def index_catalogue(model, migrations):
+    """Indexes of the replayed schema per table, implicit PRIMARY KEY/UNIQUE ones included"""
+    declared = defaultdict(list)
+    for migration in migrations:
+        for stmt in migration["statements"]:
+            if stmt["kind"] == "create_index" and not stmt.get("parse_error"):
+                declared[stmt["index"]].append(f"{migration['file']}:{stmt['line']}")
+
+    catalogue = defaultdict(list)
+    for table, spec in model["tables"].items():
+        schema = table.split(".", 1)[0]
+        for name, constraint in spec["constraints"].items():
+            if constraint["type"] not in ("primary_key", "unique"):
+                continue
+            keys = [{"expr": c, "column": c, "desc": False, "nulls": None, "opclass": None}
+                    for c in constraint["columns"]]
+            catalogue[table].append({
+                "index": f"{schema}.{name}", "table": table, "method": "btree", "unique": True,
+                "keys": keys, "include": [], "where": None, "constraint": constraint["type"], "declared": []
+            })
+    for name, index in model["indexes"].items():
+        catalogue[index["table"]].append({
+            "index": name, "table": index["table"], "method": index["method"], "unique": index["unique"],
+            "keys": index["keys"], "include": index["include"], "where": index["where"], "constraint": None,
+            "declared": declared.get(name) or [f"{index['file']}:{index['line']}"]
+        })
+    return catalogue
+
+def _key_signature(index):
+    return tuple((key["column"] or key["expr"], key["opclass"]) for key in index["keys"])
+
+def _same_order(short, long):
+    """A btree scans both ways: (a, b DESC) also serves ORDER BY a DESC, b"""
+    a = [key["desc"] for key in short["keys"]]
+    b = [key["desc"] for key in long["keys"][:len(short["keys"])]]
+    return a == b or a == [not d for d in b]
+
+def _covered_by(index, other):
+    """How `other` makes `index` unnecessary: exact, prefix, partial, or None"""
+    if index["method"] != other["method"] or index is other:
+        return None
+    sig, other_sig = _key_signature(index), _key_signature(other)
+    if other_sig[:len(sig)] != sig or not set(index["include"]) <= set(other["include"]) | {k[0] for k in other_sig}:
+        return None
+    if index["unique"] and not (other["unique"] and sig == other_sig and index["where"] == other["where"]):
+        return None  # the UNIQUE index enforces a constraint, it stays
+    if index["method"] == "btree" and not _same_order(index, other):
+        return None
+    if len(sig) < len(other_sig):
+        return "prefix" if index["method"] == "btree" and index["where"] == other["where"] else None
+    if index["where"] == other["where"]:
+        return "exact"
+    if other["where"] is None:
+        return "partial"
+    return None
+
+def _drop_order(index):
+    """Between two equivalent indexes the smaller key is kept: PRIMARY KEY, constraints, UNIQUE, oldest"""
+    return (index["constraint"] is None, index["constraint"] != "primary_key", not index["unique"],
+            index["declared"][:1])
+
+def find_redundant_indexes(catalogue):
+    """Exact duplicates, left-prefix-covered and full-covered partial indexes, plus partial overlaps"""
+    redundant, overlaps = [], []
+    order = {"exact": 0, "prefix": 1, "partial": 2}
+    for table, indexes in sorted(catalogue.items()):
+        dropped = set()
+        for index in indexes:
+            best = None
+            for other in indexes:
+                if other["index"] in dropped:
+                    continue
+                kind = _covered_by(index, other)
+                if kind is None:
+                    continue
+                if kind == "exact" and _drop_order(index) < _drop_order(other):
+                    continue  # the other one is reported instead
+                if best is None or order[kind] < order[best[0]]:
+                    best = (kind, other)
+            if best is not None:
+                dropped.add(index["index"])
+                redundant.append({"table": table, "index": index["index"], "kind": best[0],
+                                  "covered_by": best[1]["index"], "declared": index["declared"],
+                                  "constraint": index["constraint"]})
+
+        partials = [i for i in indexes if i["where"] and i["index"] not in dropped]
+        for i, a in enumerate(partials):
+            for b in partials[i + 1:]:
+                if a["method"] == b["method"] and a["keys"][0]["expr"] == b["keys"][0]["expr"] \
+                        and a["where"] != b["where"]:
+                    overlaps.append({"table": table, "indexes": [a["index"], b["index"]],
+                                     "where": [a["where"], b["where"]]})
+    return redundant, overlaps
+
+def write_amplification(catalogue, redundant):
+    """Index entries maintained per inserted row (heap = 1), before/after dropping redundant indexes"""
+    dropped = {r["index"] for r in redundant}
+    rows = []
+    for table, indexes in catalogue.items():
+        costs = [INDEX_WRITE_COST.get(i["method"], 1.0) for i in indexes]
+        saved = sum(c for i, c in zip(indexes, costs) if i["index"] in dropped)
+        rows.append({"table": table, "indexes": len(indexes),
+                     "redundant": sum(i["index"] in dropped for i in indexes),
+                     "cost": 1 + sum(costs), "cost_after": 1 + sum(costs) - saved})
+    rows.sort(key=lambda r: (-r["cost"], r["table"]))
+    return rows
+
+def analyze_indexes(migrations, base=()):
+    model = replay_migrations(list(base) + migrations)
+    catalogue = index_catalogue(model, migrations)
+    redundant, overlaps = find_redundant_indexes(catalogue)
+    redeclared = {name: sources for name, sources in
+                  ((i["index"], i["declared"]) for indexes in catalogue.values() for i in indexes)
+                  if len(sources) > 1}
+    return {
+        "count": sum(len(i) for i in catalogue.values()),
+        "implicit": sum(1 for indexes in catalogue.values() for i in indexes if i["constraint"]),
+        "redundant": redundant,
+        "overlaps": overlaps,
+        "redeclared": redeclared,
+        "write_amplification": write_amplification(catalogue, redundant)
+    }
+
+def print_index_analysis(indexes):
+    print(f"🗂️  Index catalogue: {indexes['count']} indexes ({indexes['implicit']} from PRIMARY KEY/UNIQUE)")
+    labels = {"exact": "duplicate of", "prefix": "left prefix of", "partial": "partial, covered by full"}
+    if indexes["redundant"]:
+        print(f"\n🗑️  Redundant indexes ({len(indexes['redundant'])}):")
+        for r in indexes["redundant"]:
+            print(f"  - {r['index']} → {labels[r['kind']]} {r['covered_by']} ({', '.join(r['declared']) or 'constraint'})")
+    if indexes["overlaps"]:
+        print(f"\n🔀 Overlapping partial indexes ({len(indexes['overlaps'])}): same leading key, different WHERE")
+        for o in indexes["overlaps"]:
+            print(f"  - {' / '.join(o['indexes'])}")
+    if indexes["redeclared"]:
+        print(f"\n📑 Indexes declared in several migrations ({len(indexes['redeclared'])}):")
+        for name, sources in sorted(indexes["redeclared"].items()):
+            print(f"  - {name}: {', '.join(sources)}")
+
+    print("\n✍️  Write amplification (index entries per inserted row, heap = 1):")
+    for row in indexes["write_amplification"][:15]:
+        after = f" → {row['cost_after']:.1f} without redundant" if row["redundant"] else ""
+        print(f"  - {row['table']}: {row['indexes']} indexes, {row['cost']:.1f}{after}")
+
+def write_index_drops(indexes, path):
+    with open(path, "w") as f:
+        f.write("-- Redundant indexes found by cleanup_migrations.py analyze\n")
+        f.write("-- Review each one (query plans, constraints) before applying\n\n")
+        for r in indexes["redundant"]:
+            f.write(f"-- {r['kind']}: covered by {r['covered_by']}\n")
+            if r.get("constraint"):
+                # DROP INDEX is rejected for an index backing a constraint
+                name = r["index"].split(".", 1)[1]
+                f.write(f"-- backs a {r['constraint'].replace('_', ' ').upper()} constraint: drop the constraint "
+                        f"(ACCESS EXCLUSIVE, fails while foreign keys depend on it)\n")
+                f.write(f"ALTER TABLE {quote_qualified(r['table'])} DROP CONSTRAINT IF EXISTS {quote_ident(name)};\n")
+            else:
+                f.write(f"DROP INDEX CONCURRENTLY IF EXISTS {quote_qualified(r['index'])};\n")
+
+# ============================================
+# LOCK LINT
+# ============================================
+
+# Tables that are big or written to constantly in production: even a short
+# ACCESS EXCLUSIVE lock on them queues every reader and writer behind it
+LARGE_TABLES = {
+    "public.messages", "public.conversations", "public.conversation_participants",
+    "public.notifications", "public.notification_logs", "public.users", "public.user_profiles",
+    "public.properties", "public.applications", "public.matches", "public.user_swipes",
+    "public.audit_logs", "public.security_events", "public.login_attempts", "public.typing_indicators",
+    "public.event_analytics", "public.route_analytics", "public.api_performance_metrics",
+    "public.performance_metrics", "public.web_vitals_metrics"
+}
+
+# Evaluated per row, so ADD COLUMN ... DEFAULT f() rewrites the table
+# (constant and STABLE defaults such as now() are catalog-only since PG 11)
+VOLATILE_FUNCTIONS = {"random", "gen_random_uuid", "gen_random_bytes", "uuid_generate_v1", "uuid_generate_v1mc",
+                      "uuid_generate_v4", "clock_timestamp", "timeofday", "nextval", "txid_current"}
+VOLATILE_CALL_RE = re.compile(r"\b(" + "|".join(VOLATILE_FUNCTIONS) + r")\s*\(", re.I)
+SERIAL_TYPES = {"serial", "serial2", "serial4", "serial8", "smallserial", "bigserial"}
+
+# ALTER COLUMN TYPE without a rewrite: varchar/text -> text, and varchar(n)
+# -> varchar(m >= n) or unbounded varchar (see column_type_rewrites)
+NO_REWRITE_SOURCES = {"text", "character varying"}
+TYPE_LENGTH_RE = re.compile(r"\(\s*(\d+)\s*\)")
+
+NOT_NULL_FIX = ("add the column nullable, backfill in batches, then ADD CONSTRAINT ... CHECK (col IS NOT NULL) "
+                "NOT VALID, VALIDATE CONSTRAINT and SET NOT NULL (no scan since PG 12 once the check is valid)")
+
+# code: (what goes wrong, safer online alternative)
+LINT_RULES = {
+    "index-not-concurrent": (
+        "CREATE INDEX without CONCURRENTLY blocks every write for the whole build",
+        "CREATE INDEX CONCURRENTLY IF NOT EXISTS, alone in its own migration (it cannot run in a "
+        "transaction); drop the INVALID index it leaves behind if it fails"),
+    "drop-index-not-concurrent": (
+        "DROP INDEX without CONCURRENTLY takes an ACCESS EXCLUSIVE lock on a large table",
+        "DROP INDEX CONCURRENTLY IF EXISTS, alone in its own migration"),
+    "volatile-default": (
+        "ADD COLUMN with a volatile default (or serial/generated) rewrites the table under ACCESS EXCLUSIVE",
+        "ADD COLUMN without the default, ALTER COLUMN ... SET DEFAULT for new rows, backfill existing "
+        "rows in batches"),
+    "not-null-without-backfill": (
+        "NOT NULL on an existing table without a prior backfill: fails on existing rows, scans under "
+        "ACCESS EXCLUSIVE",
+        NOT_NULL_FIX),
+    "set-not-null-scan": (
+        "SET NOT NULL scans the whole table under ACCESS EXCLUSIVE",
+        NOT_NULL_FIX),
+    "column-type-rewrite": (
+        "ALTER COLUMN TYPE rewrites the table and rebuilds its indexes under ACCESS EXCLUSIVE",
+        "add a column of the new type, backfill in batches (trigger for new writes), switch readers, "
+        "drop the old column in a later migration"),
+    "validating-constraint": (
+        "ADD CONSTRAINT checks every existing row while holding the lock",
+        "ADD CONSTRAINT ... NOT VALID, then VALIDATE CONSTRAINT in a separate statement "
+        "(SHARE UPDATE EXCLUSIVE: reads and writes continue)"),
+    "unique-without-index": (
+        "ADD PRIMARY KEY/UNIQUE builds its index under ACCESS EXCLUSIVE",
+        "CREATE UNIQUE INDEX CONCURRENTLY first, then ADD CONSTRAINT ... USING INDEX"),
+    "lock-without-timeout": (
+        "ACCESS EXCLUSIVE on a large table without lock_timeout: while it waits for running queries, "
+        "every new query on the table waits behind it",
+        "SET lock_timeout = '5s' at the top of the migration and retry the deploy if it times out"),
+}
+
+def _first_word(sql):
+    match = re.match(r"\s*(\w+)", sql)
+    return match.group(1).lower() if match else None
+
+def _rewrites_table(column):
+    return (normalize_type(column["type"] or "") in SERIAL_TYPES or bool(column["generated"])
+            or bool(column["default"] and VOLATILE_CALL_RE.search(column["default"])))
+
+def _type_and_length(text):
+    """('character varying', 255) for 'VARCHAR(255)'; the length is None when unbounded"""
+    match = TYPE_LENGTH_RE.search(text)
+    return normalize_type(text), int(match.group(1)) if match else None
+
+def column_type_rewrites(old_type, new_type):
+    """Whether ALTER COLUMN TYPE old -> new rewrites (or scans) the table
+
+    An unknown current type (column not in the model) counts as a rewrite.
+    """
+    if old_type is None:
+        return True
+    (old, old_length), (new, new_length) = _type_and_length(old_type), _type_and_length(new_type)
+    if old in NO_REWRITE_SOURCES and new == "text":
+        return False
+    if old == new == "character varying":
+        return not (new_length is None or (old_length is not None and new_length >= old_length))
+    return True
+
+def lint_statement(stmt, fresh, backfilled, index_tables, large_tables, model=None):
+    """(code, table, lock) findings of one statement, plus the tables it locks ACCESS EXCLUSIVE
+
+    `model` is the schema replayed up to (not including) the statement; it
+    gives the current type of altered columns.
+    """
+    kind, table = stmt["kind"], stmt.get("table")
+    findings, exclusive = [], []
+    if table in fresh:
+        return findings, exclusive
+
+    if kind == "create_index" and not stmt["concurrently"]:
+        findings.append(("index-not-concurrent", table, "ShareLock"))
+    elif kind == "drop" and stmt["object_type"] == "index" and not stmt["concurrently"]:
+        for name in stmt["names"]:
+            indexed = index_tables.get(name)
+            if indexed in large_tables and indexed not in fresh:
+                findings.append(("drop-index-not-concurrent", indexed, "AccessExclusiveLock"))
+                exclusive.append(indexed)
+    elif kind == "alter_table":
+        for action in stmt["actions"]:
+            name = action["action"]
+            if name == "add_column":
+                column = action["column"]
+                if _rewrites_table(column):
+                    findings.append(("volatile-default", table, "AccessExclusiveLock"))
+                elif column["not_null"] and column["default"] in (None, "NULL"):
+                    findings.append(("not-null-without-backfill", table, "AccessExclusiveLock"))
+            elif name == "set_not_null":
+                code = "set-not-null-scan" if table in backfilled else "not-null-without-backfill"
+                findings.append((code, table, "AccessExclusiveLock"))
+            elif name == "alter_column_type":
+                columns = (model or {}).get("tables", {}).get(table, {}).get("columns", {})
+                current = columns.get(action["column"], {}).get("type")
+                if column_type_rewrites(current, action["type"]):
+                    findings.append(("column-type-rewrite", table, "AccessExclusiveLock"))
+            elif name == "add_constraint":
+                constraint = action["constraint"]
+                if constraint["type"] in ("foreign_key", "check") and not constraint["not_valid"]:
+                    lock = "ShareRowExclusiveLock" if constraint["type"] == "foreign_key" else "AccessExclusiveLock"
+                    findings.append(("validating-constraint", table, lock))
+                elif constraint["type"] in ("primary_key", "unique", "exclude") \
+                        and "using index" not in action["sql"].lower():
+                    findings.append(("unique-without-index", table, "AccessExclusiveLock"))
+        # VALIDATE CONSTRAINT and ADD FOREIGN KEY alone do not block readers
+        if any(a["action"] != "validate_constraint" and
+               not (a["action"] == "add_constraint" and a["constraint"]["type"] == "foreign_key")
+               for a in stmt["actions"]):
+            exclusive.append(table)
+    elif kind in ("create_policy", "alter_policy") or (kind == "drop" and stmt["object_type"] in ("policy", "trigger")):
+        exclusive.append(table)
+    elif kind == "dml" and _first_word(stmt["sql"]) == "truncate":
+        exclusive.extend(key[len("table:"):] for key, _, _ in stmt["objects"] if key.startswith("table:"))
+    elif kind == "drop" and stmt["object_type"] == "table":
+        exclusive.extend(stmt["names"])
+    return findings, exclusive
+
+def lint_migrations(migrations, base=(), large_tables=LARGE_TABLES, only=None):
+    """Lock-heavy DDL on tables that already exist when the migration runs
+
+    Tables created earlier in the same migration are empty and skipped.
+    `only` restricts the report to those files; earlier migrations are still
+    read to know which tables exist, which table each index is on and the
+    current type of every column (schema model replayed statement by statement).
+    """
+    existing, index_tables, findings = set(), {}, []
+    model = new_schema_model()
+    for migration in list(base) + migrations:
+        fresh, backfilled, lock_timeout = set(), set(), False
+        exclusive_lines = defaultdict(list)
+        report = migration in migrations and (only is None or migration["file"] in only)
+
+        for stmt in migration["statements"]:
+            kind = stmt["kind"]
+            if kind == "create_table" and stmt["table"] not in existing:
+                fresh.add(stmt["table"])
+            elif kind == "create_index":
+                index_tables[stmt["index"]] = stmt["table"]
+            elif kind == "set" and "lock_timeout" in stmt["sql"].lower():
+                lock_timeout = True
+            elif kind == "dml" and _first_word(stmt["sql"]) == "update":
+                backfilled.update(key[len("table:"):] for key, _, _ in stmt["objects"] if key.startswith("table:"))
+
+            if report:
+                statement_findings, exclusive = lint_statement(stmt, fresh, backfilled, index_tables,
+                                                               large_tables, model)
+                for code, table, lock in statement_findings:
+                    findings.append(_lint_finding(migration, stmt, code, table, lock, large_tables))
+                if not lock_timeout:
+                    for table in exclusive:
+                        if table in large_tables and table not in fresh:
+                            exclusive_lines[table].append(stmt)
+
+            handler = SQUASH_HANDLERS.get(kind)
+            if handler is not None and not stmt.get("parse_error"):
+                handler(model, stmt, migration["file"])
+
+        for table, stmts in exclusive_lines.items():
+            finding = _lint_finding(migration, stmts[0], "lock-without-timeout", table,
+                                    "AccessExclusiveLock", large_tables)
+            finding["statements"] = len(stmts)
+            findings.append(finding)
+        existing |= fresh
+    return findings
+
+def _lint_finding(migration, stmt, code, table, lock, large_tables):
+    problem, fix = LINT_RULES[code]
+    return {"file": migration["file"], "line": stmt["line"], "code": code, "table": table, "lock": lock,
+            "large": table in large_tables, "sql": stmt["sql"].split("\n", 1)[0][:120],
+            "problem": problem, "fix": fix}
+
+def print_lint_summary(findings, top=15):
+    files = {f["file"] for f in findings}
+    print(f"🔒 Lock-heavy DDL: {len(findings)} findings in {len(files)} migrations")
+    by_code = defaultdict(list)
+    for f in findings:
+        by_code[f["code"]].append(f)
+    for code in LINT_RULES:
+        if by_code[code]:
+            large = sum(1 for f in by_code[code] if f["large"])
+            print(f"  - {code}: {len(by_code[code])} ({large} on large tables)")
+    worst = sorted((f for f in findings if f["large"] and f["code"] != "lock-without-timeout"),
+                   key=lambda f: (-LOCK_WEIGHTS[f["lock"]], f["file"], f["line"]))
+    if worst:
+        print(f"\n  On large tables ({len(worst)}):")
+        for f in worst[:top]:
+            print(f"  - {f['file']}:{f['line']} [{f['code']}] {f['table']} ({f['lock']})")
+        if len(worst) > top:
+            print(f"  ... {len(worst) - top} more (see lint)")
+
+def print_lint(findings):
+    by_file = defaultdict(list)
+    for f in findings:
+        by_file[f["file"]].append(f)
+    for file, file_findings in sorted(by_file.items()):
+        print(f"📄 {file}")
+        for f in sorted(file_findings, key=lambda f: f["line"]):
+            large = " 🔥 large table" if f["large"] else ""
+            count = f" ({f['statements']} statements)" if f.get("statements") else ""
+            print(f"  L{f['line']} [{f['code']}] {f['table']} {f['lock']}{large}{count}")
+            print(f"     {f['sql']}")
+        print()
+
+    codes = [code for code in LINT_RULES if any(f["code"] == code for f in findings)]
+    if codes:
+        print("💡 Safer alternatives:")
+        for code in codes:
+            problem, fix = LINT_RULES[code]
+            print(f"  [{code}] {problem}")
+            print(f"     → {fix}")
+        print()
+
+# Built-in lint cases (lint --self-check): (SQL run on an existing table, expected codes)
+LINT_CHECK_SETUP = ("CREATE TABLE public.lint_probe (id integer PRIMARY KEY, ref uuid, data jsonb, "
+                    "code varchar(255), slug varchar(50), label text);")
+LINT_CHECK_CASES = [
+    ("ALTER TABLE public.lint_probe ALTER COLUMN id TYPE text;", ["column-type-rewrite"]),
+    ("ALTER TABLE public.lint_probe ALTER COLUMN ref TYPE text;", ["column-type-rewrite"]),
+    ("ALTER TABLE public.lint_probe ALTER COLUMN data TYPE text;", ["column-type-rewrite"]),
+    ("ALTER TABLE public.lint_probe ALTER COLUMN code TYPE varchar(50);", ["column-type-rewrite"]),
+    ("ALTER TABLE public.lint_probe ALTER COLUMN id TYPE bigint;", ["column-type-rewrite"]),
+    ("ALTER TABLE public.lint_probe ALTER COLUMN code TYPE text;", []),
+    ("ALTER TABLE public.lint_probe ALTER COLUMN slug TYPE varchar(100);", []),
+    ("ALTER TABLE public.lint_probe ALTER COLUMN slug TYPE character varying;", []),
+    ("ALTER TABLE public.lint_probe ALTER COLUMN label TYPE text;", []),
+    ("CREATE INDEX idx_lint_probe_ref ON public.lint_probe (ref);", ["index-not-concurrent"]),
+    ("CREATE INDEX CONCURRENTLY idx_lint_probe_ref ON public.lint_probe (ref);", []),
+]
+
+def lint_self_check():
+    """Run LINT_CHECK_CASES, each as a migration after LINT_CHECK_SETUP"""
+    setup = dict(parse_migration_text(LINT_CHECK_SETUP), file="000_lint_probe.sql", version="000")
+    failed = 0
+    for sql, expected in LINT_CHECK_CASES:
+        case = dict(parse_migration_text(sql), file="001_case.sql", version="001")
+        codes = [f["code"] for f in lint_migrations([setup, case], only={"001_case.sql"})]
+        ok = codes == expected
+        failed += not ok
+        print(f"  {'✅' if ok else '❌'} {sql} → {', '.join(codes) or 'ok'}"
+              + ("" if ok else f" (expected {', '.join(expected) or 'ok'})"))
+    print(f"\n{'❌ ' + str(failed) + ' lint case(s) failed' if failed else '✅ All lint cases passed'}")
+    return 1 if failed else 0
+
+def lint(args):
+    if args.self_check:
+        return lint_self_check()
+    migrations = load_migrations(jobs=args.jobs, use_cache=not args.no_cache)
+    only = None
+    if args.since:
+        only = {m["file"] for m in migrations if m["file"] > args.since and m["version"] != args.since}
+    large_tables = LARGE_TABLES
+    if args.large_tables is not None:
+        large_tables = {qualify(tuple(t.strip().split("."))) for t in args.large_tables.split(",") if t.strip()}
+
+    findings = lint_migrations(migrations, load_base_schema(), large_tables, only)
+    linted = len(only) if only is not None else len(migrations)
+    print(f"🔍 Linting {linted} migrations for lock-heavy DDL...\n")
+    print_lint(findings)
+    print_lint_summary(findings)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(findings, f, indent=2)
+        print(f"\n📝 JSON report: {args.json}")
+    return 1 if findings else 0
+
+# ============================================
+# REPLAY BENCHMARK
+# ============================================
+
+# Lock modes from weakest to strongest, with a weight for the ranking:
+# from SHARE upwards a lock blocks writers, ACCESS EXCLUSIVE blocks readers too
+LOCK_WEIGHTS = {
+    "AccessShareLock": 0, "RowShareLock": 1, "RowExclusiveLock": 1, "ShareUpdateExclusiveLock": 2,
+    "ShareLock": 5, "ShareRowExclusiveLock": 5, "ExclusiveLock": 8, "AccessExclusiveLock": 10
+}
+
+TRANSACTION_WORDS = {"begin", "commit", "end", "rollback", "start"}
+
+CATALOG_QUERY = """
+SELECT
+  (SELECT count(*) FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE n.nspname NOT IN ('pg_catalog', 'information_schema') AND n.nspname NOT LIKE 'pg_toast%%'),
+  (SELECT count(*) FROM pg_attribute a JOIN pg_class c ON c.oid = a.attrelid
+    JOIN pg_namespace n ON n.oid = c.relnamespace
+    WHERE a.attnum > 0 AND NOT a.attisdropped AND n.nspname NOT IN ('pg_catalog', 'information_schema')),
+  (SELECT count(*) FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid
+    JOIN pg_namespace n ON n.oid = c.relnamespace WHERE n.nspname NOT IN ('pg_catalog', 'information_schema')),
+  (SELECT count(*) FROM pg_constraint co JOIN pg_namespace n ON n.oid = co.connamespace
+    WHERE n.nspname NOT IN ('pg_catalog', 'information_schema')),
+  (SELECT count(*) FROM pg_proc p JOIN pg_namespace n ON n.oid = p.pronamespace
+    WHERE n.nspname NOT IN ('pg_catalog', 'information_schema')),
+  (SELECT count(*) FROM pg_policy),
+  (SELECT count(*) FROM pg_trigger WHERE NOT tgisinternal),
+  pg_database_size(current_database())
+"""
+CATALOG_FIELDS = ("relations", "columns", "indexes", "constraints", "functions", "policies", "triggers", "bytes")
+
+LOCKS_QUERY = """
+SELECT l.relation::bigint, l.mode, n.nspname || '.' || c.relname
+FROM pg_locks l
+JOIN pg_class c ON c.oid = l.relation
+JOIN pg_namespace n ON n.oid = c.relnamespace
+WHERE l.pid = pg_backend_pid() AND l.locktype = 'relation' AND l.granted
+  AND n.nspname NOT IN ('pg_catalog', 'information_schema')
+"""
+
+def strip_transaction_control(sql):
+    """Drop top-level BEGIN/COMMIT so the harness owns the transaction (and sees the locks)"""
+    statements = split_statements(tokenize(sql))
+    kept = [st for st in statements if not (st[0][KIND] == "word" and st[0][VALUE] in TRANSACTION_WORDS)]
+    if len(kept) == len(statements):
+        return sql, False
+    return "".join(sql[st[0][START]:st[-1][END]] + ";\n" for st in kept), True
+
+def find_pg_bin(pg_bin=None):
+    """Directory holding initdb/pg_ctl: argument, $PG_BIN, PATH, then pg_config
+
+    A candidate without initdb is skipped (pg_config alone only means a
+    client install).
+    """
+    candidates = [pg_bin, os.environ.get("PG_BIN")]
+    initdb = shutil.which("initdb")
+    if initdb:
+        candidates.append(Path(initdb).parent)
+    if shutil.which("pg_config"):
+        try:
+            out = subprocess.run(["pg_config", "--bindir"], capture_output=True, text=True)
+        except OSError:
+            out = None
+        if out is not None and out.returncode == 0:
+            candidates.append(out.stdout.strip())
+    for candidate in candidates:
+        if candidate and (Path(candidate) / "initdb").exists():
+            return Path(candidate)
+    return None
+
+def start_local_postgres(pg_bin, settings=()):
+    """initdb + start a cluster in a temp dir, socket only; returns (dsn, stop)
+
+    `settings` are extra server settings as "name=value" strings. Raises
+    RuntimeError when the cluster cannot be created or started.
+    """
+    root = Path(tempfile.mkdtemp(prefix="migration_bench_"))
+    data = root / "data"
+
+    def stop():
+        try:
+            subprocess.run([str(pg_bin / "pg_ctl"), "-D", str(data), "-m", "immediate", "stop"],
+                           capture_output=True)
+        except OSError:
+            pass
+        shutil.rmtree(root, ignore_errors=True)
+
+    steps = [
+        [str(pg_bin / "initdb"), "-D", str(data), "-U", "postgres", "-A", "trust",
+         "-E", "UTF8", "--locale=C", "--no-sync"],
+        [str(pg_bin / "pg_ctl"), "-D", str(data), "-l", str(root / "postgres.log"), "-w", "start",
+         "-o", " ".join([f"-p 5432 -k {root} -c listen_addresses=''"] + [f"-c {s}" for s in settings])]
+    ]
+    for command in steps:
+        try:
+            out = subprocess.run(command, capture_output=True, text=True)
+        except OSError as e:
+            stop()
+            raise RuntimeError(f"{Path(command[0]).name} failed: {e}") from e
+        if out.returncode != 0:
+            stop()
+            raise RuntimeError(f"{Path(command[0]).name} failed: {(out.stderr or out.stdout).strip()}")
+    return f"host={root} port=5432 user=postgres dbname=postgres", stop
+
+def catalog_snapshot(conn):
+    return dict(zip(CATALOG_FIELDS, conn.execute(CATALOG_QUERY).fetchone()))
+
+def bench_migration(conn, migration, sql):
+    """Apply one migration in its own transaction: duration, locks held at commit, catalog delta
+
+    `conn` is in autocommit mode, so everything outside conn.transaction()
+    (snapshots, CONCURRENTLY migrations) runs on its own. When a CONCURRENTLY
+    migration fails, the statements before the failing one stay applied:
+    "partial" is set and "applied" counts them.
+    """
+    before = catalog_snapshot(conn)
+    existing = {row[0] for row in conn.execute("SELECT oid::bigint FROM pg_class")}
+    sql, own_transaction = strip_transaction_control(sql)
+    concurrent = any(stmt.get("concurrently") for stmt in migration["statements"])
+    result = {"file": migration["file"], "statements": len(migration["statements"]),
+              "own_transaction": own_transaction, "error": None, "partial": False, "applied": 0,
+              "locks": {}, "blocking": []}
+
+    start = time.perf_counter()
+    try:
+        if concurrent:
+            # CREATE INDEX CONCURRENTLY cannot run inside a transaction, and a
+            # multi-statement execute is one: run statement by statement,
+            # without lock sampling
+            for stmt in split_statements(tokenize(sql)):
+                conn.execute(sql[stmt[0][START]:stmt[-1][END]])
+                result["applied"] += 1
+        else:
+            with conn.transaction():
+                conn.execute(sql)
+                elapsed = time.perf_counter() - start
+                locks = conn.execute(LOCKS_QUERY).fetchall()
+                start = time.perf_counter() - elapsed
+    except Exception as e:
+        result["error"] = str(e).strip().splitlines()[0]
+        result["partial"] = concurrent and result["applied"] > 0
+        locks = []
+    result["ms"] = (time.perf_counter() - start) * 1000
+
+    modes = defaultdict(set)
+    for oid, mode, name in locks if not concurrent else []:
+        modes[mode].add(name)
+        # a lock on a table created by the migration blocks nobody
+        if oid in existing and LOCK_WEIGHTS.get(mode, 0) >= LOCK_WEIGHTS["ShareLock"]:
+            result["blocking"].append((name, mode))
+    result["locks"] = {mode: len(names) for mode, names in modes.items()}
+    result["blocking"] = sorted(set(result["blocking"]))
+    result["lock_score"] = sum(LOCK_WEIGHTS.get(mode, 0) for _, mode in result["blocking"])
+
+    after = catalog_snapshot(conn)
+    result["catalog"] = {field: after[field] - before[field] for field in CATALOG_FIELDS}
+    return result
+
+def print_bench(results, setup_ms, top):
+    ok = [r for r in results if not r["error"]]
+    total = sum(r["ms"] for r in results)
+    print(f"⏱️  {len(results)} migrations replayed in {total / 1000:.2f}s "
+          f"({len(ok)} ok, {len(results) - len(ok)} failed), setup {setup_ms:.0f} ms\n")
+
+    print("🐢 Slowest migrations:")
+    for r in sorted(results, key=lambda r: -r["ms"])[:top]:
+        flag = " ❌" if r["error"] else ""
+        print(f"  - {r['file']}: {r['ms']:.0f} ms, {r['statements']} statements{flag}")
+
+    locking = [r for r in results if r["lock_score"]]
+    print("\n🔒 Most lock-intensive (SHARE or stronger on tables that already existed):")
+    for r in sorted(locking, key=lambda r: (-r["lock_score"], -r["ms"]))[:top]:
+        exclusive = sorted(name for name, mode in r["blocking"] if mode == "AccessExclusiveLock")
+        others = len(r["blocking"]) - len(exclusive)
+        detail = f"ACCESS EXCLUSIVE on {', '.join(exclusive[:4])}" if exclusive else ""
+        if len(exclusive) > 4:
+            detail += f" +{len(exclusive) - 4}"
+        if others:
+            detail += f"{'; ' if detail else ''}{others} SHARE/EXCLUSIVE"
+        print(f"  - {r['file']}: score {r['lock_score']} — {detail}")
+    if not locking:
+        print("  (none)")
+
+    growth = {field: sum(r["catalog"][field] for r in ok) for field in CATALOG_FIELDS}
+    print(f"\n📈 Catalog growth: " + ", ".join(f"{growth[f]:+d} {f}" for f in CATALOG_FIELDS if f != "bytes")
+          + f", {growth['bytes'] / 1024 / 1024:+.1f} MB")
+    for r in sorted(ok, key=lambda r: -r["catalog"]["relations"])[:5]:
+        c = r["catalog"]
+        print(f"  - {r['file']}: {c['relations']:+d} relations, {c['columns']:+d} columns, "
+              f"{c['policies']:+d} policies, {c['functions']:+d} functions")
+
+    failed = [r for r in results if r["error"] and not r["partial"]]
+    if failed:
+        print(f"\n❌ Failed on a fresh database ({len(failed)}), rolled back:")
+        for r in failed:
+            print(f"  - {r['file']}: {r['error']}")
+    partial = [r for r in results if r["partial"]]
+    if partial:
+        print(f"\n❌ Failed part way ({len(partial)}), earlier statements stay applied (run outside a transaction):")
+        for r in partial:
+            print(f"  - {r['file']}: {r['applied']} of {r['statements']} statements applied, then {r['error']}")
+
+def bench(args):
+    try:
+        import psycopg
+    except ImportError:
+        print("❌ bench needs psycopg: pip install 'psycopg[binary]'")
+        return 1
+
+    migrations = load_migrations(jobs=args.jobs, use_cache=not args.no_cache)
+    if args.upto:
+        migrations = [m for m in migrations if m["file"] <= args.upto or m["version"] == args.upto]
+
+    stop = None
+    dsn = args.dsn
+    if dsn is None:
+        pg_bin = find_pg_bin(args.pg_bin)
+        if pg_bin is None:
+            print("❌ initdb not found: install PostgreSQL, or pass --pg-bin / --dsn")
+            return 1
+        print(f"🐘 Starting a throwaway Postgres ({pg_bin})...")
+        try:
+            dsn, stop = start_local_postgres(pg_bin)
+        except RuntimeError as e:
+            print(f"❌ {e}")
+            return 1
+
+    database = f"migration_bench_{os.getpid()}"
+    try:
+        with psycopg.connect(dsn, autocommit=True) as admin:
+            admin.execute(f"CREATE DATABASE {database} TEMPLATE template0 ENCODING 'UTF8'")
+        with psycopg.connect(psycopg.conninfo.make_conninfo(dsn, dbname=database), autocommit=True) as conn:
+            start = time.perf_counter()
+            for setup in (SUPABASE_SHIM, BASE_SCHEMA):
+                with conn.transaction():
+                    conn.execute(setup.read_text())
+            setup_ms = (time.perf_counter() - start) * 1000
+            print(f"🧱 {SUPABASE_SHIM.name} + {BASE_SCHEMA.name} applied, replaying {len(migrations)} migrations...\n")
+
+            results = []
+            for migration in migrations:
+                sql = (MIGRATIONS_DIR / migration["file"]).read_text(encoding="utf-8", errors="replace")
+                results.append(bench_migration(conn, migration, sql))
+    finally:
+        if args.dsn:
+            with psycopg.connect(dsn, autocommit=True) as admin:
+                admin.execute(f"DROP DATABASE IF EXISTS {database} WITH (FORCE)")
+        if stop is not None:
+            stop()
+
+    print_bench(results, setup_ms, args.top)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"setup_ms": setup_ms, "migrations": results}, f, indent=2)
+        print(f"\n📝 JSON report: {args.json}")
+    return 0
+
+# ============================================
+# MIGRATION TRACKING
+# ============================================
+
+TRACKING_TABLE = "supabase_migrations.schema_migrations"
+TRACKING_QUERY = f"SELECT version, name, statements FROM {TRACKING_TABLE}"
+
+def migration_name(filename, version):
+    """Name the Supabase CLI records for a file: '<version>_<name>.sql' -> '<name>'"""
+    return filename[len(version) + 1:-len(".sql")]
+
+def content_hash(texts):
+    """normalized_hash of SQL split in any way; None when there is no SQL at all
+
+    Semicolons are dropped so a file and the statements array the CLI stored
+    for it hash the same; '-- Already applied' placeholders hash to None.
+    """
+    tokens = [t for text in texts for t in tokenize(text)
+              if not (t[KIND] == "punct" and t[VALUE] == ";")]
+    return normalized_hash(tokens) if tokens else None
+
+def local_tracking(directory=None):
+    """Rows the CLI would record for each migration file, keyed by version"""
+    directory = Path(directory or MIGRATIONS_DIR)
+    rows, duplicates = {}, defaultdict(list)
+    for path in sorted(directory.glob("*.sql")):
+        version = parse_migration_filename(path.name)
+        if version is None:
+            continue
+        sql = path.read_text(encoding="utf-8", errors="replace")
+        statements = [sql[stmt[0][START]:stmt[-1][END]] for stmt in split_statements(tokenize(sql))]
+        duplicates[version].append(path.name)
+        rows[version] = {"version": version, "name": migration_name(path.name, version), "file": path.name,
+                         "statements": statements, "hash": content_hash(statements)}
+    duplicates = {v: files for v, files in duplicates.items() if len(files) > 1}
+    return rows, duplicates
+
+def parse_pg_array(text):
+    """Parse a text[] literal as written by COPY/\\copy: {a,"b c",NULL}"""
+    if text is None or text == "":
+        return []
+    if not (text.startswith("{") and text.endswith("}")):
+        raise ValueError(f"not an array literal: {text[:40]!r}")
+    items, i, body = [], 0, text[1:-1]
+    while i < len(body):
+        if body[i] == '"':
+            i += 1
+            value = []
+            while body[i] != '"':
+                if body[i] == "\\":
+                    i += 1
+                value.append(body[i])
+                i += 1
+            items.append("".join(value))
+            i += 1
+        else:
+            end = body.find(",", i)
+            end = len(body) if end < 0 else end
+            value = body[i:end].strip()
+            items.append(None if value.upper() == "NULL" else value)
+            i = end
+        i += 1  # the comma
+    return [item for item in items if item is not None]
+
+def load_tracking_dump(path):
+    """Rows of schema_migrations from a JSON list or a CSV \\copy with HEADER"""
+    import csv
+
+    path = Path(path)
+    if path.suffix == ".json":
+        rows = json.loads(path.read_text())
+    else:
+        csv.field_size_limit(sys.maxsize)
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        for row in rows:
+            row["statements"] = parse_pg_array(row.get("statements"))
+    return [(str(r["version"]), r.get("name"), r.get("statements") or []) for r in rows]
+
+def load_tracking_db(dsn):
+    import psycopg
+
+    with psycopg.connect(dsn, client_encoding="utf8") as conn:
+        return [(version, name, statements or []) for version, name, statements in conn.execute(TRACKING_QUERY)]
+
+def diff_tracking(local, remote_rows, duplicates=()):
+    """One pass over both sides with set operations
+
+    Returns missing (file not tracked), orphans (tracked, no file), renames
+    (an orphan whose name or content matches a missing file: the version was
+    changed, like 20260118 -> 20260118000000), name fixes, content drift
+    (file edited after being applied) and placeholders (nothing to compare).
+    """
+    remote = {version: {"version": version, "name": name, "statements": statements,
+                        "hash": content_hash(statements)}
+              for version, name, statements in remote_rows}
+    skip = set(duplicates)
+    local_versions = set(local) - skip
+    remote_versions = set(remote) - skip
+
+    missing = local_versions - remote_versions
+    orphans = remote_versions - local_versions
+    common = local_versions & remote_versions
+
+    by_name = {local[v]["name"]: v for v in missing}
+    by_hash = {local[v]["hash"]: v for v in missing if local[v]["hash"]}
+    renames = {}
+    for old in sorted(orphans):
+        new = by_name.get(remote[old]["name"]) or by_hash.get(remote[old]["hash"])
+        if new in missing and new not in renames.values():
+            renames[old] = new
+    missing -= set(renames.values())
+    orphans -= set(renames)
+
+    renamed_from = {new: old for old, new in renames.items()}
+    names = sorted(v for v in common | set(renamed_from)
+                   if local[v]["name"] != remote[renamed_from.get(v, v)]["name"])
+    placeholders = sorted(v for v in common if remote[v]["hash"] is None)
+    drift = sorted(v for v in common if remote[v]["hash"] is not None and remote[v]["hash"] != local[v]["hash"])
+    in_sync = sorted(v for v in common if remote[v]["hash"] == local[v]["hash"])
+    return {"missing": sorted(missing), "orphans": sorted(orphans), "renames": renames, "names": names,
+            "placeholders": placeholders, "drift": drift, "in_sync": in_sync,
+            "duplicates": {v: files for v, files in sorted(duplicates.items())}, "remote": remote}
+
+def sql_literal(value):
+    return "'" + value.replace("'", "''") + "'"
+
+def sql_text_array(values):
+    return "ARRAY[" + ", ".join(sql_literal(v) for v in values) + "]::text[]" if values else "'{}'::text[]"
+
+def render_tracking_repair(local, diff, mark_applied=(), refresh=False, delete_orphans=False):
+    """Idempotent repair script: every statement is a no-op once applied
+
+    Untracked files are only listed, left to 'supabase db push', except the
+    versions in `mark_applied` (already applied by hand), which are inserted.
+    Tracked versions without a local file (usually pushed from another
+    branch) are only listed too, unless `delete_orphans`.
+    """
+    t = TRACKING_TABLE
+    out = [f"-- Migration tracking repair generated by cleanup_migrations.py tracking",
+           f"-- {len(local)} local migrations; safe to run more than once", "", "BEGIN;", ""]
+
+    if diff["renames"]:
+        out.append("-- Versions renamed locally")
+        for old, new in sorted(diff["renames"].items()):
+            out.append(f"UPDATE {t} SET version = {sql_literal(new)}\n"
+                       f"WHERE version = {sql_literal(old)}\n"
+                       f"  AND NOT EXISTS (SELECT 1 FROM {t} WHERE version = {sql_literal(new)});")
+        out.append("")
+    if diff["names"]:
+        out.append("-- Names that differ from the file name")
+        for v in diff["names"]:
+            name = sql_literal(local[v]["name"])
+            out.append(f"UPDATE {t} SET name = {name} WHERE version = {sql_literal(v)} AND name IS DISTINCT FROM {name};")
+        out.append("")
+    if diff["orphans"] and delete_orphans:
+        out.append("-- Tracked versions without a local file (--delete-orphans)")
+        versions = ", ".join(sql_literal(v) for v in diff["orphans"])
+        out.append(f"DELETE FROM {t} WHERE version IN ({versions});")
+        out.append("")
+    elif diff["orphans"]:
+        out.append("-- Tracked without a local file, kept (--delete-orphans to forget them):")
+        out.extend(f"--   {v} ({diff['remote'][v]['name']})" for v in diff["orphans"])
+        out.append("")
+    if mark_applied:
+        out.append("-- Local migrations marked as already applied (--mark-applied)")
+        for v in sorted(mark_applied):
+            row = local[v]
+            out.append(f"INSERT INTO {t} (version, name, statements)\n"
+                       f"VALUES ({sql_literal(v)}, {sql_literal(row['name'])}, {sql_text_array(row['statements'])})\n"
+                       f"ON CONFLICT (version) DO NOTHING;")
+        out.append("")
+    pending = [v for v in diff["missing"] if v not in set(mark_applied)]
+    if pending:
+        out.append("-- Not tracked, left to 'supabase db push' (--mark-applied VERSION if already applied):")
+        out.extend(f"--   {local[v]['file']}" for v in pending)
+        out.append("")
+    refreshed = (diff["placeholders"] + diff["drift"]) if refresh else []
+    renamed_placeholders = [new for old, new in diff["renames"].items()
+                            if refresh and diff["remote"][old]["hash"] != local[new]["hash"]]
+    if refreshed or renamed_placeholders:
+        out.append("-- Statements refreshed from the local files")
+        for v in sorted(refreshed + renamed_placeholders):
+            statements = sql_text_array(local[v]["statements"])
+            out.append(f"UPDATE {t} SET statements = {statements}\n"
+                       f"WHERE version = {sql_literal(v)} AND statements IS DISTINCT FROM {statements};")
+        out.append("")
+
+    out.append("COMMIT;")
+    return "\n".join(out) + "\n"
+
+def print_tracking(local, diff, source):
+    print(f"📋 {len(local)} local migrations, {len(diff['remote'])} tracked in {source}\n")
+    print(f"  ✅ In sync: {len(diff['in_sync'])} (content verified)")
+    if diff["placeholders"]:
+        print(f"  ⚪ Tracked with placeholder statements: {len(diff['placeholders'])} (content not comparable)")
+
+    def section(title, items):
+        if items:
+            print(f"\n{title} ({len(items)}):")
+            for item in items:
+                print(f"  - {item}")
+
+    section("🔀 Renamed versions", [f"{old} -> {new} ({local[new]['file']})"
+                                   for old, new in sorted(diff["renames"].items())])
+    section("➕ Not tracked", [local[v]["file"] for v in diff["missing"]])
+    section("➖ Tracked without a local file", [f"{v} ({diff['remote'][v]['name']})" for v in diff["orphans"]])
+    renamed_from = {new: old for old, new in diff["renames"].items()}
+    section("✏️ Name differs", [f"{v}: {diff['remote'][renamed_from.get(v, v)]['name']} -> {local[v]['name']}"
+                               for v in diff["names"]])
+    section("⚠️ Edited after being applied", [local[v]["file"] for v in diff["drift"]])
+    section("⚠️ Duplicate local versions (not repaired, see cleanup)",
+            [f"{v}: {', '.join(files)}" for v, files in diff["duplicates"].items()])
+
+def tracking(args):
+    local, duplicates = local_tracking()
+    if args.dump:
+        source = args.dump
+        remote_rows = load_tracking_dump(args.dump)
+    else:
+        try:
+            import psycopg  # noqa: F401
+        except ImportError:
+            print("❌ tracking --dsn needs psycopg: pip install 'psycopg[binary]'")
+            return 1
+        source = TRACKING_TABLE
+        remote_rows = load_tracking_db(args.dsn)
+
+    diff = diff_tracking(local, remote_rows, duplicates)
+    print_tracking(local, diff, source)
+
+    mark_applied = diff["missing"] if args.mark_missing_applied else sorted(set(args.mark_applied))
+    unknown = [v for v in mark_applied if v not in diff["missing"]]
+    if unknown:
+        print(f"\n❌ --mark-applied: not an untracked local migration: {', '.join(unknown)}")
+        return 1
+    if diff["missing"] and len(mark_applied) < len(diff["missing"]):
+        print("\n💡 Untracked files are left to 'supabase db push'. If some were already applied by hand, "
+              "re-run with --mark-applied VERSION... (or --mark-missing-applied)")
+
+    if diff["orphans"] and not args.delete_orphans:
+        print("\n💡 Tracked versions without a local file are kept (often pushed from another branch). "
+              "Re-run with --delete-orphans to remove them from the history")
+
+    changes = (diff["renames"] or diff["names"] or (diff["orphans"] and args.delete_orphans) or mark_applied
+               or (args.refresh_statements and (diff["placeholders"] or diff["drift"])))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({k: v for k, v in diff.items() if k != "remote"}, f, indent=2)
+        print(f"\n📝 JSON report: {args.json}")
+    if not changes:
+        print("\n✅ Nothing to repair")
+        return 0
+    script = render_tracking_repair(local, diff, mark_applied=mark_applied, refresh=args.refresh_statements,
+                                    delete_orphans=args.delete_orphans)
+    with open(args.output, "w") as f:
+        f.write(script)
+    print(f"\n📝 Repair script: {args.output}")
+    print("   Review it, then run it in the SQL editor (or psql) against the same database")
+    return 0
+
+# ============================================
+# DUPLICATE CLEANUP
+# ============================================
+
 def analyze_migrations():
     """Analyze migration files and identify duplicates"""
     migrations_by_version = defaultdict(list)
@@ -57,10 +2897,20 @@ def analyze_migrations():
 
     return migrations_by_version, invalid_files
 
-def select_files_to_keep(migrations_by_version):
-    """Select which files to keep for each version"""
+def select_files_to_keep(migrations_by_version, parsed=None):
+    """Select which files to keep for each version
+
+    With `parsed` (file -> parsed migration), duplicates are compared by
+    content: files identical to the kept one are always deleted, and ties
+    on the filename score go to the file touching the most objects rather
+    than the largest one.
+    """
     to_keep = {}
     to_delete = []
+    parsed = parsed or {}
+
+    def object_count(f):
+        return len(parsed[f]["objects"]) if f in parsed else 0
 
     for version, files in migrations_by_version.items():
         if len(files) == 1:
@@ -68,24 +2918,26 @@ def select_files_to_keep(migrations_by_version):
             to_keep[version] = files[0]
         else:
             # Duplicates - score each file
-            scored_files = [(f, should_keep_migration(f), os.path.getsize(MIGRATIONS_DIR / f)) for f in files]
+            scored_files = [(f, should_keep_migration(f), object_count(f), os.path.getsize(MIGRATIONS_DIR / f))
+                            for f in files]
 
-            # Sort by score (desc), then by size (desc)
-            scored_files.sort(key=lambda x: (x[1], x[2]), reverse=True)
+            # Sort by score (desc), then by objects touched and size (desc)
+            scored_files.sort(key=lambda x: (x[1], x[2], x[3]), reverse=True)
 
             # Keep the best one
             to_keep[version] = scored_files[0][0]
 
             # Mark others for deletion
-            for f, _, _ in scored_files[1:]:
+            for f, _, _, _ in scored_files[1:]:
                 to_delete.append(f)
 
     return to_keep, to_delete
 
-def main():
+def cleanup(args):
     print("🔍 Analyzing migrations...\n")
 
     migrations_by_version, invalid_files = analyze_migrations()
+    parsed = {m["file"]: m for m in load_migrations(jobs=args.jobs, use_cache=not args.no_cache)}
 
     print(f"📊 Found {len(migrations_by_version)} unique versions")
     print(f"⚠️  Found {len(invalid_files)} invalid files\n")
@@ -96,14 +2948,19 @@ def main():
         print(f"🔁 Versions with duplicates ({len(duplicates)}):")
         for version, files in sorted(duplicates.items()):
             print(f"  {version}: {len(files)} files")
+            hashes = defaultdict(list)
+            for f in files:
+                hashes[parsed[f]["normalized_hash"]].append(f)
             for f in files:
                 size = os.path.getsize(MIGRATIONS_DIR / f)
                 score = should_keep_migration(f)
-                print(f"    - {f} ({size} bytes, score: {score})")
+                same = [g for g in hashes[parsed[f]["normalized_hash"]] if g != f]
+                note = f", identical to {', '.join(same)}" if same else ""
+                print(f"    - {f} ({size} bytes, {len(parsed[f]['objects'])} objects, score: {score}{note})")
         print()
 
     # Select files to keep/delete
-    to_keep, to_delete = select_files_to_keep(migrations_by_version)
+    to_keep, to_delete = select_files_to_keep(migrations_by_version, parsed)
 
     print(f"✅ Files to KEEP: {len(to_keep)}")
     print(f"🗑️  Files to DELETE: {len(to_delete) + len(invalid_files)}")
@@ -129,7 +2986,7 @@ def main():
         f.write("#!/bin/bash\n")
         f.write("# Auto-generated script to delete duplicate migrations\n")
         f.write("# Review carefully before running!\n\n")
-        f.write("cd /Users/samuelbaudon/easyco-onboarding/supabase/migrations\n\n")
+        f.write(f'cd "{MIGRATIONS_DIR}"\n\n')
         for filename in sorted(all_to_delete):
             f.write(f'rm "{filename}"\n')
         f.write(f'\necho "Deleted {len(all_to_delete)} files"\n')
@@ -138,5 +2995,98 @@ def main():
     print(f"\n📝 Delete script generated: {delete_script_path}")
     print("   Review it, then run: ./supabase/migrations/DELETE_DUPLICATES.sh")
 
+def analyze(args):
+    print("🔍 Analyzing migration content...\n")
+    stats = {}
+    migrations = load_migrations(jobs=args.jobs, use_cache=not args.no_cache, stats=stats)
+    analysis = analyze_content(migrations)
+    base = load_base_schema()
+    analysis["indexes"] = analyze_indexes(migrations, base)
+    analysis["lint"] = lint_migrations(migrations, base)
+    print_analysis(migrations, analysis, stats)
+    print()
+    print_index_analysis(analysis["indexes"])
+    print()
+    print_lint_summary(analysis["lint"])
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(analysis_to_json(migrations, analysis), f, indent=2)
+        print(f"\n📝 JSON report: {args.json}")
+    if args.dot:
+        depends_on = {file: deps for file, deps in analysis["depends_on"].items()}
+        write_dot(migrations, depends_on, args.dot)
+        print(f"📝 Dependency graph: {args.dot}")
+    if args.drop_sql:
+        write_index_drops(analysis["indexes"], args.drop_sql)
+        print(f"📝 DROP INDEX script: {args.drop_sql}")
+
+def main():
+    global MIGRATIONS_DIR
+
+    parser = argparse.ArgumentParser(description="Supabase migration cleanup and analysis")
+    parser.add_argument("--dir", type=Path, help=f"migrations directory (default: {MIGRATIONS_DIR})")
+    parser.add_argument("--jobs", type=int, default=None, help="parser processes (default: CPU count)")
+    parser.add_argument("--no-cache", action="store_true", help="ignore and do not write the parse cache")
+    sub = parser.add_subparsers(dest="command")
+
+    sub.add_parser("cleanup", help="duplicate/invalid files and delete script (default)")
+
+    p = sub.add_parser("analyze", help="content analysis: objects, identical/superseded files, dependency DAG")
+    p.add_argument("--json", help="write the full analysis as JSON")
+    p.add_argument("--dot", help="write the dependency DAG as Graphviz")
+    p.add_argument("--drop-sql", help="write DROP INDEX statements for the redundant indexes")
+
+    p = sub.add_parser("squash", help="replay migrations and write one consolidated baseline migration")
+    p.add_argument("--output", help="baseline file (default: supabase/baseline/<last version>_baseline.sql)")
+    p.add_argument("--upto", help="only squash migrations up to this version or filename")
+    p.add_argument("--no-base", action="store_true", help=f"do not replay {BASE_SCHEMA.name} first")
+
+    p = sub.add_parser("bench", help="replay migrations on a throwaway Postgres: duration, locks, catalog growth")
+    p.add_argument("--pg-bin", help="PostgreSQL bin directory with initdb/pg_ctl (default: $PG_BIN, PATH)")
+    p.add_argument("--dsn", help="use this server instead (a temporary database is created and dropped)")
+    p.add_argument("--upto", help="only replay migrations up to this version or filename")
+    p.add_argument("--top", type=int, default=10, help="rows per ranking (default: 10)")
+    p.add_argument("--json", help="write every migration's measurements as JSON")
+
+    p = sub.add_parser("lint", help="flag lock-heavy DDL (rewrites, full scans, non-concurrent indexes) with safer alternatives")
+    p.add_argument("--since", help="only report migrations after this version or filename")
+    p.add_argument("--large-tables", help="comma-separated tables to treat as large (default: built-in list)")
+    p.add_argument("--json", help="write the findings as JSON")
+    p.add_argument("--self-check", action="store_true", help="run the built-in lint cases instead")
+
+    p = sub.add_parser("tracking", help="diff supabase_migrations.schema_migrations against the files, write a repair script")
+    source = p.add_mutually_exclusive_group(required=True)
+    source.add_argument("--dump", help=f"CSV (\\copy ({TRACKING_QUERY}) TO ... CSV HEADER) or JSON export")
+    source.add_argument("--dsn", help="read the table directly (needs psycopg)")
+    p.add_argument("--output", default="repair_migration_tracking.sql", help="repair script (default: %(default)s)")
+    mark = p.add_mutually_exclusive_group()
+    mark.add_argument("--mark-applied", nargs="+", default=[], metavar="VERSION",
+                      help="insert these untracked versions as already applied (default: only list untracked files)")
+    mark.add_argument("--mark-missing-applied", action="store_true",
+                      help="insert every untracked version as already applied")
+    p.add_argument("--delete-orphans", action="store_true",
+                   help="delete tracked versions that have no local file (default: only list them)")
+    p.add_argument("--refresh-statements", action="store_true",
+                   help="also replace placeholder/outdated statements with the local SQL")
+    p.add_argument("--json", help="write the diff as JSON")
+
+    args = parser.parse_args()
+    if args.dir:
+        MIGRATIONS_DIR = args.dir
+
+    if args.command == "analyze":
+        analyze(args)
+    elif args.command == "squash":
+        return squash(args)
+    elif args.command == "bench":
+        return bench(args)
+    elif args.command == "lint":
+        return lint(args)
+    elif args.command == "tracking":
+        return tracking(args)
+    else:
+        cleanup(args)
+
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
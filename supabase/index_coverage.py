@@ -0,0 +1,361 @@
+#!/usr/bin/env python3
+"""
+Index Coverage Report
+Finds RLS predicates and foreign keys that no index can serve
+
+Every RLS policy is evaluated for each row a query touches: a predicate like
+`user_id = auth.uid()`, or an EXISTS on conversation_participants, without a
+matching index becomes a sequential scan per request. Foreign keys without an
+index on the referencing side make every cascading DELETE/UPDATE on the
+parent scan the child table.
+
+The schema is rebuilt by replaying schema.sql and the migrations (same parser
+and model as cleanup_migrations.py), then the columns compared with = / IN in
+policy USING / WITH CHECK clauses and the FK columns are cross-referenced
+against the index catalogue.
+
+Usage:
+    python index_coverage.py                    # report
+    python index_coverage.py --sql missing.sql  # also write the suggested CREATE INDEX
+    python index_coverage.py --json report.json
+"""
+
+import argparse
+import json
+from collections import defaultdict
+from pathlib import Path
+
+from cleanup_migrations import (
+    KIND, VALUE, count_label, index_catalogue, load_base_schema, load_migrations, quote_ident,
+    quote_qualified, replay_migrations, tokenize
+)
+
+# Postgres truncates identifiers beyond this length
+MAX_IDENT = 63
+
+# Suggested composite indexes keep at most this many leading columns
+MAX_INDEX_COLUMNS = 3
+
+# Words that end a FROM list inside a sub-SELECT
+FROM_END_WORDS = {"where", "group", "order", "limit", "having", "union", "except", "intersect", "on"}
+JOIN_WORDS = {"join", "inner", "left", "right", "full", "outer", "cross", "lateral"}
+
+# ============================================
+# PREDICATE COLUMNS
+# ============================================
+
+def _is(token, kind, value):
+    return token is not None and token[KIND] == kind and token[VALUE] == value
+
+def _close_paren(tokens, i):
+    """Index of the parenthesis closing tokens[i]"""
+    depth = 0
+    for j in range(i, len(tokens)):
+        if _is(tokens[j], "punct", "("):
+            depth += 1
+        elif _is(tokens[j], "punct", ")"):
+            depth -= 1
+            if depth == 0:
+                return j
+    return len(tokens) - 1
+
+def _name_at(tokens, i):
+    """Dotted name starting at tokens[i]: (parts, next index)"""
+    parts = []
+    while i < len(tokens) and tokens[i][KIND] in ("word", "ident"):
+        parts.append(tokens[i][VALUE])
+        if i + 1 < len(tokens) and _is(tokens[i + 1], "punct", "."):
+            i += 2
+        else:
+            i += 1
+            break
+    return parts, i
+
+def _from_tables(tokens, model):
+    """Tables of a FROM clause (joins included) as {alias: table}"""
+    aliases = {}
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token[KIND] in ("word", "ident") and token[VALUE] not in JOIN_WORDS:
+            parts, i = _name_at(tokens, i)
+            table = ".".join(parts) if len(parts) > 1 else f"public.{parts[0]}"
+            alias = parts[-1]
+            if i < len(tokens) and _is(tokens[i], "word", "as"):
+                i += 1
+            if i < len(tokens) and tokens[i][KIND] in ("word", "ident") \
+                    and tokens[i][VALUE] not in JOIN_WORDS | FROM_END_WORDS:
+                alias = tokens[i][VALUE]
+                i += 1
+            if table in model["tables"]:
+                aliases[alias] = table
+            if i < len(tokens) and _is(tokens[i], "word", "on"):
+                # ON <condition> up to the next JOIN
+                while i < len(tokens) and not (tokens[i][KIND] == "word" and tokens[i][VALUE] in JOIN_WORDS):
+                    i += 1
+        else:
+            i += 1
+    return aliases
+
+def _resolve(parts, local, model):
+    """Table owning a column reference, restricted to the tables of the current scope"""
+    column = parts[-1]
+    if len(parts) > 1:
+        table = local.get(parts[-2])
+        return table if table and column in model["tables"][table]["columns"] else None
+    for table in local.values():
+        if column in model["tables"][table]["columns"]:
+            return table
+    return None
+
+def _equality_columns(tokens, local, model, found):
+    """Columns of `local` tables compared with =, IN or = ANY at this level"""
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        if token[KIND] not in ("word", "ident"):
+            i += 1
+            continue
+        start = i
+        parts, i = _name_at(tokens, i)
+        after = tokens[i] if i < len(tokens) else None
+        before = tokens[start - 1] if start > 0 else None
+        if _is(after, "punct", "("):
+            continue  # function call (auth.uid(), lower(...))
+        if _is(after, "op", "=") or _is(after, "word", "in") or _is(before, "op", "="):
+            table = _resolve(parts, local, model)
+            if table is not None:
+                found[table].append(parts[-1])
+
+def predicate_scopes(tokens, local, model, scopes, trailing=()):
+    """Equality columns per table, one entry per SELECT scope of a predicate
+
+    Sub-SELECTs are scopes of their own: a correlated reference to the outer
+    table (messages.conversation_id inside the EXISTS) is a join parameter,
+    not a filter on that table, so only the sub-SELECT's FROM tables count.
+    """
+    flat = []
+    i = 0
+    while i < len(tokens):
+        if _is(tokens[i], "punct", "(") and _is(tokens[i + 1] if i + 1 < len(tokens) else None, "word", "select"):
+            end = _close_paren(tokens, i)
+            previous = tokens[i - 1] if i > 0 else None
+            sub_select(tokens[i + 2:end], model, scopes, in_list=_is(previous, "word", "in"))
+            i = end + 1
+        else:
+            flat.append(tokens[i])
+            i += 1
+    found = defaultdict(list)
+    _equality_columns(flat, local, model, found)
+    for table, column in trailing:
+        found[table].append(column)
+    scopes.extend((table, columns) for table, columns in found.items())
+
+def sub_select(tokens, model, scopes, in_list=False):
+    depth, from_at, end_at = 0, None, len(tokens)
+    for i, token in enumerate(tokens):
+        if _is(token, "punct", "("):
+            depth += 1
+        elif _is(token, "punct", ")"):
+            depth -= 1
+        elif depth == 0 and token[KIND] == "word":
+            if token[VALUE] == "from" and from_at is None:
+                from_at = i
+            elif from_at is not None and token[VALUE] in FROM_END_WORDS - {"on"}:
+                end_at = i
+                break
+    if from_at is None:
+        return
+    local = _from_tables(tokens[from_at + 1:end_at], model)
+    if not local:
+        return
+    trailing = []
+    if in_list:
+        # x IN (SELECT user_id FROM t WHERE ...): t.user_id comes after the WHERE columns
+        parts, _ = _name_at(tokens, 0)
+        table = _resolve(parts, local, model) if parts else None
+        if table is not None:
+            trailing.append((table, parts[-1]))
+    predicate_scopes(tokens[end_at:], local, model, scopes, trailing)
+
+def selective_columns(model, table, columns):
+    """Distinct predicate columns worth indexing: a boolean flag alone does not narrow a scan"""
+    types = model["tables"][table]["columns"]
+    kept = [c for c in dict.fromkeys(columns) if types[c]["type"].lower() not in ("boolean", "bool")]
+    return tuple(kept[:MAX_INDEX_COLUMNS])
+
+def policy_predicates(model):
+    """(table, columns) -> policies whose USING / WITH CHECK filter on those columns"""
+    predicates = defaultdict(set)
+    for policy in model["policies"].values():
+        table = policy["table"]
+        if table not in model["tables"]:
+            continue
+        local = {table.split(".", 1)[1]: table}
+        for clause in (policy["using"], policy["check"]):
+            if not clause:
+                continue
+            scopes = []
+            predicate_scopes(tokenize(clause), local, model, scopes)
+            for scope_table, columns in scopes:
+                columns = selective_columns(model, scope_table, columns)
+                if not columns:
+                    continue
+                predicates[(scope_table, columns)].add(f"{table}: {policy['policy']}")
+    return predicates
+
+def foreign_keys(model):
+    """(table, columns) -> referenced tables, with the cascade flag"""
+    keys = defaultdict(list)
+    for table, spec in model["tables"].items():
+        for constraint in spec["constraints"].values():
+            if constraint["type"] == "foreign_key" and constraint["columns"]:
+                ref = constraint["references"]
+                keys[(table, tuple(constraint["columns"]))].append({
+                    "references": ref["table"],
+                    "cascade": (ref.get("on_delete") or "").lower() in ("cascade", "set null", "set default")
+                })
+    return keys
+
+# ============================================
+# COVERAGE
+# ============================================
+
+def leading_columns(index):
+    columns = []
+    for key in index["keys"]:
+        if not key["column"]:
+            break
+        columns.append(key["column"])
+    return columns
+
+def coverage(catalogue, table, columns):
+    """full: an index starts with all the columns; leading: only the first one is usable; none"""
+    best = "none"
+    for index in catalogue.get(table, []):
+        if index["method"] != "btree" or index["where"]:
+            continue
+        leading = leading_columns(index)
+        if set(leading[:len(columns)]) == set(columns):
+            return "full", index["index"]
+        if leading and leading[0] in columns:
+            best = "leading"
+    return best, None
+
+def index_name(table, columns):
+    name = f"idx_{table.split('.', 1)[1]}_{'_'.join(columns)}"
+    return name[:MAX_IDENT]
+
+def suggest_ddl(table, columns):
+    return (f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {quote_ident(index_name(table, columns))} "
+            f"ON {quote_qualified(table)} ({', '.join(quote_ident(c) for c in columns)});")
+
+def find_uncovered(model, catalogue):
+    predicates = policy_predicates(model)
+    fks = foreign_keys(model)
+    report = {}
+    for key in set(predicates) | set(fks):
+        table, columns = key
+        if not columns:
+            continue
+        state, _ = coverage(catalogue, table, columns)
+        if state != "none":
+            continue
+        report[key] = {
+            "table": table, "columns": list(columns),
+            "policies": sorted(predicates.get(key, ())),
+            "foreign_keys": fks.get(key, [])
+        }
+
+    # (a) is served by (a, b): merge it into the longer suggestion
+    for key in sorted(report, key=lambda k: len(k[1])):
+        table, columns = key
+        longer = next((k for k in report if k[0] == table and len(k[1]) > len(columns)
+                       and k[1][:len(columns)] == columns), None)
+        if longer is not None:
+            merged = report.pop(key)
+            report[longer]["policies"] = sorted(set(report[longer]["policies"]) | set(merged["policies"]))
+            report[longer]["foreign_keys"] += merged["foreign_keys"]
+
+    rows = list(report.values())
+    for row in rows:
+        row["ddl"] = suggest_ddl(row["table"], row["columns"])
+        row["cascade"] = any(fk["cascade"] for fk in row["foreign_keys"])
+    rows.sort(key=lambda r: (-len(r["policies"]), not r["cascade"], r["table"], r["columns"]))
+    return rows, predicates, fks
+
+# ============================================
+# REPORT
+# ============================================
+
+def print_report(rows, predicates, fks):
+    covered = sum(1 for key in predicates if key not in {(r["table"], tuple(r["columns"])) for r in rows})
+    print(f"🔐 {len(predicates)} distinct RLS predicates, {len(fks)} foreign keys")
+    print(f"✅ {covered} RLS predicates served by an index\n")
+
+    hot = [r for r in rows if r["policies"]]
+    if hot:
+        print(f"🔥 Uncovered RLS predicates ({len(hot)}): sequential scan on every policy check")
+        for row in hot:
+            fk = " (also FK)" if row["foreign_keys"] else ""
+            print(f"  - {row['table']} ({', '.join(row['columns'])}){fk}: {count_label(len(row['policies']), 'policy')}")
+            for policy in row["policies"][:3]:
+                print(f"      {policy}")
+            if len(row["policies"]) > 3:
+                print(f"      ... {len(row['policies']) - 3} more")
+        print()
+
+    fk_only = [r for r in rows if not r["policies"]]
+    if fk_only:
+        print(f"🔗 Foreign keys without index ({len(fk_only)}):")
+        for row in fk_only:
+            refs = ", ".join(sorted({fk["references"] for fk in row["foreign_keys"]}))
+            cascade = " — ON DELETE cascades scan it" if row["cascade"] else ""
+            print(f"  - {row['table']} ({', '.join(row['columns'])}) → {refs}{cascade}")
+        print()
+
+    if rows:
+        print("💡 Suggested indexes:")
+        for row in rows:
+            print(f"  {row['ddl']}")
+    else:
+        print("✨ Every RLS predicate and foreign key has an index")
+
+def write_sql(rows, path):
+    with open(path, "w") as f:
+        f.write("-- Indexes suggested by index_coverage.py\n")
+        f.write("-- CONCURRENTLY: run outside a transaction (one statement at a time in the SQL editor)\n\n")
+        for row in rows:
+            reasons = []
+            if row["policies"]:
+                reasons.append(f"RLS: {count_label(len(row['policies']), 'policy')}")
+            if row["foreign_keys"]:
+                reasons.append("FK → " + ", ".join(sorted({fk["references"] for fk in row["foreign_keys"]})))
+            f.write(f"-- {', '.join(reasons)}\n{row['ddl']}\n")
+
+def main():
+    parser = argparse.ArgumentParser(description="RLS predicate and foreign key index coverage")
+    parser.add_argument("--dir", type=Path, help="migrations directory (default: supabase/migrations)")
+    parser.add_argument("--jobs", type=int, default=None, help="parser processes (default: CPU count)")
+    parser.add_argument("--no-cache", action="store_true", help="ignore and do not write the parse cache")
+    parser.add_argument("--sql", help="write the suggested CREATE INDEX statements")
+    parser.add_argument("--json", help="write the report as JSON")
+    args = parser.parse_args()
+
+    print("🔍 Checking index coverage of RLS predicates and foreign keys...\n")
+    migrations = load_migrations(args.dir, jobs=args.jobs, use_cache=not args.no_cache)
+    model = replay_migrations(load_base_schema() + migrations)
+    catalogue = index_catalogue(model, migrations)
+    rows, predicates, fks = find_uncovered(model, catalogue)
+    print_report(rows, predicates, fks)
+
+    if args.sql:
+        write_sql(rows, args.sql)
+        print(f"\n📝 SQL written: {args.sql}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(rows, f, indent=2)
+        print(f"📝 JSON report: {args.json}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+"""
+Matching Benchmark
+Times calculate_match_score() (028_create_matching_system.sql) at increasing
+scale on a local Postgres, to measure rewrites against a baseline
+
+For every scale NxM the scratch database (squashed schema, see
+plan_regression.py) is reseeded with N searchers and M properties (M/2
+owners), then every searcher x property pair is scored by each variant:
+
+    function   - one statement, calculate_match_score() called per pair
+                 (LATERAL): the cost of the plpgsql function itself
+    rpc        - one round trip per pair, like generateMatchesForSearcher()
+                 in lib/services/enhanced-matching-service.ts (sampled)
+    set_based  - the same scoring as a single join over user_profiles
+
+Extra variants come from SQL files (--variant name=file.sql): statements
+before the last one are setup, run after each seeding (CREATE OR REPLACE a
+function, refresh a precomputed match table...); the last one is the timed
+query and must return searcher_id, property_id, total_score for all the
+seeded searchers x properties. Results are compared with the function
+variant (checksum of the scores) so a rewrite cannot silently change them.
+
+Plans are captured with EXPLAIN (ANALYZE, BUFFERS) for every variant and,
+through auto_explain, inside the plpgsql function.
+
+Usage:
+    python match_benchmark.py                              # throwaway Postgres
+    python match_benchmark.py --scales 100x1000,500x5000
+    python match_benchmark.py --variant precomputed=match_table.sql --json match.json
+"""
+
+import argparse
+import csv
+import json
+import random
+import statistics
+import sys
+import time
+import uuid
+from pathlib import Path
+
+from cleanup_migrations import END, START, split_statements, tokenize
+from plan_regression import CITIES, CITY_WEIGHTS, add_database_arguments, copy_rows, scratch_database
+
+DEFAULT_SCALES = "10x100,50x200,100x500,200x1000"
+CORE_VALUES = ["respect", "cleanliness", "communication", "privacy", "sharing", "sustainability", "fun", "calm"]
+
+# calculate_match_score reads user_profiles.pets_allowed, which no migration
+# ever adds: without that column the function fails as soon as both profiles
+# exist. Applied to the scratch database only.
+SCRATCH_FIXES = [
+    ("user_profiles.pets_allowed", "ALTER TABLE public.user_profiles ADD COLUMN IF NOT EXISTS pets_allowed BOOLEAN"),
+]
+
+VARIANTS = {
+    "function": """
+        SELECT s.user_id AS searcher_id, p.id AS property_id, r.total_score
+        FROM public.user_profiles s
+        CROSS JOIN public.properties p
+        CROSS JOIN LATERAL public.calculate_match_score(s.user_id, p.owner_id, p.id) r
+        WHERE s.user_type = 'searcher'
+    """,
+    # Same scoring as the function, branch by branch (NULLs included)
+    "set_based": """
+        SELECT s.user_id AS searcher_id, p.id AS property_id,
+          CASE WHEN o.user_id IS NULL THEN 0 ELSE
+            25
+            + CASE WHEN s.current_city IS NOT NULL AND o.current_city IS NOT NULL THEN
+                CASE WHEN lower(s.current_city) = lower(o.current_city) THEN 25
+                     WHEN o.city IS NULL THEN 0
+                     WHEN lower(s.current_city) = lower(o.city) THEN 20
+                     ELSE 5 END
+              ELSE 10 END
+            + least(15 + CASE WHEN s.smoking_allowed = o.smoking_allowed THEN 2 ELSE 0 END
+                       + CASE WHEN s.pets_allowed = o.pets_allowed THEN 2 ELSE 0 END
+                       + CASE WHEN abs(s.sociability_level - o.sociability_level) <= 1 THEN 1 ELSE 0 END, 20)
+            + 12
+            + least(8 + CASE WHEN s.core_values && o.core_values THEN 2 ELSE 0 END, 10)
+          END AS total_score
+        FROM public.user_profiles s
+        CROSS JOIN public.properties p
+        LEFT JOIN public.user_profiles o ON o.user_id = p.owner_id
+        WHERE s.user_type = 'searcher'
+    """,
+}
+
+# Pairs in the order the service loop would send them
+PAIRS = """
+    SELECT s.user_id, p.owner_id, p.id FROM public.user_profiles s CROSS JOIN public.properties p
+    WHERE s.user_type = 'searcher' LIMIT %s
+"""
+RPC_CALL = "SELECT * FROM public.calculate_match_score(%s, %s, %s)"
+
+# ============================================
+# DATA
+# ============================================
+
+def parse_scales(text):
+    scales = []
+    for item in text.split(","):
+        searchers, _, properties = item.strip().partition("x")
+        scales.append((int(searchers), int(properties)))
+    return scales
+
+def profile_row(rng, user_id, user_type):
+    """user_id, user_type + every column calculate_match_score reads, ~10% missing"""
+    def maybe(value):
+        return None if rng.random() < 0.1 else value
+
+    city = rng.choices(CITIES, CITY_WEIGHTS)[0]
+    return (user_id, user_type, maybe(city if rng.random() < 0.8 else city.lower()),
+            maybe(rng.choices(CITIES, CITY_WEIGHTS)[0]), maybe(rng.random() < 0.2), maybe(rng.random() < 0.4),
+            maybe(rng.randint(1, 10)), maybe(rng.sample(CORE_VALUES, rng.randint(1, 4))))
+
+def seed(conn, searchers, properties, seed_value):
+    """Empty the user tables and load N searchers, M properties and their owners"""
+    rng = random.Random(seed_value)
+    new_id = lambda: uuid.UUID(int=rng.getrandbits(128), version=4)
+    searcher_ids = [new_id() for _ in range(searchers)]
+    owner_ids = [new_id() for _ in range(max(1, properties // 2))]
+
+    conn.execute("TRUNCATE auth.users, public.users, public.user_profiles, public.properties CASCADE")
+    with conn.transaction():
+        conn.execute("SET LOCAL session_replication_role = replica")
+        users = [(u, "searcher") for u in searcher_ids] + [(u, "owner") for u in owner_ids]
+        copy_rows(conn, "auth.users", ("id", "email"), ((u, f"{u}@example.test") for u, _ in users))
+        copy_rows(conn, "users", ("id", "email", "full_name", "user_type"),
+                  ((u, f"{u}@example.test", "Bench User", t) for u, t in users))
+        copy_rows(conn, "user_profiles", ("user_id", "user_type", "current_city", "city", "smoking_allowed",
+                                          "pets_allowed", "sociability_level", "core_values"),
+                  (profile_row(rng, u, t) for u, t in users))
+        copy_rows(conn, "properties", ("id", "owner_id", "title", "property_type", "address", "city", "postal_code",
+                                       "monthly_rent", "status", "is_available"),
+                  ((new_id(), rng.choice(owner_ids), f"Colocation {i}", "apartment", f"Rue {i}",
+                    rng.choices(CITIES, CITY_WEIGHTS)[0], "1000", rng.randint(400, 1500), "published", True)
+                   for i in range(properties)))
+    conn.execute("ANALYZE auth.users, public.users, public.user_profiles, public.properties")
+
+def load_variant(spec):
+    """name=file.sql -> (name, setup statements, timed query)"""
+    name, _, path = spec.partition("=")
+    text = Path(path).read_text()
+    statements = [text[st[0][START]:st[-1][END]] for st in split_statements(tokenize(text))]
+    if not name or not statements:
+        raise ValueError(f"invalid variant {spec!r}: expected name=file.sql with at least one query")
+    return name, statements[:-1], statements[-1]
+
+# ============================================
+# MEASURES
+# ============================================
+
+def time_query(conn, sql, runs):
+    """Median wall time of the whole scoring, results consumed server-side"""
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        count, _ = conn.execute(f"SELECT count(*), sum(total_score) FROM ({sql}) v").fetchone()
+        timings.append((time.perf_counter() - start) * 1000)
+    return statistics.median(timings), count
+
+def checksum(conn, sql):
+    return conn.execute(f"""
+        SELECT md5(string_agg(searcher_id::text || property_id::text || total_score, ','
+                              ORDER BY searcher_id, property_id)) FROM ({sql}) v
+    """).fetchone()[0]
+
+def explain(conn, sql):
+    return conn.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}").fetchone()[0][0]
+
+def time_rpc(conn, sample):
+    """One statement per pair, like the service loop; returns (ms per call, calls)"""
+    pairs = conn.execute(PAIRS, (sample,)).fetchall()
+    start = time.perf_counter()
+    for pair in pairs:
+        conn.execute(RPC_CALL, pair).fetchall()
+    return (time.perf_counter() - start) * 1000 / max(len(pairs), 1), len(pairs)
+
+def nested_plans(conn):
+    """auto_explain of one calculate_match_score() call: the statements inside the function"""
+    pair = conn.execute(PAIRS, (1,)).fetchone()
+    messages = []
+    handler = lambda diag: messages.append(diag.message_primary or "")
+    try:
+        conn.execute("LOAD 'auto_explain'")
+    except Exception as e:
+        return None, str(e).strip().splitlines()[0]
+    conn.add_notice_handler(handler)
+    try:
+        for setting in ("auto_explain.log_min_duration = 0", "auto_explain.log_analyze = on",
+                        "auto_explain.log_buffers = on", "auto_explain.log_nested_statements = on",
+                        "auto_explain.log_format = 'json'", "client_min_messages = log"):
+            conn.execute(f"SET {setting}")
+        conn.execute(RPC_CALL, pair).fetchall()
+    finally:
+        conn.execute("RESET client_min_messages")
+        conn.execute("SET auto_explain.log_min_duration = -1")
+        conn.remove_notice_handler(handler)
+    plans = []
+    for message in messages:
+        _, _, body = message.partition("plan:")
+        if body.strip().startswith("{"):
+            plans.append(json.loads(body))
+    return plans, None
+
+def plan_summary(plan):
+    node = plan["Plan"]
+    index = f" using {node['Index Name']}" if "Index Name" in node else ""
+    return f"{node['Node Type']}{index}, {node.get('Actual Total Time', 0):.3f} ms"
+
+def run_scale(conn, searchers, properties, variants, args):
+    seed(conn, searchers, properties, args.seed)
+    pairs = searchers * properties
+    result = {"searchers": searchers, "properties": properties, "pairs": pairs, "variants": {}}
+    reference = None
+    for name, (setup, sql) in variants.items():
+        entry = {"error": None}
+        try:
+            start = time.perf_counter()
+            for statement in setup:
+                conn.execute(statement)
+            entry["setup_ms"] = (time.perf_counter() - start) * 1000
+            entry["ms"], rows = time_query(conn, sql, args.runs)
+            entry["pairs_per_s"] = pairs / entry["ms"] * 1000
+            entry["checksum"] = checksum(conn, sql)
+            entry["plan"] = explain(conn, sql)
+            if rows != pairs:
+                entry["error"] = f"{rows} rows for {pairs} pairs"
+            reference = reference or entry["checksum"]
+            entry["same_scores"] = entry["checksum"] == reference
+        except Exception as e:
+            entry["error"] = str(e).strip().splitlines()[0]
+        result["variants"][name] = entry
+
+    if args.rpc_sample:
+        try:
+            ms, calls = time_rpc(conn, args.rpc_sample)
+            result["variants"]["rpc"] = {"ms": ms * pairs, "pairs_per_s": 1000 / ms, "sampled_calls": calls,
+                                         "error": None, "same_scores": True}
+        except Exception as e:
+            result["variants"]["rpc"] = {"error": str(e).strip().splitlines()[0]}
+    return result
+
+# ============================================
+# REPORT
+# ============================================
+
+def print_curve(results):
+    """Throughput per scale, bars relative to the best scale of each variant"""
+    names = list(dict.fromkeys(name for r in results for name in r["variants"]))
+    for name in names:
+        best = max((r["variants"][name].get("pairs_per_s", 0) for r in results if name in r["variants"]), default=0)
+        print(f"\n📈 {name}" + (" (estimated from a sample of calls)" if name == "rpc" else ""))
+        for r in results:
+            v = r["variants"].get(name)
+            if v is None:
+                continue
+            scale = f"{r['searchers']}×{r['properties']}"
+            if v["error"]:
+                print(f"  {scale:>11}  ❌ {v['error']}")
+                continue
+            bar = "█" * max(1, round(30 * v["pairs_per_s"] / best))
+            baseline = r["variants"].get("function", {})
+            speedup = (f"  ×{v['pairs_per_s'] / baseline['pairs_per_s']:.1f} vs function"
+                       if name != "function" and baseline.get("pairs_per_s") else "")
+            mismatch = "  ❌ scores differ from function" if not v.get("same_scores", True) else ""
+            print(f"  {scale:>11}  {r['pairs']:>9,} pairs  {v['ms']:10.1f} ms  "
+                  f"{v['pairs_per_s']:>11,.0f} pairs/s  {bar:30}{speedup}{mismatch}")
+
+def write_csv(path, results):
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["variant", "searchers", "properties", "pairs", "ms", "pairs_per_s", "error"])
+        for r in results:
+            for name, v in r["variants"].items():
+                writer.writerow([name, r["searchers"], r["properties"], r["pairs"], v.get("ms"),
+                                 v.get("pairs_per_s"), v.get("error")])
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark calculate_match_score() and matching rewrites")
+    add_database_arguments(parser, synthetic=False)
+    parser.add_argument("--scales", default=DEFAULT_SCALES, help=f"searchers x properties (default {DEFAULT_SCALES})")
+    parser.add_argument("--variant", action="append", default=[], help="extra variant: name=file.sql (repeatable)")
+    parser.add_argument("--runs", type=int, default=3, help="timed runs per variant and scale (median)")
+    parser.add_argument("--rpc-sample", type=int, default=500, help="pairs timed one call at a time (0: skip)")
+    parser.add_argument("--json", help="write timings and plans as JSON")
+    parser.add_argument("--csv", help="write the throughput curve as CSV")
+    args = parser.parse_args()
+
+    try:
+        import psycopg
+    except ImportError:
+        print("❌ psycopg is required: pip install 'psycopg[binary]'")
+        return 1
+
+    try:
+        scales = parse_scales(args.scales)
+        variants = {name: ([], sql) for name, sql in VARIANTS.items()}
+        for spec in args.variant:
+            name, setup, sql = load_variant(spec)
+            variants[name] = (setup, sql)
+    except (ValueError, OSError) as e:
+        print(f"❌ {e}")
+        return 1
+
+    results = []
+    try:
+        with scratch_database(psycopg, args, f"match_benchmark_{args.seed}") as conn:
+            for column, statement in SCRATCH_FIXES:
+                table, _, name = column.partition(".")
+                if name not in {c for (c,) in conn.execute(
+                        "SELECT column_name FROM information_schema.columns WHERE table_name = %s", (table,))}:
+                    conn.execute(statement)
+                    print(f"🩹 Scratch database only: added missing {column}")
+
+            for searchers, properties in scales:
+                print(f"⏱️  {searchers} searchers × {properties} properties...")
+                results.append(run_scale(conn, searchers, properties, variants, args))
+            plans, error = nested_plans(conn)
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return 1
+
+    print_curve(results)
+    print("\n🔬 Inside calculate_match_score() (auto_explain, one call)")
+    if error:
+        print(f"  ⚠️  auto_explain unavailable: {error}")
+    for plan in plans or []:
+        print(f"  {' '.join(plan['Query Text'].split())[:70]:70}  {plan_summary(plan)}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"scales": results, "function_plans": plans}, f, indent=2, default=str)
+        print(f"\n📝 JSON report: {args.json}")
+    if args.csv:
+        write_csv(args.csv, results)
+        print(f"📝 CSV curve: {args.csv}")
+    failed = any(v["error"] or not v.get("same_scores", True) for r in results for v in r["variants"].values())
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
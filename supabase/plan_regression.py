@@ -0,0 +1,505 @@
+#!/usr/bin/env python3
+"""
+Query Plan Regression Suite
+Checks that the hot queries behind 127_add_scalability_indexes.sql really use
+their indexes, at a realistic data volume
+
+A local Postgres (throwaway cluster, or --dsn) gets the current schema: the
+migrations squashed by cleanup_migrations.py on top of local_shim.sql. It is
+then bulk-loaded with COPY with synthetic users, properties, conversations,
+messages, reactions, notifications and matches, skewed like real traffic
+(a few very active users and conversations). Every hot query runs under
+EXPLAIN (ANALYZE, BUFFERS) with the busiest user/conversation as parameters.
+
+A query fails when its plan reads a table of --min-rows rows or more with a
+sequential scan (filtered or not, e.g. the build side of a hash join) that
+the query does not list in "seq_scan_allowed", or when its median execution
+time exceeds its budget. Each query also runs once with index scans
+disabled, which measures the speed-up the migration comments promise
+("10-100x").
+
+Usage:
+    python plan_regression.py                    # 5k users, throwaway Postgres
+    python plan_regression.py --users 50000      # bigger dataset
+    python plan_regression.py --dsn "postgresql://postgres@localhost:54322/postgres"
+    python plan_regression.py --json plans.json  # keep the plans
+
+Exit code 1 when a query regresses, so it can run in CI.
+"""
+
+import argparse
+import json
+import random
+import re
+import statistics
+import sys
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from cleanup_migrations import (
+    END, START, SUPABASE_SHIM, find_pg_bin, load_base_schema, load_migrations, render_baseline,
+    replay_migrations, split_statements, start_local_postgres, tokenize
+)
+
+# Cities weighted like the user base (Brussels first)
+CITIES = ["Bruxelles", "Ixelles", "Etterbeek", "Saint-Gilles", "Uccle", "Schaerbeek", "Liège", "Namur",
+          "Gand", "Anvers", "Louvain", "Mons"]
+CITY_WEIGHTS = [30, 15, 10, 8, 7, 6, 6, 5, 4, 4, 3, 2]
+EMOJIS = ["👍", "❤️", "😂", "😮", "😢", "🎉"]
+
+# Default budgets come from the migration comments ("Index scan = 1-5ms");
+# "seq_scan_allowed" lists the tables a query may read with a sequential scan
+HOT_QUERIES = [
+    {
+        "name": "inbox: conversations of a user",
+        "index": "idx_conversation_participants_user_conversation",
+        "sql": "SELECT cp.*, c.id, c.type, c.name, c.updated_at FROM public.conversation_participants cp "
+               "JOIN public.conversations c ON c.id = cp.conversation_id WHERE cp.user_id = %(user_id)s",
+        "budget_ms": 5
+    },
+    {
+        "name": "inbox: participants of the user's conversations",
+        "index": None,
+        "sql": "SELECT cp.*, u.full_name, u.avatar_url FROM public.conversation_participants cp "
+               "LEFT JOIN public.users u ON u.id = cp.user_id WHERE cp.conversation_id = ANY(%(conversation_ids)s)",
+        "budget_ms": 5
+    },
+    {
+        "name": "inbox: last message per conversation (RPC body)",
+        "index": "idx_messages_conversation_created",
+        "sql": "SELECT * FROM (SELECT m.*, u.full_name, ROW_NUMBER() OVER (PARTITION BY m.conversation_id "
+               "ORDER BY m.created_at DESC) AS rn FROM public.messages m LEFT JOIN public.users u ON m.sender_id = u.id "
+               "WHERE m.conversation_id = ANY(%(conversation_ids)s) AND m.deleted = FALSE) r WHERE rn = 1",
+        "budget_ms": 20
+    },
+    {
+        "name": "conversation: message history page",
+        "index": "idx_messages_conversation_created",
+        "sql": "SELECT * FROM public.messages WHERE conversation_id = %(conversation_id)s "
+               "ORDER BY created_at DESC LIMIT 50",
+        "budget_ms": 5
+    },
+    {
+        "name": "conversation: mark as read (trigger)",
+        "index": "idx_messages_conversation_sender_read",
+        "sql": "SELECT id FROM public.messages WHERE conversation_id = %(conversation_id)s "
+               "AND sender_id <> %(user_id)s AND deleted = FALSE AND created_at <= now()",
+        "budget_ms": 10
+    },
+    {
+        "name": "conversation: reaction counts",
+        "index": "idx_message_reactions_message_emoji",
+        "sql": "SELECT emoji, count(*) FROM public.message_reactions WHERE message_id = %(message_id)s GROUP BY emoji",
+        "budget_ms": 2
+    },
+    {
+        "name": "conversation: typing indicators",
+        "index": "idx_typing_indicators_conversation_user",
+        "sql": "SELECT user_id FROM public.typing_indicators WHERE conversation_id = %(conversation_id)s",
+        "budget_ms": 2
+    },
+    {
+        "name": "matching: profile lookup",
+        "index": "idx_user_profiles_user_completion",
+        "sql": "SELECT user_id, profile_completion_score FROM public.user_profiles WHERE user_id = %(user_id)s",
+        "budget_ms": 2
+    },
+    {
+        "name": "matching: best matches of a searcher",
+        "index": "idx_matches_searcher_score",
+        "sql": "SELECT * FROM public.matches WHERE searcher_id = %(user_id)s ORDER BY total_score DESC LIMIT 20",
+        "budget_ms": 5
+    },
+    {
+        "name": "notifications: feed",
+        "index": "idx_notifications_user_created",
+        "sql": "SELECT * FROM public.notifications WHERE user_id = %(user_id)s ORDER BY created_at DESC LIMIT 20",
+        "budget_ms": 5
+    },
+    {
+        "name": "notifications: unread badge",
+        "index": "idx_notifications_user_read",
+        "sql": "SELECT count(*) FROM public.notifications WHERE user_id = %(user_id)s AND read = FALSE",
+        "budget_ms": 5
+    },
+    {
+        "name": "properties: search by city",
+        "index": "idx_properties_city_status_available",
+        "sql": "SELECT id, title, monthly_rent FROM public.properties WHERE city = %(city)s "
+               "AND status = 'published' AND is_available = TRUE ORDER BY created_at DESC LIMIT 20",
+        "budget_ms": 10
+    },
+]
+
+DISABLE_INDEXES = "SET LOCAL enable_indexscan = off; SET LOCAL enable_indexonlyscan = off; SET LOCAL enable_bitmapscan = off"
+
+# ============================================
+# SCHEMA
+# ============================================
+
+def load_schema(conn):
+    """Shim + squashed baseline, statement by statement; returns the failures"""
+    migrations = load_migrations()
+    base = load_base_schema()
+    sql = render_baseline(replay_migrations(base + migrations), migrations, base)
+    failures = []
+    for source, text in ((SUPABASE_SHIM.name, SUPABASE_SHIM.read_text()), ("baseline", sql)):
+        for st in split_statements(tokenize(text)):
+            statement = text[st[0][START]:st[-1][END]]
+            try:
+                with conn.transaction():
+                    conn.execute(statement)
+            except Exception as e:
+                failures.append(f"{source}: {str(e).strip().splitlines()[0]}")
+    return failures
+
+# ============================================
+# SYNTHETIC DATA
+# ============================================
+
+def table_columns(conn, table):
+    """column -> (type, required) where required = NOT NULL without default"""
+    schema, _, name = table.rpartition(".")
+    rows = conn.execute("""
+        SELECT column_name, data_type, is_nullable = 'NO' AND column_default IS NULL AND is_generated = 'NEVER'
+        FROM information_schema.columns WHERE table_schema = %s AND table_name = %s
+    """, (schema or "public", name)).fetchall()
+    return {name: (data_type, required) for name, data_type, required in rows}
+
+def check_choices(conn, table):
+    """column -> first value allowed by a `column = ANY (ARRAY[...])` CHECK"""
+    choices = {}
+    for (definition,) in conn.execute(
+            "SELECT pg_get_constraintdef(oid) FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'c'",
+            (table,)):
+        m = re.search(r"\(+(\w+)\)?(?:::\w+)? = ANY \(+ARRAY\['([^']*)'", definition)
+        if m:
+            choices.setdefault(m.group(1), m.group(2))
+    return choices
+
+def filler(data_type, choice):
+    """Constant value for a required column the generator does not know about"""
+    if choice is not None:
+        return choice
+    if data_type in ("integer", "bigint", "smallint", "numeric", "real", "double precision"):
+        return 0
+    if data_type == "boolean":
+        return False
+    if data_type == "uuid":
+        return uuid.UUID(int=0)
+    if data_type.startswith("timestamp") or data_type == "date":
+        return datetime(2025, 1, 1, tzinfo=timezone.utc)
+    if data_type in ("json", "jsonb"):
+        return "{}"
+    if data_type == "ARRAY":
+        return "{}"
+    return "-"
+
+def copy_rows(conn, table, columns, rows):
+    """COPY generated tuples into <table>; columns missing from the schema are dropped,
+    required columns the generator does not provide get a constant filler"""
+    schema = table_columns(conn, table)
+    keep = [i for i, c in enumerate(columns) if c in schema]
+    choices = check_choices(conn, table)
+    extra = [c for c, (_, required) in schema.items() if required and c not in columns]
+    extra_values = tuple(filler(schema[c][0], choices.get(c)) for c in extra)
+    names = [columns[i] for i in keep] + extra
+
+    count = 0
+    start = time.perf_counter()
+    with conn.cursor() as cur:
+        with cur.copy(f"COPY {table} ({', '.join(names)}) FROM STDIN") as copy:
+            for row in rows:
+                copy.write_row(tuple(row[i] for i in keep) + extra_values)
+                count += 1
+    return count, time.perf_counter() - start
+
+class SyntheticData:
+    """Deterministic dataset, skewed so that user 0 and conversation 0 are the busiest"""
+
+    def __init__(self, users, seed=42):
+        self.rng = random.Random(seed)
+        self.users = users
+        self.epoch = datetime(2025, 1, 1, tzinfo=timezone.utc)
+        self.user_ids = [self.uuid() for _ in range(users)]
+        self.owners = self.user_ids[:max(1, users // 10)]
+        self.property_ids = []
+        self.conversations = []  # (id, [participants])
+        self.reacted_message = None
+
+    def uuid(self):
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def skewed(self, n, power=3):
+        """Index in [0, n) biased towards 0"""
+        return int(n * self.rng.random() ** power)
+
+    def at(self, seconds):
+        return self.epoch + timedelta(seconds=seconds)
+
+    def auth_users(self):
+        for i, user_id in enumerate(self.user_ids):
+            yield user_id, f"user{i}@example.test", self.at(i)
+
+    def public_users(self):
+        for i, user_id in enumerate(self.user_ids):
+            user_type = "owner" if i < len(self.owners) else ("resident" if i % 3 == 0 else "searcher")
+            yield user_id, f"user{i}@example.test", f"User {i}", user_type, self.at(i)
+
+    def user_profiles(self):
+        for i, user_id in enumerate(self.user_ids):
+            user_type = "owner" if i < len(self.owners) else "searcher"
+            yield user_id, user_type, self.rng.randint(0, 100)
+
+    def properties(self):
+        for i in range(max(1, self.users // 5)):
+            property_id = self.uuid()
+            self.property_ids.append(property_id)
+            city = self.rng.choices(CITIES, CITY_WEIGHTS)[0]
+            status = self.rng.choices(["published", "draft", "rented", "archived"], [70, 15, 10, 5])[0]
+            yield (property_id, self.rng.choice(self.owners), f"Colocation {i}", "apartment", f"Rue {i}", city,
+                   "1000", self.rng.randint(400, 1500), status, self.rng.random() < 0.7, self.at(i * 60))
+
+    def conversations_and_participants(self):
+        conversations, participants = [], []
+        for i in range(self.users * 2):
+            conversation_id = self.uuid()
+            a = self.skewed(self.users)
+            b = self.rng.randrange(self.users)
+            if a == b:
+                b = (b + 1) % self.users
+            members = [self.user_ids[a], self.user_ids[b]]
+            self.conversations.append((conversation_id, members))
+            conversations.append((conversation_id, "direct", members[0], self.at(i * 30), self.at(i * 30)))
+            participants.extend((self.uuid(), conversation_id, member, "member") for member in members)
+        return conversations, participants
+
+    def messages(self, per_conversation):
+        sent = 0
+        for i, (conversation_id, members) in enumerate(self.conversations):
+            count = per_conversation * 40 if i == 0 else 1 + int(self.rng.expovariate(1 / per_conversation))
+            for j in range(count):
+                sent += 1
+                yield (self.uuid(), conversation_id, members[j % 2], f"Message {j}", "text",
+                       self.rng.random() < 0.02, self.at(sent))
+
+    def reactions(self, messages):
+        for message_id, conversation_id, sender, *_ in messages:
+            if self.rng.random() < 0.1:
+                self.reacted_message = self.reacted_message or message_id
+                for emoji in self.rng.sample(EMOJIS, self.rng.randint(1, 3)):
+                    yield self.uuid(), message_id, sender, emoji
+
+    def typing_indicators(self):
+        for conversation_id, members in self.conversations[::20]:
+            yield self.uuid(), conversation_id, members[0]
+
+    def notifications(self):
+        for i in range(self.users * 20):
+            user_id = self.user_ids[self.skewed(self.users)]
+            read = self.rng.random() < 0.7
+            yield self.uuid(), user_id, "message", "Nouveau message", f"Notification {i}", read, read, self.at(i * 10)
+
+    def matches(self):
+        searchers = self.user_ids[len(self.owners):]
+        for s, searcher in enumerate(searchers):
+            count = 200 if s == 0 else 10
+            for owner in self.rng.sample(self.owners, min(count, len(self.owners))):
+                yield (self.uuid(), searcher, self.rng.choice(self.property_ids), owner,
+                       self.rng.randint(0, 100), "active", self.at(s))
+
+def load_data(conn, data, messages_per_conversation):
+    """Bulk load with COPY, triggers and FK checks off (session_replication_role = replica)"""
+    conversations, participants = data.conversations_and_participants()
+    messages = list(data.messages(messages_per_conversation))
+    plan = [
+        ("auth.users", ("id", "email", "created_at"), data.auth_users()),
+        ("users", ("id", "email", "full_name", "user_type", "created_at"), data.public_users()),
+        ("user_profiles", ("user_id", "user_type", "profile_completion_score"), data.user_profiles()),
+        ("properties", ("id", "owner_id", "title", "property_type", "address", "city", "postal_code",
+                        "monthly_rent", "status", "is_available", "created_at"), data.properties()),
+        ("conversations", ("id", "type", "created_by", "created_at", "updated_at"), conversations),
+        ("conversation_participants", ("id", "conversation_id", "user_id", "role"), participants),
+        ("messages", ("id", "conversation_id", "sender_id", "content", "message_type", "deleted", "created_at"),
+         messages),
+        ("message_reactions", ("id", "message_id", "user_id", "emoji"), data.reactions(messages)),
+        ("typing_indicators", ("id", "conversation_id", "user_id"), data.typing_indicators()),
+        ("notifications", ("id", "user_id", "type", "title", "message", "read", "is_read", "created_at"),
+         data.notifications()),
+        ("matches", ("id", "searcher_id", "property_id", "owner_id", "total_score", "status", "created_at"),
+         data.matches()),
+    ]
+    with conn.transaction():
+        conn.execute("SET LOCAL session_replication_role = replica")
+        for table, columns, rows in plan:
+            count, seconds = copy_rows(conn, table, columns, rows)
+            print(f"  - {table}: {count:,} rows in {seconds:.2f}s ({count / max(seconds, 1e-6):,.0f} rows/s)")
+    conn.execute("ANALYZE")
+
+def query_params(data):
+    """The busiest user and conversation: worst case for every hot query"""
+    busiest_user = data.user_ids[0]
+    return {
+        "user_id": busiest_user,
+        "conversation_id": data.conversations[0][0],
+        "conversation_ids": [c for c, members in data.conversations if busiest_user in members][:50],
+        "message_id": data.reacted_message or uuid.UUID(int=0),
+        "city": CITIES[0]
+    }
+
+# ============================================
+# PLANS
+# ============================================
+
+def plan_nodes(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from plan_nodes(child)
+
+def explain(conn, sql, params, disable_indexes=False):
+    with conn.transaction():
+        if disable_indexes:
+            conn.execute(DISABLE_INDEXES)
+        cur = conn.cursor(row_factory=None)
+        cur.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {sql}", params)
+        return cur.fetchone()[0][0]
+
+def table_rows(conn):
+    return {name: int(rows) for name, rows in conn.execute(
+        "SELECT relname, reltuples FROM pg_class c JOIN pg_namespace n ON n.oid = c.relnamespace "
+        "WHERE n.nspname = 'public' AND c.relkind = 'r'")}
+
+def run_query(conn, query, params, rows, runs, min_rows):
+    for _ in range(runs):  # warm-up
+        explain(conn, query["sql"], params)
+    timings = [explain(conn, query["sql"], params)["Execution Time"] for _ in range(runs)]
+    result = explain(conn, query["sql"], params)  # the plan that is checked and reported
+    nodes = list(plan_nodes(result["Plan"]))
+    allowed = set(query.get("seq_scan_allowed", ()))
+    seq_scans = sorted({n["Relation Name"] for n in nodes if n["Node Type"] == "Seq Scan"
+                        and rows.get(n["Relation Name"], 0) >= min_rows and n["Relation Name"] not in allowed})
+    indexes = sorted({n["Index Name"] for n in nodes if "Index Name" in n})
+    baseline = explain(conn, query["sql"], params, disable_indexes=True)["Execution Time"]
+    ms = statistics.median(timings)
+
+    failures = []
+    if seq_scans:
+        failures.append(f"seq scan on {', '.join(seq_scans)}")
+    if ms > query["budget_ms"]:
+        failures.append(f"{ms:.2f} ms > budget {query['budget_ms']} ms")
+    return {
+        "name": query["name"], "ms": ms, "budget_ms": query["budget_ms"], "no_index_ms": baseline,
+        "speedup": baseline / ms if ms else None, "indexes": indexes, "expected_index": query["index"],
+        "buffers": result["Plan"].get("Shared Hit Blocks", 0) + result["Plan"].get("Shared Read Blocks", 0),
+        "seq_scans": seq_scans, "failures": failures, "plan": result["Plan"]
+    }
+
+def print_results(results):
+    print()
+    for r in results:
+        status = "❌" if r["failures"] else "✅"
+        speedup = f"{r['speedup']:.0f}×" if r["speedup"] else "-"
+        print(f"{status} {r['name']}: {r['ms']:.2f} ms (budget {r['budget_ms']} ms), {r['buffers']} buffers, "
+              f"{speedup} vs no index ({r['no_index_ms']:.2f} ms)")
+        print(f"     uses: {', '.join(r['indexes']) or 'no index'}")
+        if r["expected_index"] and r["expected_index"] not in r["indexes"]:
+            print(f"     ⚠️  documented index {r['expected_index']} not used")
+        for failure in r["failures"]:
+            print(f"     ❌ {failure}")
+    failed = [r for r in results if r["failures"]]
+    print(f"\n{'❌' if failed else '✅'} {len(results) - len(failed)}/{len(results)} hot queries within plan and budget")
+
+# ============================================
+# SCRATCH DATABASE
+# ============================================
+
+def positive_int(text):
+    """argparse type for counts that must be at least 1"""
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return value
+
+def add_database_arguments(parser, synthetic=True):
+    """Options shared with rls_profiler.py and match_benchmark.py"""
+    parser.add_argument("--dsn", help="use this server (a temporary database is created and dropped)")
+    parser.add_argument("--pg-bin", help="PostgreSQL bin directory with initdb/pg_ctl (default: $PG_BIN, PATH)")
+    parser.add_argument("--seed", type=int, default=42)
+    if synthetic:
+        parser.add_argument("--users", type=int, default=5000, help="synthetic users; other tables scale from it")
+        parser.add_argument("--messages", type=int, default=25, help="average messages per conversation")
+
+@contextmanager
+def scratch_database(psycopg, args, database, settings=()):
+    """Temporary database with the schema loaded; yields an autocommit connection
+
+    Without --dsn a throwaway cluster is started with `settings` (-c name=value);
+    raises RuntimeError when that is not possible.
+    """
+    stop = None
+    dsn = args.dsn
+    if dsn is None:
+        pg_bin = find_pg_bin(args.pg_bin)
+        if pg_bin is None:
+            raise RuntimeError("initdb not found: install PostgreSQL, or pass --pg-bin / --dsn")
+        print(f"🐘 Starting a throwaway Postgres ({pg_bin})...")
+        dsn, stop = start_local_postgres(pg_bin, settings)
+
+    try:
+        with psycopg.connect(dsn, autocommit=True) as admin:
+            admin.execute(f"DROP DATABASE IF EXISTS {database}")
+            admin.execute(f"CREATE DATABASE {database} TEMPLATE template0 ENCODING 'UTF8'")
+        conninfo = psycopg.conninfo.make_conninfo(dsn, dbname=database)
+        with psycopg.connect(conninfo, autocommit=True, cursor_factory=psycopg.ClientCursor) as conn:
+            failures = load_schema(conn)
+            print(f"🧱 Schema loaded ({len(failures)} baseline statements failed, see squash warnings)")
+            yield conn
+    finally:
+        with psycopg.connect(dsn, autocommit=True) as admin:
+            admin.execute(f"DROP DATABASE IF EXISTS {database} WITH (FORCE)")
+        if stop is not None:
+            stop()
+
+@contextmanager
+def synthetic_database(psycopg, args, prefix, settings=()):
+    """scratch_database() + the synthetic dataset; yields (conn, data)"""
+    with scratch_database(psycopg, args, f"{prefix}_{args.seed}_{args.users}", settings) as conn:
+        print(f"📦 Loading synthetic data ({args.users:,} users)...")
+        data = SyntheticData(args.users, args.seed)
+        load_data(conn, data, args.messages)
+        yield conn, data
+
+def main():
+    parser = argparse.ArgumentParser(description="Synthetic data + EXPLAIN ANALYZE regression suite for hot queries")
+    add_database_arguments(parser)
+    parser.add_argument("--runs", type=positive_int, default=5, help="EXPLAIN ANALYZE runs per query (median)")
+    parser.add_argument("--min-rows", type=int, default=1000, help="seq scans on smaller tables are accepted")
+    parser.add_argument("--json", help="write timings and plans as JSON")
+    args = parser.parse_args()
+
+    try:
+        import psycopg
+    except ImportError:
+        print("❌ psycopg is required: pip install 'psycopg[binary]'")
+        return 1
+
+    try:
+        with synthetic_database(psycopg, args, "plan_regression") as (conn, data):
+            params = query_params(data)
+            rows = table_rows(conn)
+            results = [run_query(conn, query, params, rows, args.runs, args.min_rows) for query in HOT_QUERIES]
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return 1
+
+    print_results(results)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"users": args.users, "seed": args.seed, "queries": results}, f, indent=2, default=str)
+        print(f"📝 JSON report: {args.json}")
+    return 1 if any(r["failures"] for r in results) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+"""
+RLS Policy Cost Profiler
+Measures what the row level security policies cost, table by table and policy
+by policy, with pg_stat_statements on a local Postgres
+
+The database is the one of plan_regression.py (squashed schema + synthetic
+dataset). Tables that have SELECT policies but no synthetic data get generic
+rows, with foreign keys pointing at real users/properties/conversations so
+that membership subqueries find something. A representative workload runs
+as several simulated users (auth.uid() set like PostgREST does):
+
+    - `SELECT count(*) FROM <table>` for every table with SELECT policies:
+      RLS is the only filter, like the client lists of the app
+    - the hot queries of plan_regression.py, with the user as parameter
+
+Each workload runs with policies on (authenticated/anon), off (service_role,
+BYPASSRLS) and with one policy at a time (the others dropped in a rolled back
+transaction). pg_stat_statements gives the execution time of each run and,
+with track = all, the statements executed inside policy helper functions:
+a nested statement called once per row is the typical policy to rewrite.
+Plans with and without RLS are diffed for the most expensive tables.
+
+Usage:
+    python rls_profiler.py                       # throwaway Postgres, 5k users
+    python rls_profiler.py --dsn "postgresql://postgres@localhost:54322/postgres"
+    python rls_profiler.py --table messages --table security_events
+    python rls_profiler.py --json rls.json
+
+pg_stat_statements must be in shared_preload_libraries when --dsn is used
+(the Supabase local stack has it).
+"""
+
+import argparse
+import difflib
+import json
+import re
+import sys
+
+from plan_regression import HOT_QUERIES, add_database_arguments, check_choices, copy_rows, synthetic_database, table_columns
+
+# Simulated users: (name, role, index in the synthetic users or None for anon)
+# User 0 is the busiest owner; user 1 is made admin (admins table)
+PERSONAS = [
+    ("busy owner", "authenticated", 0),
+    ("admin", "authenticated", 1),
+    ("searcher", "authenticated", -1),
+    ("anonymous", "anon", None),
+]
+BYPASS_ROLE = "service_role"
+
+# Tables left empty by the generic filler: rows there change who is admin
+NOT_FILLED = {"admins"}
+
+STATS_QUERY = """
+    SELECT toplevel, userid = to_regrole(%s)::oid, calls, total_exec_time,
+           shared_blks_hit + shared_blks_read, query
+    FROM pg_stat_statements WHERE dbid = (SELECT oid FROM pg_database WHERE datname = current_database())
+"""
+
+POLICIES_QUERY = """
+    SELECT tablename, policyname, permissive, roles::text[], cmd, coalesce(qual, '')
+    FROM pg_policies WHERE schemaname = 'public' AND cmd IN ('SELECT', 'ALL')
+    ORDER BY tablename, policyname
+"""
+
+AUTH_CALL = re.compile(r"auth\.(uid|jwt|role)\(\)")
+WRAPPED_AUTH_CALL = re.compile(r"\(\s*SELECT auth\.(uid|jwt|role)\(\)")
+
+# ============================================
+# GENERIC ROWS
+# ============================================
+
+def foreign_keys(conn, table):
+    """Single-column foreign keys: column -> (referenced table, referenced column)"""
+    return {column: (ref_table, ref_column) for column, ref_table, ref_column in conn.execute("""
+        SELECT a.attname, c.confrelid::regclass::text, af.attname
+        FROM pg_constraint c
+        JOIN pg_attribute a ON a.attrelid = c.conrelid AND a.attnum = c.conkey[1]
+        JOIN pg_attribute af ON af.attrelid = c.confrelid AND af.attnum = c.confkey[1]
+        WHERE c.conrelid = %s::regclass AND c.contype = 'f' AND cardinality(c.conkey) = 1
+    """, (f"public.{table}",))}
+
+def enum_types(conn, table):
+    """column -> enum type, for the USER-DEFINED columns"""
+    return dict(conn.execute("""
+        SELECT column_name, format('%%I.%%I', udt_schema, udt_name) FROM information_schema.columns
+        WHERE table_schema = 'public' AND table_name = %s AND data_type = 'USER-DEFINED'
+    """, (table,)).fetchall())
+
+def filler_expression(data_type, choice, enum=None):
+    """SQL expression of generate_series(g) for a required column"""
+    if choice is not None:
+        return "'" + choice.replace("'", "''") + "'"
+    if enum is not None:
+        return f"(enum_range(NULL::{enum}))[1]"
+    if data_type in ("integer", "bigint", "smallint", "numeric", "real", "double precision"):
+        return "1 + g % 5"
+    if data_type == "boolean":
+        return "g % 2 = 0"
+    if data_type == "uuid":
+        return "gen_random_uuid()"
+    if data_type.startswith("timestamp"):
+        return "now() - g * interval '1 minute'"
+    if data_type == "date":
+        return "current_date - g % 365"
+    if data_type in ("json", "jsonb", "ARRAY"):
+        return "'{}'"
+    return "'x' || g"
+
+def fill_table(conn, table, count):
+    """INSERT ... SELECT generate_series: foreign keys drawn from the referenced rows,
+    required columns from filler_expression(); returns None or the error
+
+    Foreign key columns are indexed in mixed radix (first column varies fastest)
+    so that the combinations stay distinct for composite UNIQUE constraints.
+    """
+    columns = table_columns(conn, table)
+    choices = check_choices(conn, f"public.{table}")
+    enums = enum_types(conn, table)
+    pools, names, values = [], [], []
+    stride = "1::numeric"
+    for column, (ref_table, ref_column) in foreign_keys(conn, table).items():
+        pool = f"p{len(pools)}"
+        pools.append(f"(SELECT array_agg({ref_column}) FROM (SELECT {ref_column} FROM {ref_table} LIMIT {count}) s) AS {pool}")
+        names.append(column)
+        size = f"greatest(cardinality({pool}), 1)"
+        values.append(f"{pool}[1 + (div(g, {stride}) % {size})::int]")
+        stride = f"{stride} * {size}"
+    for column, (data_type, required) in columns.items():
+        if required and column not in names:
+            names.append(column)
+            values.append(filler_expression(data_type, choices.get(column), enums.get(column)))
+    pools_sql = f", (SELECT {', '.join(pools)}) pools" if pools else ""
+
+    for attempt in (count, min(count, 100)):
+        sql = (f"INSERT INTO public.{table}{' (' + ', '.join(names) + ')' if names else ''} "
+               f"SELECT {', '.join(values)} FROM generate_series(0, {attempt - 1}) g{pools_sql}")
+        try:
+            with conn.transaction():
+                conn.execute("SET LOCAL session_replication_role = replica")
+                conn.execute(sql)
+            return None
+        except Exception as e:
+            error = str(e).strip().splitlines()[0]
+            # UNIQUE constraint on a single FK: fewer rows than referenced values
+            if "duplicate key" not in error:
+                break
+    return error
+
+def fill_order(conn, tables):
+    """Empty tables to fill, referenced tables first (their ids feed the foreign keys)"""
+    order, seen = [], set()
+
+    def visit(table):
+        if table in seen or table in NOT_FILLED:
+            return
+        seen.add(table)
+        if conn.execute(f"SELECT EXISTS (SELECT 1 FROM public.{table})").fetchone()[0]:
+            return
+        for ref_table, _ in foreign_keys(conn, table).values():
+            schema, _, name = ref_table.rpartition(".")
+            if schema in ("", "public") and name != table:
+                visit(name)
+        order.append(table)
+
+    for table in tables:
+        visit(table)
+    return order
+
+def prepare_tables(conn, data, tables, count):
+    """Generic rows for the empty profiled tables (and what they reference), user 1 as admin"""
+    if conn.execute("SELECT to_regclass('public.admins')").fetchone()[0]:
+        with conn.transaction():
+            conn.execute("SET LOCAL session_replication_role = replica")
+            copy_rows(conn, "admins", ("user_id", "email"), [(data.user_ids[1], "admin@example.test")])
+
+    skipped = {}
+    for table in fill_order(conn, tables):
+        error = fill_table(conn, table, count)
+        if error and table in tables:
+            skipped[table] = error
+    conn.execute("ANALYZE")
+    return skipped
+
+# ============================================
+# MEASURES
+# ============================================
+
+def session_setup(conn):
+    """Utility statements (SET, DROP POLICY) stay out of the stats, helper function bodies are in"""
+    if not conn.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_stat_statements'").fetchone():
+        conn.execute("CREATE EXTENSION pg_stat_statements")
+    conn.execute("SET pg_stat_statements.track = 'all'")
+    conn.execute("SET pg_stat_statements.track_utility = off")
+    conn.execute("SELECT pg_stat_statements_reset()")
+
+def as_user(conn, role, uid, keep_policy=None, table=None):
+    """Inside a transaction: optionally drop every policy of `table` but one, then impersonate"""
+    if keep_policy is not None:
+        for (name,) in conn.execute("SELECT policyname FROM pg_policies WHERE schemaname = 'public' "
+                                    "AND tablename = %s AND policyname <> %s", (table, keep_policy)).fetchall():
+            conn.execute(f'DROP POLICY "{name.replace(chr(34), chr(34) * 2)}" ON public.{table}')
+    claims = json.dumps({"sub": str(uid), "role": role}) if uid else ""
+    conn.execute("SELECT set_config('request.jwt.claim.sub', %s, true), set_config('request.jwt.claim.role', %s, true), "
+                 "set_config('request.jwt.claims', %s, true)", (str(uid) if uid else "", role, claims))
+    conn.execute(f"SET LOCAL ROLE {role}")
+
+def measure(conn, sql, params, role, uid, runs, keep_policy=None, table=None):
+    """Run `sql` `runs` times as role/uid; pg_stat_statements time per run and nested calls"""
+    conn.execute("SELECT pg_stat_statements_reset()")
+    error = None
+    try:
+        with conn.transaction(force_rollback=True):
+            as_user(conn, role, uid, keep_policy, table)
+            for _ in range(runs):
+                conn.execute(sql, params).fetchall()
+    except Exception as e:
+        error = str(e).strip().splitlines()[0]
+
+    result = {"ms": 0.0, "buffers": 0, "nested": [], "error": error}
+    for toplevel, own, calls, total, buffers, query in conn.execute(STATS_QUERY, (role,)):
+        if toplevel and own:
+            result["ms"] += total / runs
+            result["buffers"] += buffers // runs
+        elif not toplevel:
+            result["nested"].append({"query": " ".join(query.split())[:120], "calls": calls // runs,
+                                     "ms": total / runs})
+    result["nested"].sort(key=lambda n: -n["ms"])
+    return result
+
+def explain(conn, sql, params, role, uid, keep_policy=None, table=None):
+    try:
+        with conn.transaction(force_rollback=True):
+            as_user(conn, role, uid, keep_policy, table)
+            return [row[0] for row in conn.execute(f"EXPLAIN (COSTS OFF) {sql}", params)]
+    except Exception as e:
+        return [f"ERROR: {str(e).strip().splitlines()[0]}"]
+
+def per_row_subplans(plan):
+    """SubPlans re-executed per row (hashed ones and InitPlans run once)"""
+    text = "\n".join(plan)
+    subplans = set(re.findall(r"^\s*SubPlan (\w+)$", text, re.M))
+    return len(subplans - set(re.findall(r"hashed SubPlan (\w+)", text)))
+
+def policy_hints(qual, subplans, nested, rows):
+    hints = []
+    if AUTH_CALL.search(qual) and not WRAPPED_AUTH_CALL.search(qual):
+        hints.append("wrap auth.uid() as (SELECT auth.uid()) so it is evaluated once per statement")
+    if subplans:
+        hints.append(f"{subplans} per-row subquer{'ies' if subplans > 1 else 'y'}: "
+                     "SECURITY DEFINER helper returning the allowed ids, or a cached membership table")
+    per_row = [n for n in nested if rows and n["calls"] >= rows / 2]
+    if per_row:
+        hints.append(f"helper statement runs once per row ({per_row[0]['calls']}×): {per_row[0]['query'][:60]}")
+    return hints
+
+def personas(data):
+    return [(name, role, None if index is None else data.user_ids[index]) for name, role, index in PERSONAS]
+
+def applies_to(policy, role):
+    return bool({"public", role} & set(policy["roles"]))
+
+def profile(conn, data, tables, policies, runs):
+    """Per table: off/on per persona + one measure per applicable policy"""
+    results = []
+    for table in tables:
+        sql = f"SELECT count(*) FROM public.{table}"
+        rows = conn.execute(f"SELECT count(*) FROM public.{table}").fetchone()[0]
+        off = measure(conn, sql, None, BYPASS_ROLE, None, runs)
+        entry = {"table": table, "rows": rows, "off_ms": off["ms"], "personas": {}, "policies": []}
+        for name, role, uid in personas(data):
+            on = measure(conn, sql, None, role, uid, runs)
+            entry["personas"][name] = {"ms": on["ms"], "overhead_ms": on["ms"] - off["ms"],
+                                       "buffers": on["buffers"], "error": on["error"]}
+        for policy in policies.get(table, []):
+            worst = None
+            for name, role, uid in personas(data):
+                if not applies_to(policy, role):
+                    continue
+                isolated = measure(conn, sql, None, role, uid, runs, policy["name"], table)
+                # A failed measure only counts if no other one succeeded
+                if worst is None or (bool(worst[1]["error"]), -worst[1]["ms"]) > (bool(isolated["error"]), -isolated["ms"]):
+                    worst = (name, isolated, role, uid)
+            if worst is None:
+                continue
+            name, isolated, role, uid = worst
+            plan = explain(conn, sql, None, role, uid, policy["name"], table)
+            subplans = per_row_subplans(plan)
+            entry["policies"].append({
+                "policy": policy["name"], "cmd": policy["cmd"], "persona": name, "ms": isolated["ms"],
+                "overhead_ms": isolated["ms"] - off["ms"], "nested": isolated["nested"][:5],
+                "subplans": subplans, "error": isolated["error"],
+                "hints": policy_hints(policy["qual"], subplans, isolated["nested"], rows)
+            })
+        measured = [p for p in entry["personas"].values() if not p["error"]]
+        entry["overhead_ms"] = max((p["overhead_ms"] for p in measured), default=0.0)
+        entry["errors"] = {name: p["error"] for name, p in entry["personas"].items() if p["error"]}
+        results.append(entry)
+    results.sort(key=lambda e: -e["overhead_ms"])
+    return results
+
+def plan_diff(conn, data, table):
+    """EXPLAIN without RLS vs as the busiest user"""
+    sql = f"SELECT count(*) FROM public.{table}"
+    name, role, uid = personas(data)[0]
+    off = explain(conn, sql, None, BYPASS_ROLE, None)
+    on = explain(conn, sql, None, role, uid)
+    return list(difflib.unified_diff(off, on, "rls off", f"rls on ({name})", n=0, lineterm=""))[2:]
+
+def hot_queries(conn, data, runs):
+    """plan_regression hot queries, on vs off, for each logged-in persona"""
+    results = []
+    for query in HOT_QUERIES:
+        for name, role, uid in personas(data):
+            if uid is None:
+                continue
+            user_conversations = [c for c, members in data.conversations if uid in members][:50]
+            params = {"user_id": uid, "conversation_id": (user_conversations or [data.conversations[0][0]])[0],
+                      "conversation_ids": user_conversations, "message_id": data.reacted_message,
+                      "city": "Bruxelles"}
+            off = measure(conn, query["sql"], params, BYPASS_ROLE, None, runs)
+            on = measure(conn, query["sql"], params, role, uid, runs)
+            results.append({"query": query["name"], "persona": name, "off_ms": off["ms"], "on_ms": on["ms"],
+                            "overhead_ms": on["ms"] - off["ms"], "error": on["error"]})
+    return results
+
+# ============================================
+# REPORT
+# ============================================
+
+def print_report(results, diffs, hot, top):
+    print("\n📊 RLS overhead per table (count(*) with policies on - off, worst persona)")
+    for entry in results[:top]:
+        measured = [p for p in entry["personas"] if not entry["personas"][p]["error"]] or ["-"]
+        persona = max(measured, key=lambda p: entry["personas"].get(p, {}).get("overhead_ms", 0))
+        print(f"  {entry['overhead_ms']:8.2f} ms  {entry['table']} ({entry['rows']:,} rows, "
+              f"off {entry['off_ms']:.2f} ms, worst: {persona})")
+
+    print("\n🔍 Most expensive policies (alone on their table)")
+    policies = sorted(((entry, p) for entry in results for p in entry["policies"] if not p["error"]),
+                      key=lambda x: -x[1]["overhead_ms"])
+    for entry, p in policies[:top]:
+        print(f"  {p['overhead_ms']:8.2f} ms  {entry['table']}.\"{p['policy']}\" ({p['cmd']}, {p['persona']})")
+        for n in p["nested"][:2]:
+            print(f"               ↳ {n['calls']}× {n['ms']:.2f} ms  {n['query'][:80]}")
+        for hint in p["hints"]:
+            print(f"               💡 {hint}")
+
+    errors = {}
+    for entry in results:
+        for persona, error in entry["errors"].items():
+            errors.setdefault((entry["table"], error), []).append(persona)
+    if errors:
+        print("\n❌ Policies failing at runtime")
+        for (table, error), names in sorted(errors.items()):
+            print(f"  {table}: {error} ({', '.join(names)})")
+
+    for table, diff in diffs.items():
+        print(f"\n🧭 Plan diff: {table}")
+        for line in diff:
+            print(f"  {line}")
+
+    if hot:
+        print("\n🔥 Hot queries (mean ms: off → on)")
+        for h in sorted(hot, key=lambda h: -h["overhead_ms"])[:top]:
+            status = f"❌ {h['error']}" if h["error"] else f"{h['overhead_ms']:+.2f} ms"
+            print(f"  {h['off_ms']:7.2f} → {h['on_ms']:7.2f}  {status}  {h['query']} ({h['persona']})")
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile RLS policy overhead with pg_stat_statements")
+    add_database_arguments(parser)
+    parser.add_argument("--table", action="append", help="profile only these tables (repeatable)")
+    parser.add_argument("--filler-rows", type=int, default=2000, help="generic rows for tables without synthetic data")
+    parser.add_argument("--runs", type=int, default=5, help="executions per measure")
+    parser.add_argument("--top", type=int, default=15, help="tables/policies shown")
+    parser.add_argument("--diffs", type=int, default=3, help="plan diffs shown (most expensive tables)")
+    parser.add_argument("--json", help="write the full profile as JSON")
+    args = parser.parse_args()
+
+    try:
+        import psycopg
+    except ImportError:
+        print("❌ psycopg is required: pip install 'psycopg[binary]'")
+        return 1
+
+    settings = ("shared_preload_libraries=pg_stat_statements",)
+    try:
+        with synthetic_database(psycopg, args, "rls_profiler", settings) as (conn, data):
+            try:
+                session_setup(conn)
+            except psycopg.Error as e:
+                print(f"❌ pg_stat_statements unavailable: {str(e).strip().splitlines()[0]}")
+                return 1
+
+            policies = {}
+            for table, name, permissive, roles, cmd, qual in conn.execute(POLICIES_QUERY):
+                policies.setdefault(table, []).append({"name": name, "permissive": permissive, "roles": roles,
+                                                       "cmd": cmd, "qual": qual})
+            tables = sorted(t for t in policies if not args.table or t in args.table)
+            skipped = prepare_tables(conn, data, tables, args.filler_rows)
+            print(f"🧪 Profiling {len(tables)} tables, {sum(len(policies[t]) for t in tables)} SELECT policies"
+                  + (f" ({len(skipped)} tables left empty: generic rows rejected)" if skipped else ""))
+
+            results = profile(conn, data, tables, policies, args.runs)
+            diffs = {entry["table"]: plan_diff(conn, data, entry["table"])
+                     for entry in [e for e in results if not e["errors"]][:args.diffs]}
+            hot = hot_queries(conn, data, args.runs) if not args.table else []
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return 1
+
+    print_report(results, diffs, hot, args.top)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"users": args.users, "tables": results, "plan_diffs": diffs, "hot_queries": hot,
+                       "empty_tables": skipped}, f, indent=2, default=str)
+        print(f"📝 JSON report: {args.json}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
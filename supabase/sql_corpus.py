@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+SQL Corpus
+Every .sql file under supabase/, parsed once and indexed by object
+
+Besides migrations/, supabase/ holds the ad-hoc FIX_*, APPLY_*, CHECK_* and
+seed scripts, and migrations_backup_20260118 copies most of the tree. All of
+them go through the cleanup_migrations.py parser in a process pool, cached by
+content hash in the same cache as the migrations (identical copies are parsed
+once), then an index from object key to files is built, so "which files touch
+table X or policy Y" is a dict lookup once the cache is warm.
+
+A file touches an object when it creates, alters, drops or writes it, when
+it references it (FROM, JOIN, REFERENCES, policy expressions...), or when it
+changes one of its children: a table is touched by its columns, constraints,
+indexes, policies and triggers.
+
+Usage:
+    python sql_corpus.py                                  # corpus summary
+    python sql_corpus.py table messages                   # files touching public.messages
+    python sql_corpus.py policy "Users can view their own notifications" --table notifications
+    python sql_corpus.py function calculate_match_score
+    python sql_corpus.py object 'index:public.idx_messages_*'   # any object key, glob allowed
+    python sql_corpus.py table properties --only script --json hits.json
+"""
+
+import argparse
+import fnmatch
+import json
+import sys
+import time
+from collections import defaultdict
+from pathlib import Path
+
+from cleanup_migrations import SUPABASE_DIR, base_key, count_label, object_type, parse_files, qualify
+
+# Path prefix -> category, first match wins (everything else is "script")
+CATEGORIES = (("migrations/", "migration"), ("migrations_backup", "backup"), ("baseline/", "baseline"),
+              ("schema.sql", "base"), ("local_shim.sql", "shim"))
+
+# Never part of the corpus
+EXCLUDED_DIRS = {".cache", "__pycache__", ".temp"}
+
+# ============================================
+# CORPUS
+# ============================================
+
+def category(relpath):
+    for prefix, name in CATEGORIES:
+        if relpath.startswith(prefix):
+            return name
+    return "script"
+
+def find_sql_files(root):
+    return sorted(p for p in Path(root).rglob("*.sql")
+                  if not EXCLUDED_DIRS & set(p.relative_to(root).parts[:-1]))
+
+class SqlCorpus:
+    """Parsed files plus an index from object key to the files touching it"""
+
+    def __init__(self, root, files):
+        self.root = Path(root)
+        self.files = files
+        self.by_path = {f["path"]: f for f in files}
+        # key -> {path: set of actions}, base keys (no function signature) included
+        self.index = defaultdict(lambda: defaultdict(set))
+        for f in files:
+            path = f["path"]
+            for key, entry in f["objects"].items():
+                for action in entry["actions"]:
+                    self._add(key, path, action)
+                    if entry["parent"]:
+                        self._add(entry["parent"], path, f"{action} {object_type(key)}")
+            for key in f["references"]:
+                self._add(key, path, "reference")
+
+    def _add(self, key, path, action):
+        self.index[key][path].add(action)
+        base = base_key(key)
+        if base != key:
+            self.index[base][path].add(action)
+
+    def keys(self, pattern):
+        """Object keys matching a key or a glob pattern"""
+        if not any(c in pattern for c in "*?["):
+            return [pattern] if pattern in self.index else []
+        return sorted(fnmatch.filter(self.index, pattern))
+
+    def touching(self, pattern, categories=None):
+        """[(path, category, sorted actions, matched keys)] for the files touching the object(s)"""
+        hits = defaultdict(lambda: (set(), set()))
+        for key in self.keys(pattern):
+            for path, actions in self.index[key].items():
+                hits[path][0].update(actions)
+                hits[path][1].add(key)
+        return [(path, self.by_path[path]["category"], sorted(actions), sorted(keys))
+                for path, (actions, keys) in sorted(hits.items())
+                if categories is None or self.by_path[path]["category"] in categories]
+
+    def table(self, name, categories=None):
+        return self.touching(f"table:{qualify(tuple(name.split('.')))}", categories)
+
+    def policy(self, name, table=None, categories=None):
+        prefix = qualify(tuple(table.split("."))) if table else "*"
+        return self.touching(f"policy:{prefix}.{fnmatch_escape(name)}", categories)
+
+    def function(self, name, categories=None):
+        return self.touching(f"function:{qualify(tuple(name.split('.')))}", categories)
+
+def fnmatch_escape(text):
+    """Literal text inside a glob pattern (policy names may contain brackets)"""
+    return "".join(f"[{c}]" if c in "*?[" else c for c in text)
+
+def load_corpus(root=SUPABASE_DIR, jobs=None, use_cache=True, stats=None):
+    """Parse every .sql file under root (in parallel, cached) and index it"""
+    root = Path(root)
+    paths = find_sql_files(root)
+    files = []
+    for path, parsed in zip(paths, parse_files(paths, jobs, use_cache, stats)):
+        relpath = path.relative_to(root).as_posix()
+        parsed.update(path=relpath, category=category(relpath))
+        files.append(parsed)
+    return SqlCorpus(root, files)
+
+# ============================================
+# REPORT
+# ============================================
+
+def print_summary(corpus, stats):
+    by_category = defaultdict(int)
+    for f in corpus.files:
+        by_category[f["category"]] += 1
+    statements = sum(len(f["statements"]) for f in corpus.files)
+    print(f"📚 {len(corpus.files)} SQL files under {corpus.root}: "
+          + ", ".join(f"{n} {c}" for c, n in sorted(by_category.items(), key=lambda x: -x[1])))
+    print(f"⚡ {stats['parsed']} parsed, {stats['cached']} from cache ({stats['seconds']:.2f}s), "
+          f"{statements} statements, {len(corpus.index)} object keys")
+
+    by_type = defaultdict(int)
+    for key in corpus.index:
+        if "(" not in key:
+            by_type[object_type(key)] += 1
+    print("🧱 Objects: " + ", ".join(count_label(n, t) for t, n in sorted(by_type.items(), key=lambda x: -x[1])))
+
+    outside = defaultdict(set)
+    migrated = {key for f in corpus.files if f["category"] == "migration" for key in f["objects"]}
+    for f in corpus.files:
+        if f["category"] == "script":
+            for key, entry in f["objects"].items():
+                if key not in migrated and any(a in ("create", "replace") for a in entry["actions"]):
+                    outside[f["path"]].add(key)
+    if outside:
+        print(f"\n⚠️  Objects created only by ad-hoc scripts ({sum(len(k) for k in outside.values())}), "
+              "not by any migration:")
+        for path, keys in sorted(outside.items(), key=lambda x: -len(x[1]))[:15]:
+            print(f"  - {path}: {len(keys)} ({', '.join(sorted(keys)[:3])}{', ...' if len(keys) > 3 else ''})")
+
+def print_hits(what, hits, seconds):
+    if not hits:
+        print(f"🔍 No file touches {what}")
+        return
+    print(f"🔍 {len(hits)} files touch {what} ({seconds * 1000:.1f} ms)\n")
+    for path, cat, actions, keys in hits:
+        print(f"  - [{cat}] {path}: {', '.join(actions)}")
+        if len(keys) > 1 or keys[0] != what:
+            print(f"      via {', '.join(keys[:5])}{' ...' if len(keys) > 5 else ''}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Query every SQL file under supabase/ by object")
+    parser.add_argument("--root", type=Path, default=SUPABASE_DIR, help="directory to scan (default: %(default)s)")
+    parser.add_argument("--jobs", type=int, default=None, help="parser processes (default: CPU count)")
+    parser.add_argument("--no-cache", action="store_true", help="ignore and do not write the parse cache")
+    sub = parser.add_subparsers(dest="command")
+
+    query = argparse.ArgumentParser(add_help=False)
+    query.add_argument("--only", help="comma-separated categories: migration, backup, baseline, base, shim, script")
+    query.add_argument("--json", help="write the hits as JSON")
+
+    p = sub.add_parser("table", parents=[query], help="files touching a table, its columns, indexes, policies or triggers")
+    p.add_argument("name")
+    p = sub.add_parser("policy", parents=[query], help="files touching a policy (every table unless --table)")
+    p.add_argument("name")
+    p.add_argument("--table")
+    p = sub.add_parser("function", parents=[query], help="files touching a function (every overload)")
+    p.add_argument("name")
+    p = sub.add_parser("object", parents=[query], help="files touching any object key, e.g. 'column:public.users.email'")
+    p.add_argument("key", help="object key or glob pattern")
+
+    args = parser.parse_args()
+    stats = {}
+    corpus = load_corpus(args.root, jobs=args.jobs, use_cache=not args.no_cache, stats=stats)
+    if args.command is None:
+        print_summary(corpus, stats)
+        return 0
+
+    categories = set(args.only.split(",")) if args.only else None
+    start = time.perf_counter()
+    if args.command == "table":
+        what = f"table:{qualify(tuple(args.name.split('.')))}"
+        hits = corpus.table(args.name, categories)
+    elif args.command == "policy":
+        what = f"policy {args.name!r}"
+        hits = corpus.policy(args.name, args.table, categories)
+    elif args.command == "function":
+        what = f"function:{qualify(tuple(args.name.split('.')))}"
+        hits = corpus.function(args.name, categories)
+    else:
+        what = args.key
+        hits = corpus.touching(args.key, categories)
+    print_hits(what, hits, time.perf_counter() - start)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump([{"path": p, "category": c, "actions": a, "keys": k} for p, c, a, k in hits], f, indent=2)
+        print(f"\n📝 JSON report: {args.json}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())